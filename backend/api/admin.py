@@ -4,8 +4,27 @@ from django.contrib.auth.admin import UserAdmin
 from .models import (
     CustomUser, Task, ProcessStatus, ProcessStage, PMBOKProcess, 
     ScrumProcess, ScrumPhase, Department, PMBOKProcessCustomization, 
-    ScrumProcessCustomization
+    ScrumProcessCustomization, Job
 )
+from .progress import schedule_rebuild
+
+
+class ProgressSummaryAdminMixin:
+    """
+    El admin no aplica deltas al resumen de progreso (api/progress.py): cualquier cambio
+    en procesos, departamentos o personalizaciones lo recalcula al hacer commit.
+    """
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        schedule_rebuild()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        schedule_rebuild()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        schedule_rebuild()
 
 class CustomUserAdmin(UserAdmin):
     model = CustomUser
@@ -36,7 +55,7 @@ class ScrumPhaseAdmin(admin.ModelAdmin):
     search_fields = ('name',)
 
 @admin.register(PMBOKProcess)
-class PMBOKProcessAdmin(admin.ModelAdmin):
+class PMBOKProcessAdmin(ProgressSummaryAdminMixin, admin.ModelAdmin):
     list_display = ('process_number', 'name', 'status', 'stage', 'kanban_status')
     list_filter = ('status', 'stage', 'kanban_status')
     search_fields = ('name', 'process_number')
@@ -48,12 +67,12 @@ class PMBOKProcessAdmin(admin.ModelAdmin):
         }),
         ('Detalles del Proceso (ITTOs)', {
             'fields': ('inputs', 'tools_and_techniques', 'outputs'),
-            'description': "Edite el JSON directamente. Cada item debe ser un objeto con 'name' (string) y 'url' (string, puede estar vacío)."
+            'description': "Edite el JSON directamente. Cada item debe ser un objeto con 'name' (string) y 'url' (string, puede estar vacío). Al guardar se eliminan claves desconocidas (ej. 'id') y duplicados."
         }),
     )
 
 @admin.register(ScrumProcess)
-class ScrumProcessAdmin(admin.ModelAdmin):
+class ScrumProcessAdmin(ProgressSummaryAdminMixin, admin.ModelAdmin):
     list_display = ('process_number', 'name', 'status', 'phase')
     list_filter = ('status', 'phase',)
     search_fields = ('name', 'process_number')
@@ -65,12 +84,12 @@ class ScrumProcessAdmin(admin.ModelAdmin):
         }),
         ('Detalles del Proceso (ITTOs)', {
             'fields': ('inputs', 'tools_and_techniques', 'outputs'),
-            'description': "Edite el JSON directamente. Cada item debe ser un objeto con 'name' (string) y 'url' (string, puede estar vacío)."
+            'description': "Edite el JSON directamente. Cada item debe ser un objeto con 'name' (string) y 'url' (string, puede estar vacío). Al guardar se eliminan claves desconocidas (ej. 'id') y duplicados."
         }),
     )
 
 @admin.register(Department)
-class DepartmentAdmin(admin.ModelAdmin):
+class DepartmentAdmin(ProgressSummaryAdminMixin, admin.ModelAdmin):
     list_display = ('name', 'parent', 'tailwind_border_color')
     search_fields = ('name',)
     list_filter = ('parent',)
@@ -81,12 +100,18 @@ admin.site.register(Task)
 
 # Registrar los modelos de personalización para depuración
 @admin.register(PMBOKProcessCustomization)
-class PMBOKProcessCustomizationAdmin(admin.ModelAdmin):
+class PMBOKProcessCustomizationAdmin(ProgressSummaryAdminMixin, admin.ModelAdmin):
     list_display = ('process', 'country_code', 'department', 'kanban_status')
     list_filter = ('country_code', 'department', 'kanban_status')
 
 @admin.register(ScrumProcessCustomization)
-class ScrumProcessCustomizationAdmin(admin.ModelAdmin):
+class ScrumProcessCustomizationAdmin(ProgressSummaryAdminMixin, admin.ModelAdmin):
     list_display = ('process', 'country_code', 'department', 'kanban_status')
     list_filter = ('country_code', 'department', 'kanban_status')
 
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'status', 'progress', 'total', 'attempts', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'kind')
+    readonly_fields = [field.name for field in Job._meta.fields]
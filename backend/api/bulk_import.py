@@ -0,0 +1,268 @@
+# backend/api/bulk_import.py
+"""
+Importación masiva de personalizaciones desde CSV o NDJSON
+(POST /api/customizations/import/ y `manage.py import_customizations`).
+
+Un registro por personalización: framework, process_number, country_code,
+department_id (vacío = nivel país), inputs / tools_and_techniques / outputs (listas
+JSON; vacío o null = hereda la base) y kanban_status (opcional).
+
+  1. Python valida el esquema de los ITTOs y los guarda en su forma mínima frente a la
+     base (api/itto.py), igual que POST /api/customizations/.
+  2. Las filas se cargan en una tabla temporal: COPY en PostgreSQL, INSERT por lotes en
+     SQLite (desarrollo y tests).
+  3. SQL marca los errores (departamento inexistente, estado Kanban inválido, registro
+     repetido en el fichero) y descarta esas filas.
+  4. Un UPDATE ... FROM actualiza las personalizaciones existentes (país sin distinguir
+     mayúsculas, departamento NULL incluido, que la restricción única no cubre) y un
+     INSERT ... SELECT ... ON CONFLICT crea el resto; el ON CONFLICT cubre la carrera
+     con otra escritura simultánea.
+
+Como cloning.py, las sentencias no disparan señales: la versión del catálogo y el
+resumen de progreso se actualizan explícitamente.
+"""
+import csv
+import io
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import progress
+from .catalog import FRAMEWORKS, bump_catalog_version, is_country_code
+from .itto import ITTO_FIELDS, canonicalize_itto_list, compact_itto_list
+from .metrics import BULK_ROWS
+from .models import KANBAN_STATUS_CHOICES, Department
+
+FORMATS = ('csv', 'ndjson')
+STAGING_TABLE = 'customization_import_staging'
+STAGING_COLUMNS = ('line', 'framework', 'process_id', 'country_code', 'department_id',
+                   *ITTO_FIELDS, 'kanban_status')
+INSERT_BATCH = 1000
+
+
+class ImportFailed(Exception):
+    """Importación en modo estricto con errores: no se escribe nada."""
+
+    def __init__(self, report):
+        super().__init__(f"{len(report['errors'])} filas con errores")
+        self.report = report
+
+
+# ----------------------------------------------------------------------------
+# Lectura y validación en Python
+# ----------------------------------------------------------------------------
+def read_records(stream, fmt):
+    """Genera (línea, dict) desde un fichero de texto CSV o NDJSON."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield line_number, exc
+            continue
+        yield line_number, record if isinstance(record, dict) else ValueError('Se esperaba un objeto JSON.')
+
+
+def _itto_value(value, field):
+    if value in (None, ''):
+        return None
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            raise ValidationError(f'{field}: JSON inválido.')
+    return canonicalize_itto_list(value, field)
+
+
+def _bases():
+    """{framework: {process_number: (id, {campo: lista base})}} (una consulta por framework)."""
+    return {
+        framework: {row[0]: (row[1], dict(zip(ITTO_FIELDS, row[2:])))
+                    for row in process_model.objects.values_list('process_number', 'id', *ITTO_FIELDS)}
+        for framework, (process_model, _) in FRAMEWORKS.items()
+    }
+
+
+def parse(stream, fmt):
+    """Devuelve (filas para la tabla temporal, errores [{'line', 'error'}])."""
+    bases = _bases()
+    staged, errors = [], []
+    for line, record in read_records(stream, fmt):
+        try:
+            if isinstance(record, Exception):
+                raise ValidationError(f'JSON inválido: {record}')
+            framework = (record.get('framework') or '').strip().lower()
+            if framework not in FRAMEWORKS:
+                raise ValidationError('framework debe ser pmbok o scrum.')
+            try:
+                process_number = int(record.get('process_number'))
+            except (TypeError, ValueError):
+                raise ValidationError('process_number debe ser un entero.')
+            if process_number not in bases[framework]:
+                raise ValidationError(f'No existe el proceso {framework} {process_number}.')
+            country_code = str(record.get('country_code') or record.get('country') or '').strip().lower()
+            if not is_country_code(country_code):
+                raise ValidationError('country_code debe ser un código de país de 2 letras.')
+            department = record.get('department_id', record.get('department'))
+            if department in (None, ''):
+                department = None
+            else:
+                try:
+                    department = int(department)
+                except (TypeError, ValueError):
+                    raise ValidationError('department_id debe ser un entero.')
+
+            process_id, base = bases[framework][process_number]
+            ittos = {}
+            for field in ITTO_FIELDS:
+                value = _itto_value(record.get(field), field)
+                ittos[field] = None if value is None else compact_itto_list(base[field], value)
+            staged.append((
+                line, framework, process_id, country_code, department,
+                *(None if ittos[field] is None else json.dumps(ittos[field], ensure_ascii=False)
+                  for field in ITTO_FIELDS),
+                (record.get('kanban_status') or '').strip() or None,
+            ))
+        except ValidationError as exc:
+            errors.append({'line': line, 'error': '; '.join(exc.messages)})
+    return staged, errors
+
+
+# ----------------------------------------------------------------------------
+# Tabla temporal, validación en SQL y fusión
+# ----------------------------------------------------------------------------
+def _create_staging(cursor):
+    json_type = 'jsonb' if connection.vendor == 'postgresql' else 'text'
+    suffix = ' ON COMMIT DROP' if connection.vendor == 'postgresql' else ''
+    cursor.execute(f'DROP TABLE IF EXISTS {STAGING_TABLE}')
+    cursor.execute(
+        f'CREATE TEMPORARY TABLE {STAGING_TABLE} (line integer PRIMARY KEY, framework varchar(10), '
+        f'process_id integer, country_code varchar(2), department_id integer, '
+        f'inputs {json_type}, tools_and_techniques {json_type}, outputs {json_type}, '
+        f'kanban_status varchar(20)){suffix}')
+
+
+def _load_staging(cursor, staged):
+    if connection.vendor == 'postgresql':
+        # COPY ... FROM STDIN (psycopg2): una sola ida y vuelta para todo el fichero.
+        # En CSV de COPY el campo vacío sin comillas es NULL.
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(staged)
+        buffer.seek(0)
+        cursor.copy_expert(
+            f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    else:
+        placeholders = ', '.join(['%s'] * len(STAGING_COLUMNS))
+        for start in range(0, len(staged), INSERT_BATCH):
+            cursor.executemany(
+                f"INSERT INTO {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) VALUES ({placeholders})",
+                staged[start:start + INSERT_BATCH])
+    cursor.execute(f'CREATE INDEX {STAGING_TABLE}_key ON {STAGING_TABLE} (framework, process_id, country_code)')
+
+
+def _sql_errors(cursor):
+    """Errores que dependen de la base de datos; las filas afectadas se eliminan."""
+    statuses = [value for value, _ in KANBAN_STATUS_CHOICES]
+    status_placeholders = ', '.join(['%s'] * len(statuses))
+    department_table = connection.ops.quote_name(Department._meta.db_table)
+    checks = (
+        (f'department_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM {department_table} d '
+         f'WHERE d.id = s.department_id)', [], 'No existe el departamento.'),
+        (f'kanban_status IS NOT NULL AND kanban_status NOT IN ({status_placeholders})', statuses,
+         'Estado Kanban inválido.'),
+        (f'EXISTS (SELECT 1 FROM {STAGING_TABLE} o WHERE o.framework = s.framework '
+         f'AND o.process_id = s.process_id AND o.country_code = s.country_code '
+         f'AND (o.department_id = s.department_id OR (o.department_id IS NULL AND s.department_id IS NULL)) '
+         f'AND o.line < s.line)', [], 'Registro repetido en el fichero (se importa la primera aparición).'),
+    )
+    errors = []
+    for condition, params, message in checks:
+        cursor.execute(f'SELECT s.line FROM {STAGING_TABLE} s WHERE {condition} ORDER BY s.line', params)
+        lines = [row[0] for row in cursor.fetchall()]
+        errors.extend({'line': line, 'error': message} for line in lines)
+        if lines:
+            cursor.execute(f'DELETE FROM {STAGING_TABLE} WHERE line IN (SELECT s.line FROM {STAGING_TABLE} s '
+                           f'WHERE {condition})', params)
+    return errors
+
+
+def _merge(cursor, framework, now):
+    """Devuelve (actualizadas, insertadas) de un framework."""
+    table = connection.ops.quote_name(FRAMEWORKS[framework][1]._meta.db_table)
+    match = (f's.process_id = {table}.process_id AND UPPER(s.country_code) = UPPER({table}.country_code) '
+             f'AND (s.department_id = {table}.department_id '
+             f'OR (s.department_id IS NULL AND {table}.department_id IS NULL))')
+    assignments = ', '.join(f'{field} = s.{field}' for field in ITTO_FIELDS)
+    cursor.execute(
+        f'UPDATE {table} SET {assignments}, kanban_status = COALESCE(s.kanban_status, {table}.kanban_status), '
+        f'updated_at = %s FROM {STAGING_TABLE} s WHERE s.framework = %s AND {match}', [now, framework])
+    updated = cursor.rowcount
+
+    existing = match.replace(f'{table}.', 't.')
+    cursor.execute(
+        f'INSERT INTO {table} (process_id, country_code, department_id, {", ".join(ITTO_FIELDS)}, '
+        f'kanban_status, created_at, updated_at) '
+        f"SELECT s.process_id, s.country_code, s.department_id, {', '.join(f's.{f}' for f in ITTO_FIELDS)}, "
+        f"COALESCE(s.kanban_status, 'unassigned'), %s, %s FROM {STAGING_TABLE} s "
+        f'WHERE s.framework = %s AND NOT EXISTS (SELECT 1 FROM {table} t WHERE {existing}) '
+        f'ON CONFLICT (process_id, country_code, department_id) DO UPDATE SET '
+        f'{", ".join(f"{field} = excluded.{field}" for field in ITTO_FIELDS)}, '
+        f'kanban_status = COALESCE(excluded.kanban_status, {table}.kanban_status), updated_at = excluded.updated_at',
+        [now, now, framework])
+    return updated, cursor.rowcount
+
+
+def import_customizations(stream, fmt, dry_run=False, strict=False):
+    """
+    Importa un fichero de texto ya abierto. Devuelve {'rows', 'inserted', 'updated',
+    'errors', 'dry_run'}; con `strict` cualquier error lanza ImportFailed sin escribir.
+    """
+    staged, errors = parse(stream, fmt)
+    report = {'rows': len(staged) + len(errors), 'inserted': 0, 'updated': 0,
+              'errors': errors, 'dry_run': dry_run}
+    if not staged:
+        if strict and errors:
+            raise ImportFailed(report)
+        return report
+
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    per_framework = {}
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                _create_staging(cursor)
+                _load_staging(cursor, staged)
+                errors.extend(_sql_errors(cursor))
+                errors.sort(key=lambda error: error['line'])
+                if strict and errors:
+                    raise ImportFailed(report)
+                for framework in FRAMEWORKS:
+                    per_framework[framework] = _merge(cursor, framework, now)
+                if connection.vendor != 'postgresql':
+                    cursor.execute(f'DROP TABLE {STAGING_TABLE}')
+            report['updated'] = sum(updated for updated, _ in per_framework.values())
+            report['inserted'] = sum(inserted for _, inserted in per_framework.values())
+            if dry_run:
+                transaction.set_rollback(True)
+            else:
+                # SQL directo: no hay señales
+                bump_catalog_version()
+                progress.schedule_rebuild()
+    finally:
+        if connection.vendor != 'postgresql':
+            # En SQLite la tabla temporal sobrevive al rollback (p. ej. modo estricto)
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TABLE IF EXISTS {STAGING_TABLE}')
+
+    if not dry_run:
+        for framework, (updated, inserted) in per_framework.items():
+            BULK_ROWS.labels(framework, 'import').observe(updated + inserted)
+    return report
@@ -0,0 +1,123 @@
+# backend/api/catalog.py
+"""
+Utilidades compartidas sobre el catálogo de procesos: versión global para invalidar
+cachés, memoización por versión y el árbol de departamentos.
+"""
+import re
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from . import singleflight
+from .models import (
+    CatalogVersion, Department,
+    PMBOKProcess, ScrumProcess, PMBOKProcessCustomization, ScrumProcessCustomization,
+)
+
+CATALOG_VERSION_PK = 1
+# Código de país que acepta la API: dos letras (ISO 3166-1 alfa-2), sin distinguir mayúsculas
+COUNTRY_CODE = re.compile(r'^[A-Za-z]{2}$')
+
+# framework -> (modelo de proceso, modelo de personalización)
+FRAMEWORKS = {
+    'pmbok': (PMBOKProcess, PMBOKProcessCustomization),
+    'scrum': (ScrumProcess, ScrumProcessCustomization),
+}
+
+
+def is_country_code(value):
+    return isinstance(value, str) and COUNTRY_CODE.match(value) is not None
+
+
+def get_catalog_version():
+    version = CatalogVersion.objects.filter(pk=CATALOG_VERSION_PK).values_list(
+        'version', flat=True).first()
+    return version or 0
+
+
+def _bump_now():
+    updated = CatalogVersion.objects.filter(pk=CATALOG_VERSION_PK).update(
+        version=F('version') + 1)
+    if not updated:
+        CatalogVersion.objects.get_or_create(pk=CATALOG_VERSION_PK, defaults={'version': 1})
+
+
+def on_commit_once(func):
+    """
+    Ejecuta `func` al hacer commit, una sola vez aunque se pida muchas veces en la misma
+    transacción; fuera de una transacción, en el acto.
+
+    Las funciones pendientes se marcan en la conexión (una por hilo). Cada llamada
+    registra su callback, y solo el primero que se ejecute tras el commit limpia la marca
+    y llama a `func`. Registrar siempre cubre el rollback de un savepoint, que descarta
+    los callbacks registrados dentro de él. Tras un rollback completo la marca queda
+    puesta sin callback: el siguiente commit que la pida ejecuta `func` una vez, igual.
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        func()
+        return
+    pending = getattr(connection, 'pmbok_on_commit_pending', None)
+    if pending is None:
+        pending = connection.pmbok_on_commit_pending = set()
+    pending.add(func)
+
+    def run():
+        if func in pending:
+            pending.discard(func)
+            func()
+
+    transaction.on_commit(run)
+
+
+def bump_catalog_version():
+    """
+    Invalida todas las cachés del catálogo. Se llama desde las señales de guardado y,
+    explícitamente, desde los `.update()` masivos (que no disparan señales).
+
+    Dentro de una transacción se difiere al commit y se hace una sola vez, así un
+    borrado en cascada o un seed no emiten un UPDATE por fila.
+    """
+    on_commit_once(_bump_now)
+
+
+def memoize(key_parts, compute, version=None, stale=False):
+    """
+    Devuelve el valor cacheado para `key_parts` en la versión actual del catálogo,
+    calculándolo con `compute()` si no existe. Un solo cálculo entre peticiones
+    concurrentes (ver api/singleflight.py); las demás esperan el resultado o, con
+    `stale=True`, reciben mientras tanto el valor de la versión anterior. Solo para
+    lecturas de presentación: lo que valida datos o resuelve ITTOs no lo usa.
+    """
+    if version is None:
+        version = get_catalog_version()
+    parts = ':'.join(str(part) for part in key_parts)
+    return singleflight.get_or_compute(
+        f'catalog:{version}:{parts}', compute, settings.CATALOG_CACHE_TIMEOUT,
+        namespace=key_parts[0], stale_key=f'catalog:latest:{parts}' if stale else None)
+
+
+def department_parents(version=None):
+    """Mapa {id: parent_id} de todos los departamentos (tabla pequeña), cacheado."""
+    return memoize(
+        ('department-parents',),
+        lambda: dict(Department.objects.values_list('id', 'parent_id')),
+        version=version,
+    )
+
+
+def department_chain(department_id, version=None):
+    """
+    Ruta desde el departamento raíz hasta `department_id` (inclusive), siguiendo
+    `Department.parent`. Lanza KeyError si el departamento no existe.
+    """
+    parents = department_parents(version)
+    chain = []
+    current = department_id
+    while current is not None and current not in chain:
+        parent = parents[current]
+        chain.append(current)
+        current = parent
+    chain.reverse()
+    return chain
@@ -0,0 +1,142 @@
+# backend/api/cloning.py
+"""
+Clonado masivo de personalizaciones hacia un país/departamento destino
+(POST /api/customizations/clone/).
+
+Cada framework se resuelve con una sentencia INSERT ... SELECT (y, con
+`on_conflict='overwrite'`, un UPDATE con subconsulta correlacionada) en lugar de una
+petición por proceso. El origen es otro país/departamento (la personalización más
+reciente de cada proceso, con sus ITTOs tal como están guardados: los diffs son relativos
+a la base, común a todos los países) o, sin país de origen, los ITTOs base del proceso,
+que se guardan como herencia (NULL) y no como copia.
+
+El SQL se escribe a mano porque el ORM no genera INSERT ... SELECT; solo usa sintaxis
+común a PostgreSQL y SQLite (subconsultas en FROM, NOT EXISTS, subconsultas
+correlacionadas). Sin CTE: el módulo sqlite3 no informa de rowcount tras un WITH. Las
+sentencias no disparan señales: la versión del catálogo y el resumen de progreso se
+actualizan explícitamente.
+"""
+from collections import Counter
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import progress
+from .catalog import FRAMEWORKS, bump_catalog_version
+from .itto import ITTO_FIELDS
+from .metrics import BULK_ROWS
+from .partitioning import case_variants, country_filter, partitioned_tables
+
+
+def _scope(alias, table, country_code, department_id):
+    """Condición (sql, params) para un país (sin distinguir mayúsculas) y departamento/nivel país."""
+    # UPPER(...) coincide con los índices funcionales de customization_indexes(); el IN
+    # sobre las variantes poda particiones si la tabla está particionada (api/partitioning.py)
+    sql, params = f'UPPER({alias}.country_code) = UPPER(%s) ', [country_code]
+    if table in partitioned_tables():
+        variants = case_variants(country_code)
+        sql += f"AND {alias}.country_code IN ({', '.join(['%s'] * len(variants))}) "
+        params += variants
+    sql += f'AND {alias}.department_id '
+    if department_id is None:
+        return sql + 'IS NULL', params
+    return sql + '= %s', [*params, department_id]
+
+
+def _source_subquery(framework, source_country, source_department):
+    """Subconsulta `src(process_id, inputs, tools_and_techniques, outputs)`: una fila por proceso."""
+    process_model, customization_model = FRAMEWORKS[framework]
+    qn = connection.ops.quote_name
+    if source_country is None:
+        # Copia de la base = heredar: NULL en los tres campos (ver api/itto.py)
+        inherit = ', '.join(
+            f'CAST(NULL AS {customization_model._meta.get_field(field).db_type(connection)}) AS {field}'
+            for field in ITTO_FIELDS)
+        return f'SELECT p.id AS process_id, {inherit} FROM {qn(process_model._meta.db_table)} p', []
+
+    db_table = customization_model._meta.db_table
+    table = qn(db_table)
+    source, source_params = _scope('s', db_table, source_country, source_department)
+    newer, newer_params = _scope('n', db_table, source_country, source_department)
+    # La más reciente por proceso (a nivel país no hay unicidad: puede haber varias)
+    sql = (f'SELECT s.process_id, s.inputs, s.tools_and_techniques, s.outputs FROM {table} s '
+           f'WHERE {source} AND NOT EXISTS (SELECT 1 FROM {table} n WHERE n.process_id = s.process_id '
+           f'AND {newer} AND (n.updated_at > s.updated_at OR (n.updated_at = s.updated_at AND n.id > s.id)))')
+    return sql, source_params + newer_params
+
+
+def _source_process_ids(framework, source_country, source_department):
+    process_model, customization_model = FRAMEWORKS[framework]
+    if source_country is None:
+        return set(process_model.objects.values_list('id', flat=True))
+    rows = customization_model.objects.filter(country_filter(source_country, customization_model))
+    if source_department is None:
+        rows = rows.filter(department__isnull=True)
+    else:
+        rows = rows.filter(department_id=source_department)
+    return set(rows.order_by().values_list('process_id', flat=True))
+
+
+def _target_rows(framework, target_country, target_department):
+    customization_model = FRAMEWORKS[framework][1]
+    rows = customization_model.objects.filter(country_filter(target_country, customization_model))
+    if target_department is None:
+        return rows.filter(department__isnull=True)
+    return rows.filter(department_id=target_department)
+
+
+def clone_customizations(framework, target_country, target_department=None, source_country=None,
+                         source_department=None, on_conflict='skip', dry_run=False):
+    """
+    Devuelve {'source', 'inserted', 'updated', 'skipped'}. Las filas nuevas llevan el
+    país destino en minúsculas (como las crea el frontend) y estado Kanban 'unassigned';
+    'overwrite' solo reemplaza los ITTOs de las existentes, no su estado.
+    """
+    target_country = target_country.lower()
+    targets = _target_rows(framework, target_country, target_department)
+    source_ids = _source_process_ids(framework, source_country, source_department)
+    existing = source_ids & set(targets.order_by().values_list('process_id', flat=True))
+    counts = {'source': len(source_ids), 'inserted': len(source_ids - existing),
+              'updated': len(existing) if on_conflict == 'overwrite' else 0,
+              'skipped': 0 if on_conflict == 'overwrite' else len(existing)}
+    if dry_run or not source_ids:
+        return counts
+
+    db_table = FRAMEWORKS[framework][1]._meta.db_table
+    table = connection.ops.quote_name(db_table)
+    source_sql, source_params = _source_subquery(framework, source_country, source_department)
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+
+    with transaction.atomic():
+        before = progress.grouped_counts(framework, targets)
+        with connection.cursor() as cursor:
+            if on_conflict == 'overwrite':
+                target, target_params = _scope(table, db_table, target_country, target_department)
+                assignments = ', '.join(
+                    f'{field} = (SELECT src.{field} FROM ({source_sql}) src WHERE src.process_id = {table}.process_id)'
+                    for field in ITTO_FIELDS)
+                cursor.execute(
+                    f'UPDATE {table} SET {assignments}, updated_at = %s WHERE {target} '
+                    f'AND process_id IN (SELECT src.process_id FROM ({source_sql}) src)',
+                    source_params * 3 + [now] + target_params + source_params)
+                counts['updated'] = cursor.rowcount
+
+            target, target_params = _scope('t', db_table, target_country, target_department)
+            cursor.execute(
+                f'INSERT INTO {table} (process_id, country_code, department_id, inputs, '
+                f'tools_and_techniques, outputs, kanban_status, created_at, updated_at) '
+                f"SELECT src.process_id, %s, %s, src.inputs, src.tools_and_techniques, src.outputs, "
+                f"'unassigned', %s, %s FROM ({source_sql}) src "
+                f'WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.process_id = src.process_id AND {target})',
+                [target_country, target_department, now, now] + source_params + target_params)
+            counts['inserted'] = cursor.rowcount
+            counts['skipped'] = counts['source'] - counts['inserted'] - counts['updated']
+
+        # Deltas del resumen de progreso: solo cambian los grupos del destino
+        deltas = Counter(progress.grouped_counts(framework, targets))
+        deltas.subtract(before)
+        progress.apply_deltas(framework, deltas)
+        bump_catalog_version()  # SQL directo: no hay señales
+
+    BULK_ROWS.labels(framework, 'clone').observe(counts['inserted'] + counts['updated'])
+    return counts
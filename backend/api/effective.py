@@ -0,0 +1,93 @@
+# backend/api/effective.py
+"""
+Resolución en servidor de los ITTOs efectivos de un proceso.
+
+Orden de herencia (de menor a mayor prioridad):
+    proceso base -> país -> departamento raíz -> ... -> subdepartamento solicitado
+
+Cada campo ITTO de una personalización se guarda respecto a la lista del proceso base
+(heredado, diff o lista completa; ver api/itto.py). El nivel más específico que exista
+reemplaza las listas materializadas y el estado Kanban de los niveles anteriores.
+"""
+from django.db.models import Q
+
+from .catalog import FRAMEWORKS, department_chain, get_catalog_version, memoize
+from .itto import ITTO_FIELDS, materialize_itto_list
+from .partitioning import country_filter
+
+
+def _resolve(framework, country_code, department_id, process_ids, version):
+    process_model, customization_model = FRAMEWORKS[framework]
+    chain = department_chain(department_id, version) if department_id else []
+
+    processes = process_model.objects.only(
+        'id', 'process_number', 'kanban_status', *ITTO_FIELDS)
+    if process_ids is not None:
+        processes = processes.filter(id__in=process_ids)
+
+    department_filter = Q(department__isnull=True)
+    if chain:
+        department_filter |= Q(department_id__in=chain)
+    customizations = customization_model.objects.filter(
+        department_filter, country_filter(country_code, customization_model),
+    ).only('id', 'process_id', 'department_id', 'kanban_status', 'updated_at', *ITTO_FIELDS).order_by()
+    if process_ids is not None:
+        customizations = customizations.filter(process_id__in=process_ids)
+
+    # Nivel 0 = país; nivel i+1 = i-ésimo departamento de la cadena
+    levels = {None: 0}
+    levels.update({dept_id: index + 1 for index, dept_id in enumerate(chain)})
+    by_process = {}
+    for customization in customizations:
+        by_process.setdefault(customization.process_id, []).append(customization)
+
+    result = {}
+    for process in processes:
+        effective = {
+            'process_id': process.id,
+            'process_number': process.process_number,
+            'country_code': country_code,
+            'department_id': department_id,
+            'kanban_status': process.kanban_status,
+            'sources': [{'level': 'base'}],
+        }
+        for field in ITTO_FIELDS:
+            effective[field] = getattr(process, field)
+
+        # Dentro de un nivel puede haber varias filas ('co' y 'CO' tras la búsqueda sin
+        # distinguir mayúsculas): orden fijo, gana la editada más recientemente
+        applicable = sorted(by_process.get(process.id, []),
+                            key=lambda c: (levels[c.department_id], c.updated_at, c.id))
+        for customization in applicable:
+            for field in ITTO_FIELDS:
+                effective[field] = materialize_itto_list(getattr(process, field), getattr(customization, field))
+            effective['kanban_status'] = customization.kanban_status
+            source = {'level': 'country' if customization.department_id is None else 'department',
+                      'customization_id': customization.id}
+            if customization.department_id is not None:
+                source['department_id'] = customization.department_id
+            effective['sources'].append(source)
+
+        result[process.id] = effective
+    return result
+
+
+def effective_ittos(framework, process_id, country_code, department_id=None):
+    """ITTOs efectivos de un proceso, o None si no existe. Memoizado por versión del catálogo."""
+    version = get_catalog_version()
+    return memoize(
+        ('effective', framework, process_id, country_code.lower(), department_id or '-'),
+        lambda: _resolve(framework, country_code, department_id, [process_id], version).get(process_id),
+        version=version,
+    )
+
+
+def bulk_effective_ittos(framework, country_code, department_id=None):
+    """ITTOs efectivos de todos los procesos del framework, ordenados por número de proceso."""
+    version = get_catalog_version()
+    return memoize(
+        ('effective-bulk', framework, country_code.lower(), department_id or '-'),
+        lambda: sorted(_resolve(framework, country_code, department_id, None, version).values(),
+                       key=lambda item: item['process_number']),
+        version=version,
+    )
@@ -0,0 +1,286 @@
+# backend/api/export.py
+"""
+Exportación del catálogo (procesos base y personalizaciones) a CSV, XLSX o NDJSON.
+
+Una fila por ítem ITTO (formato largo): proceso, nivel (base/país/departamento), campo,
+posición y nombre/URL del ítem. Los registros se leen con `.iterator()` (cursor de
+servidor en PostgreSQL) y cada formato se codifica por trozos, así la memoria no
+depende del tamaño del catálogo:
+
+  * GET /api/export/ responde en streaming (StreamingHttpResponse).
+  * POST /api/export/ encola un trabajo 'export' (api/jobs.py) que escribe el fichero en
+    EXPORT_ROOT; se descarga en /api/export/<job_id>/ cuando termina y `run_jobs` lo
+    borra pasadas EXPORT_TTL_HOURS horas (`purge_expired`).
+
+El XLSX se escribe con zipfile de la biblioteca estándar (hoja única con cadenas en
+línea): un ZIP admite escritura secuencial sin volver atrás, y no hace falta openpyxl.
+"""
+import csv
+import json
+import re
+import time
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+
+from .catalog import FRAMEWORKS, is_country_code
+from .itto import ITTO_FIELDS, materialize_itto_list
+from .metrics import EXPORT_ROWS
+from .partitioning import country_filter
+from .progress import AREA_FIELD
+
+COLUMNS = (
+    'framework', 'process_id', 'process_number', 'process_name', 'area', 'level',
+    'customization_id', 'country_code', 'department_id', 'department', 'kanban_status',
+    'updated_at', 'itto_field', 'position', 'item_name', 'item_url', 'item_versions',
+)
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+FORMATS = tuple(CONTENT_TYPES)
+
+# Filas por trozo enviado al cliente (o escrito al fichero)
+CHUNK_ROWS = 500
+
+
+# ----------------------------------------------------------------------------
+# Registros y filas
+# ----------------------------------------------------------------------------
+def records(framework='all', country_code=None, department_id=None):
+    """
+    Genera (framework, proceso, personalización o None). Sin país se exportan los
+    procesos base y todas las personalizaciones; con país, solo las de ese país
+    (`department_id=0`: solo el nivel país).
+    """
+    for name in FRAMEWORKS if framework == 'all' else [framework]:
+        area = AREA_FIELD[name]
+        if not country_code:
+            processes = FRAMEWORKS[name][0].objects.select_related(area).order_by('process_number', 'id')
+            for process in processes.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+                yield name, process, None
+
+        customizations = _customizations(name, country_code, department_id).select_related(
+            'process', f'process__{area}', 'department',
+        ).order_by('process__process_number', 'country_code', 'department_id', 'id')
+        for customization in customizations.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+            yield name, customization.process, customization
+
+
+def _customizations(framework, country_code, department_id):
+    customization_model = FRAMEWORKS[framework][1]
+    customizations = customization_model.objects.all()
+    if country_code:
+        customizations = customizations.filter(country_filter(country_code, customization_model))
+    if department_id == 0:
+        customizations = customizations.filter(department__isnull=True)
+    elif department_id is not None:
+        customizations = customizations.filter(department_id=department_id)
+    return customizations
+
+
+def records_count(framework, country_code=None, department_id=None):
+    """Registros que `records()` generará para un framework (progreso de los trabajos)."""
+    count = _customizations(framework, country_code, department_id).count()
+    if not country_code:
+        count += FRAMEWORKS[framework][0].objects.count()
+    return count
+
+
+def rows(framework='all', country_code=None, department_id=None, on_record=None):
+    """Filas planas (dicts con COLUMNS). `on_record()` se llama por cada registro leído."""
+    for name, process, customization in records(framework, country_code, department_id):
+        area = getattr(process, AREA_FIELD[name])
+        common = {
+            'framework': name,
+            'process_id': process.id,
+            'process_number': process.process_number,
+            'process_name': process.name,
+            'area': area.name if area else '',
+            'level': 'base',
+            'customization_id': '',
+            'country_code': '',
+            'department_id': '',
+            'department': '',
+            'kanban_status': process.kanban_status,
+            'updated_at': '',
+        }
+        source = process
+        if customization is not None:
+            source = customization
+            common.update(
+                level='country' if customization.department_id is None else 'department',
+                customization_id=customization.id,
+                country_code=customization.country_code.lower(),
+                department_id=customization.department_id or '',
+                department=customization.department.name if customization.department else '',
+                kanban_status=customization.kanban_status,
+                updated_at=customization.updated_at.isoformat(),
+            )
+
+        emitted = False
+        for field in ITTO_FIELDS:
+            items = getattr(source, field)
+            if customization is not None:
+                items = materialize_itto_list(getattr(process, field), items)
+            for position, item in enumerate(items or [], start=1):
+                emitted = True
+                yield {**common, 'itto_field': field, 'position': position,
+                       'item_name': item.get('name', ''), 'item_url': item.get('url', ''),
+                       'item_versions': '; '.join(v.get('name', '') for v in item.get('versions', []))}
+        if not emitted:
+            # Sin ITTOs: una fila para que el proceso/personalización no desaparezca
+            yield {**common, 'itto_field': '', 'position': '', 'item_name': '', 'item_url': '',
+                   'item_versions': ''}
+        if on_record is not None:
+            on_record()
+
+
+# ----------------------------------------------------------------------------
+# Codificadores: generan trozos de bytes
+# ----------------------------------------------------------------------------
+class _Echo:
+    """Pseudo-fichero para csv.writer: devuelve la línea en lugar de escribirla."""
+
+    def write(self, value):
+        return value
+
+
+def _batched(row_iter, encode):
+    buffer, count = [], 0
+    for row in row_iter:
+        buffer.append(encode(row))
+        count += 1
+        if count % CHUNK_ROWS == 0:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def encode_csv(row_iter):
+    writer = csv.writer(_Echo())
+    # BOM: Excel abre el CSV como UTF-8
+    yield ('\ufeff' + writer.writerow(COLUMNS)).encode('utf-8')
+    yield from _batched(row_iter, lambda row: writer.writerow([row[column] for column in COLUMNS]))
+
+
+def encode_ndjson(row_iter):
+    yield from _batched(row_iter, lambda row: json.dumps(row, ensure_ascii=False) + '\n')
+
+
+class _ChunkSink:
+    """Destino no posicionable para zipfile: acumula lo escrito hasta que se recoge."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data, self.chunks = b''.join(self.chunks), []
+        return data
+
+
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_NS = 'http://schemas.openxmlformats.org'
+_XLSX_PARTS = {
+    '[Content_Types].xml': (
+        f'<Types xmlns="{_NS}/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType='
+        '"application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType='
+        '"application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/></Types>'),
+    '_rels/.rels': (
+        f'<Relationships xmlns="{_NS}/package/2006/relationships"><Relationship Id="rId1" '
+        f'Type="{_NS}/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'),
+    'xl/workbook.xml': (
+        f'<workbook xmlns="{_NS}/spreadsheetml/2006/main" xmlns:r="{_NS}/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Export" sheetId="1" r:id="rId1"/></sheets></workbook>'),
+    'xl/_rels/workbook.xml.rels': (
+        f'<Relationships xmlns="{_NS}/package/2006/relationships"><Relationship Id="rId1" '
+        f'Type="{_NS}/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'),
+}
+
+
+def _xlsx_cell(value):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    text = escape(_INVALID_XML.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_xlsx_cell(value) for value in values) + '</row>'
+
+
+def encode_xlsx(row_iter):
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, xml in _XLSX_PARTS.items():
+            archive.writestr(name, '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>' + xml)
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                        f'<worksheet xmlns="{_NS}/spreadsheetml/2006/main"><sheetData>'.encode('utf-8'))
+            sheet.write(_xlsx_row(COLUMNS).encode('utf-8'))
+            for chunk in _batched(row_iter, lambda row: _xlsx_row(row[column] for column in COLUMNS)):
+                sheet.write(chunk)
+                yield sink.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield sink.drain()
+
+
+ENCODERS = {'csv': encode_csv, 'ndjson': encode_ndjson, 'xlsx': encode_xlsx}
+
+
+def _counted(row_iter, fmt):
+    count = 0
+    try:
+        for row in row_iter:
+            count += 1
+            yield row
+    finally:
+        EXPORT_ROWS.labels(fmt).inc(count)
+
+
+def stream(fmt, framework='all', country_code=None, department_id=None, on_record=None):
+    """Trozos de bytes del fichero exportado en `fmt`."""
+    return ENCODERS[fmt](_counted(rows(framework, country_code, department_id, on_record), fmt))
+
+
+def job_path(job_id, fmt):
+    return settings.EXPORT_ROOT / f'{job_id}.{fmt}'
+
+
+def filename(fmt, framework='all', country_code=None):
+    # Va en Content-Disposition: solo códigos de país válidos (validate_export ya los exige)
+    suffix = f'-{country_code.lower()}' if is_country_code(country_code) else ''
+    return f'pmbok-export-{framework}{suffix}.{fmt}'
+
+
+def purge_expired():
+    """Borra los ficheros de EXPORT_ROOT (y .part de trabajos caídos) con más de EXPORT_TTL_HOURS."""
+    root = settings.EXPORT_ROOT
+    if not root.is_dir():
+        return 0
+    cutoff = time.time() - settings.EXPORT_TTL_HOURS * 3600
+    removed = 0
+    for path in root.iterdir():
+        try:
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:  # otro worker lo borró antes
+            continue
+    return removed
@@ -0,0 +1,145 @@
+# backend/api/git_history.py
+"""
+Historial de git para el GitFlowVisualizer con el layout ya calculado en el servidor.
+
+Cada estado del repositorio (hash de todas las referencias) produce una instantánea:
+hasta GIT_HISTORY_MAX_COMMITS commits en orden topológico, cada uno con su fila y su
+carril (columna), y las aristas hijo -> padre con el carril de ambos extremos. Se
+calcula una vez y se cachea por estado; las peticiones solo recortan una ventana
+(`offset`/`limit`), así el frontend pagina historiales largos sin recalcular nada.
+"""
+import hashlib
+import subprocess
+from bisect import bisect_left
+from operator import itemgetter
+
+from django.conf import settings
+
+from . import singleflight
+
+DELIMITER = '||||'
+
+
+def _git(repo_dir, *args):
+    result = subprocess.run(['git', *args], cwd=repo_dir, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    return result.stdout
+
+
+def repository_state(repo_dir):
+    """Hash de HEAD y de todas las referencias: cambia con cada commit, fetch o rama nueva."""
+    refs = _git(repo_dir, 'rev-parse', 'HEAD', '--all')
+    return hashlib.sha1(refs.encode()).hexdigest()[:16]
+
+
+def read_commits(repo_dir, limit):
+    output = _git(repo_dir, 'log', '--all', '--topo-order', '-n', str(limit),
+                  f'--pretty=format:%h{DELIMITER}%p{DELIMITER}%an{DELIMITER}%s')
+    commits = []
+    for line in output.strip().split('\n'):
+        parts = line.split(DELIMITER)
+        if len(parts) >= 4:
+            commits.append({
+                'id': parts[0],
+                'parents': parts[1].split() if parts[1] else [],
+                'author': parts[2],
+                'message': DELIMITER.join(parts[3:]),
+            })
+    return commits
+
+
+def layout(commits):
+    """
+    Asigna fila y carril a cada commit (ya en orden topológico, hijos antes que padres).
+
+    Cada carril "espera" a un commit: el primer padre continúa el carril del hijo y los
+    demás padres (merges) abren carril nuevo si nadie los espera. Si varios carriles
+    esperan al mismo commit (punto de ramificación) convergen en el de menor índice, así
+    la rama principal se mantiene a la izquierda.
+    Devuelve (commits, aristas, número de carriles).
+    """
+    children = {}
+    for commit in commits:
+        for parent in commit['parents']:
+            children[parent] = children.get(parent, 0) + 1
+    lanes = []
+    columns = {}
+    width = 0
+    for row, commit in enumerate(commits):
+        waiting = [index for index, expected in enumerate(lanes) if expected == commit['id']]
+        if waiting:
+            column = waiting[0]
+        elif None in lanes:
+            column = lanes.index(None)
+        else:
+            column = len(lanes)
+            lanes.append(None)
+        for index in waiting:
+            lanes[index] = None
+        columns[commit['id']] = column
+        commit.update(row=row, column=column, is_merge=len(commit['parents']) > 1,
+                      is_branch_point=children.get(commit['id'], 0) > 1)
+
+        for position, parent in enumerate(commit['parents']):
+            if parent in lanes:
+                # Ya lo espera otro carril: el primer padre se queda con el más a la izquierda
+                other = lanes.index(parent)
+                if position == 0 and column < other:
+                    lanes[other], lanes[column] = None, parent
+                continue
+            if position == 0 and lanes[column] is None:
+                lanes[column] = parent
+            elif None in lanes:
+                lanes[lanes.index(None)] = parent
+            else:
+                lanes.append(parent)
+        while lanes and lanes[-1] is None:
+            lanes.pop()
+        width = max(width, column + 1, len(lanes))
+
+    rows = {commit['id']: commit['row'] for commit in commits}
+    edges = [
+        {'source': commit['id'], 'target': parent,
+         'source_column': commit['column'], 'target_column': columns.get(parent),
+         'source_row': commit['row'], 'target_row': rows.get(parent),
+         'type': 'merge' if position else 'parent'}
+        for commit in commits
+        for position, parent in enumerate(commit['parents'])
+    ]
+    return commits, edges, width
+
+
+def snapshot(repo_dir):
+    """Instantánea con layout del estado actual del repositorio (cacheada por estado)."""
+    state = repository_state(repo_dir)
+
+    def compute():
+        commits, edges, width = layout(read_commits(repo_dir, settings.GIT_HISTORY_MAX_COMMITS))
+        return {'state': state, 'commits': commits, 'edges': edges, 'columns': width}
+
+    # Tras un commit nuevo se sirve la instantánea anterior mientras una sola petición relee el log
+    return singleflight.get_or_compute(
+        f'git-history:{state}:{settings.GIT_HISTORY_MAX_COMMITS}', compute, settings.GIT_HISTORY_CACHE_TIMEOUT,
+        namespace='git-history', stale_key=f'git-history:latest:{settings.GIT_HISTORY_MAX_COMMITS}')
+
+
+def window(data, offset=0, limit=100):
+    """Filas [offset, offset + limit) con las aristas que salen de ellas."""
+    commits = data['commits'][offset:offset + limit]
+    end = offset + len(commits)
+    # Las aristas están ordenadas por fila de origen: se recortan sin recorrerlas todas
+    source_row = itemgetter('source_row')
+    edges = data['edges'][bisect_left(data['edges'], offset, key=source_row):
+                          bisect_left(data['edges'], end, key=source_row)]
+    return {
+        'state': data['state'],
+        'total': len(data['commits']),
+        'columns': data['columns'],
+        'offset': offset,
+        'limit': limit,
+        'next_offset': end if end < len(data['commits']) else None,
+        'commits': commits,
+        'edges': edges,
+    }
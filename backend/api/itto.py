@@ -0,0 +1,158 @@
+# backend/api/itto.py
+"""
+Esquema y forma canónica de las listas ITTO (Entradas, Herramientas y Técnicas, Salidas).
+
+Cada item es un objeto con 'name' (obligatorio), 'url' y, opcionalmente, 'isActive'
+y 'versions' (lista anidada de items con la misma forma). Cualquier otra clave
+(por ejemplo el 'id' que genera `ensureIds` en el frontend) se descarta.
+"""
+from django.core.exceptions import ValidationError
+
+ITTO_FIELDS = ('inputs', 'tools_and_techniques', 'outputs')
+
+MAX_ITEMS = 200
+MAX_NAME_LENGTH = 500
+MAX_URL_LENGTH = 2000
+MAX_DEPTH = 3
+
+
+def _canonical_item(item, depth, path):
+    if not isinstance(item, dict):
+        raise ValidationError(f"{path}: cada item debe ser un objeto con 'name' y 'url'.")
+
+    name = item.get('name')
+    if not isinstance(name, str) or not name.strip():
+        raise ValidationError(f"{path}.name: es obligatorio y debe ser texto.")
+    name = ' '.join(name.split())
+    if len(name) > MAX_NAME_LENGTH:
+        raise ValidationError(f"{path}.name: máximo {MAX_NAME_LENGTH} caracteres.")
+
+    url = item.get('url') or ''
+    if not isinstance(url, str):
+        raise ValidationError(f"{path}.url: debe ser texto.")
+    url = url.strip()
+    if len(url) > MAX_URL_LENGTH:
+        raise ValidationError(f"{path}.url: máximo {MAX_URL_LENGTH} caracteres.")
+
+    # Orden de claves fijo: name, url, isActive, versions
+    canonical = {'name': name, 'url': url}
+
+    is_active = item.get('isActive', False)
+    if not isinstance(is_active, bool):
+        raise ValidationError(f"{path}.isActive: debe ser booleano.")
+    if is_active:
+        canonical['isActive'] = True
+
+    versions = item.get('versions') or []
+    if versions:
+        if depth + 1 >= MAX_DEPTH:
+            raise ValidationError(f"{path}.versions: anidamiento máximo de {MAX_DEPTH} niveles.")
+        versions = _canonical_list(versions, depth + 1, f"{path}.versions")
+        if versions:
+            canonical['versions'] = versions
+
+    return canonical
+
+
+def _canonical_list(items, depth, path):
+    if not isinstance(items, list):
+        raise ValidationError(f"{path}: debe ser una lista.")
+    if len(items) > MAX_ITEMS:
+        raise ValidationError(f"{path}: máximo {MAX_ITEMS} items.")
+
+    result = []
+    seen = set()
+    for index, item in enumerate(items):
+        canonical = _canonical_item(item, depth, f"{path}[{index}]")
+        key = _item_key(canonical)
+        if key in seen:
+            continue  # Duplicado exacto: se conserva la primera aparición
+        seen.add(key)
+        result.append(canonical)
+    return result
+
+
+def _item_key(item):
+    versions = tuple(_item_key(v) for v in item.get('versions', ()))
+    return (item['name'], item['url'], item.get('isActive', False), versions)
+
+
+def canonicalize_itto_list(items, field_name='items'):
+    """
+    Valida una lista ITTO y devuelve su forma canónica: claves desconocidas
+    eliminadas, espacios normalizados, duplicados exactos fuera y claves en orden
+    estable. El orden de los items se respeta porque es visible para el usuario.
+    Lanza `django.core.exceptions.ValidationError` si la lista no cumple el esquema.
+    """
+    if items is None:
+        return []
+    return _canonical_list(items, 0, field_name)
+
+
+def clean_itto_fields(instance, stored=False):
+    """
+    Normaliza en sitio los tres campos ITTO de un proceso o personalización
+    (`stored=True`: admite las formas por referencia, ver más abajo).
+    Usado por `Model.clean()`; agrupa los errores por campo para el admin.
+    """
+    errors = {}
+    for field in ITTO_FIELDS:
+        try:
+            value = getattr(instance, field)
+            if stored:
+                setattr(instance, field, canonicalize_stored_itto(value, field))
+            else:
+                setattr(instance, field, canonicalize_itto_list(value, field))
+        except ValidationError as exc:
+            errors[field] = exc.messages
+    if errors:
+        raise ValidationError(errors)
+
+
+# ----------------------------------------------------------------------------
+# Personalizaciones por referencia a los ITTOs base
+# ----------------------------------------------------------------------------
+# Un campo ITTO de una personalización guarda una de tres formas, siempre respecto a la
+# lista del proceso base (también en los departamentos):
+#   None                          -> hereda la lista base tal cual
+#   {'add': [...], 'remove': [...]} -> base sin `remove` y con `add` al final
+#   [...]                         -> lista completa propia
+#
+# Regla al guardar (compact_itto_list): None o diff siempre que reproduzcan la lista, sea
+# cual sea el tamaño del cambio; así la personalización sigue heredando lo que se añada a
+# la base después. La lista completa queda solo para lo que un diff no puede expresar:
+# items base reordenados o añadidos intercalados entre ellos. Esas no heredan cambios.
+def materialize_itto_list(base, stored):
+    """Lista efectiva de un campo a partir de la base y la forma guardada."""
+    if stored is None:
+        return base
+    if isinstance(stored, dict):
+        removed = stored.get('remove', [])
+        return [item for item in base if item not in removed] + stored.get('add', [])
+    return stored
+
+
+def compact_itto_list(base, items):
+    """
+    Forma de guardar `items` (ya canónica) frente a `base`: None si son iguales, un diff
+    si reproduce exactamente la lista (orden incluido) o la lista completa si no.
+    """
+    if items == base:
+        return None
+    diff = {'add': [item for item in items if item not in base],
+            'remove': [item for item in base if item not in items]}
+    if materialize_itto_list(base, diff) == items:
+        return diff
+    return items
+
+
+def canonicalize_stored_itto(value, field_name='items'):
+    """Valida y normaliza una forma guardada (None, diff o lista), p. ej. desde el admin."""
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        if set(value) - {'add', 'remove'}:
+            raise ValidationError(f"{field_name}: un diff solo admite las claves 'add' y 'remove'.")
+        return {'add': canonicalize_itto_list(value.get('add'), f'{field_name}.add'),
+                'remove': canonicalize_itto_list(value.get('remove'), f'{field_name}.remove')}
+    return canonicalize_itto_list(value, field_name)
@@ -0,0 +1,197 @@
+# backend/api/itto_graph.py
+"""
+Grafo de flujo de datos entre procesos: una salida de un proceso es entrada de otro
+cuando ambos ITTOs tienen el mismo nombre (sin distinguir mayúsculas ni espacios).
+
+El grafo se construye una vez por versión del catálogo y por (framework, país,
+departamento) y se guarda en memoria del proceso como índice de adyacencia, no en la
+caché de Django: así cada consulta (vecinos, orden topológico, impacto) recorre solo
+los nodos afectados sin volver a leer ni deserializar todos los procesos. Con país se
+usan los ITTOs efectivos de api/effective.py (memoizados).
+"""
+import heapq
+import threading
+from collections import OrderedDict, deque
+
+from django.conf import settings
+
+from .catalog import FRAMEWORKS, get_catalog_version
+from .effective import bulk_effective_ittos
+from .metrics import CACHE_REQUESTS
+from .progress import AREA_FIELD
+
+
+def artifact_key(name):
+    return ' '.join(str(name).split()).casefold()
+
+
+def _names(items):
+    return [item['name'] for item in items or [] if isinstance(item, dict) and item.get('name')]
+
+
+class ProcessGraph:
+    def __init__(self, nodes):
+        """`nodes`: dicts con id, process_number, name, area_id, inputs y outputs."""
+        self.processes = {}
+        self.labels = {}  # clave del artefacto -> primer nombre visto
+        self.producers, self.consumers = {}, {}
+        self.outputs = {}
+        for node in nodes:
+            pid = node['id']
+            self.processes[pid] = {'id': pid, 'process_number': node['process_number'],
+                                   'name': node['name'], 'area_id': node['area_id']}
+            self.outputs[pid] = []
+            for field, index in (('outputs', self.producers), ('inputs', self.consumers)):
+                for name in _names(node[field]):
+                    key = artifact_key(name)
+                    self.labels.setdefault(key, name)
+                    index.setdefault(key, set()).add(pid)
+                    if field == 'outputs' and key not in self.outputs[pid]:
+                        self.outputs[pid].append(key)
+
+        # Adyacencia {proceso: {vecino: [artefactos]}}, sin bucles sobre sí mismo
+        self.downstream = {pid: {} for pid in self.processes}
+        self.upstream = {pid: {} for pid in self.processes}
+        for key, producers in self.producers.items():
+            for consumer in self.consumers.get(key, ()):
+                for producer in producers - {consumer}:
+                    self.downstream[producer].setdefault(consumer, []).append(self.labels[key])
+                    self.upstream[consumer].setdefault(producer, []).append(self.labels[key])
+
+    def _sort_key(self, pid):
+        return (self.processes[pid]['process_number'], pid)
+
+    def _summary(self, pid, artifacts=None, depth=None):
+        summary = {key: self.processes[pid][key] for key in ('id', 'process_number', 'name')}
+        if artifacts is not None:
+            summary['artifacts'] = sorted(artifacts)
+        if depth is not None:
+            summary['depth'] = depth
+        return summary
+
+    def _walk(self, start, adjacency, depth=None):
+        """BFS desde `start` (excluido): {proceso: distancia}. depth=None recorre todo."""
+        seen = {}
+        queue = deque([(pid, 1) for pid in start])
+        while queue:
+            pid, distance = queue.popleft()
+            for neighbour in adjacency[pid]:
+                if neighbour in seen or neighbour in start or (depth is not None and distance > depth):
+                    continue
+                seen[neighbour] = distance
+                queue.append((neighbour, distance + 1))
+        return seen
+
+    def neighbours(self, pid, direction='both', depth=1):
+        """Procesos anteriores (producen sus entradas) y posteriores (consumen sus salidas)."""
+        result = {'process': self._summary(pid)}
+        for name, adjacency in (('upstream', self.upstream), ('downstream', self.downstream)):
+            if direction not in ('both', name):
+                continue
+            reached = self._walk({pid}, adjacency, depth)
+            result[name] = [
+                self._summary(other, adjacency[pid].get(other) if distance == 1 else None, distance)
+                for other, distance in sorted(reached.items(), key=lambda item: (item[1], self._sort_key(item[0])))
+            ]
+        return result
+
+    def topological_order(self, area_id=None):
+        """
+        Orden de Kahn de los procesos del área (todos si area_id es None), usando solo las
+        aristas dentro del área; a igualdad, por número de proceso. Los procesos en ciclos
+        no tienen orden: se añaden al final y se devuelven también en `cycles`.
+        """
+        members = {pid for pid, info in self.processes.items()
+                   if area_id is None or (info['area_id'] or 0) == area_id}
+        pending = {pid: sum(1 for other in self.upstream[pid] if other in members) for pid in members}
+        ready = [self._sort_key(pid) for pid, count in pending.items() if count == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            _, pid = heapq.heappop(ready)
+            order.append(pid)
+            for consumer in self.downstream[pid]:
+                if consumer in members:
+                    pending[consumer] -= 1
+                    if pending[consumer] == 0:
+                        heapq.heappush(ready, self._sort_key(consumer))
+        cycles = sorted(members - set(order), key=self._sort_key)
+        return {'order': [self._summary(pid) for pid in order + cycles],
+                'cycles': [self._summary(pid) for pid in cycles]}
+
+    def impact(self, pid, output=None):
+        """
+        Qué se rompe si el proceso deja de producir `output` (o todas sus salidas): los
+        consumidores sin otro productor del artefacto quedan rotos, y con ellos todo lo
+        que depende de ellos aguas abajo. None si el proceso no produce `output`.
+        """
+        keys = self.outputs[pid] if output is None else [artifact_key(output)]
+        if any(key not in self.outputs[pid] for key in keys):
+            return None
+        artifacts, broken = [], set()
+        for key in keys:
+            consumers = self.consumers.get(key, set()) - {pid}
+            others = self.producers[key] - {pid}
+            if not others:
+                broken |= consumers
+            artifacts.append({
+                'name': self.labels[key],
+                'consumers': [self._summary(c) for c in sorted(consumers, key=self._sort_key)],
+                'other_producers': [self._summary(p) for p in sorted(others, key=self._sort_key)],
+                'breaks': bool(consumers) and not others,
+            })
+        affected = self._walk(broken, self.downstream)
+        affected.pop(pid, None)
+        return {
+            'process': self._summary(pid),
+            'artifacts': artifacts,
+            'broken': [self._summary(c) for c in sorted(broken, key=self._sort_key)],
+            'transitively_affected': [self._summary(c, depth=d) for c, d in
+                                      sorted(affected.items(), key=lambda item: (item[1], self._sort_key(item[0])))],
+        }
+
+
+def _nodes(framework, country_code, department_id):
+    process_model = FRAMEWORKS[framework][0]
+    area_field = f'{AREA_FIELD[framework]}_id'
+    nodes = list(process_model.objects.order_by().values(
+        'id', 'process_number', 'name', 'inputs', 'outputs', area_field))
+    for node in nodes:
+        node['area_id'] = node.pop(area_field)
+    if country_code:
+        effective = {item['process_id']: item for item in bulk_effective_ittos(framework, country_code, department_id)}
+        for node in nodes:
+            node['inputs'] = effective[node['id']]['inputs']
+            node['outputs'] = effective[node['id']]['outputs']
+    return nodes
+
+
+# {(framework, país, departamento): (versión, grafo)}, LRU acotado. Con workers gthread
+# varios hilos comparten el índice: el lock protege el OrderedDict, no la construcción.
+_graphs = OrderedDict()
+_graphs_lock = threading.Lock()
+
+
+def get_graph(framework, country_code=None, department_id=None):
+    """Grafo del framework (ITTOs base, o efectivos del país/departamento) en la versión actual."""
+    key = (framework, (country_code or '').lower(), department_id if country_code else None)
+    version = get_catalog_version()
+    with _graphs_lock:
+        cached = _graphs.get(key)
+        if cached is not None and cached[0] == version:
+            _graphs.move_to_end(key)
+            CACHE_REQUESTS.labels('itto-graph', 'hit').inc()
+            return cached[1]
+    CACHE_REQUESTS.labels('itto-graph', 'miss').inc()
+    graph = ProcessGraph(_nodes(framework, key[1], key[2]))
+    with _graphs_lock:
+        _graphs[key] = (version, graph)
+        _graphs.move_to_end(key)
+        while len(_graphs) > settings.ITTO_GRAPH_CACHE_SIZE:
+            _graphs.popitem(last=False)
+    return graph
+
+
+def clear_graphs():
+    with _graphs_lock:
+        _graphs.clear()
@@ -0,0 +1,278 @@
+# backend/api/jobs.py
+"""
+Cola de trabajos en la propia base de datos (sin broker externo).
+
+  * `enqueue()` crea el Job y la vista responde 202 con su id; la misma clave de
+    idempotencia (cabecera `Idempotency-Key`) devuelve el trabajo ya creado.
+  * `manage.py run_jobs` reclama trabajos con SELECT ... FOR UPDATE SKIP LOCKED, así
+    varios workers no se pisan, y los ejecuta con el handler registrado para su `kind`.
+  * Los handlers procesan por lotes (JOBS_CHUNK_SIZE), cada lote en su transacción, e
+    informan del progreso con `JobContext.advance()`, que también actualiza el latido.
+    Un trabajo sin latido durante JOBS_HEARTBEAT_TIMEOUT (worker caído) se reintenta
+    desde cero (progreso, resultado y error se reinician); por eso cada lote debe poder
+    repetirse sin efectos distintos. Los pasos largos sin lotes (`call_command`) mantienen
+    el latido desde un hilo con `JobContext.keepalive()`.
+"""
+import logging
+import threading
+import time
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers
+
+from . import export, kanban_log, progress
+from .catalog import FRAMEWORKS, bump_catalog_version, is_country_code
+from .metrics import BULK_ROWS, JOB_DURATION, JOB_RUNS, record_kanban_transitions
+from .models import KANBAN_STATUS_CHOICES, Job
+
+logger = logging.getLogger(__name__)
+
+JobHandler = namedtuple('JobHandler', 'run validate staff_only')
+HANDLERS = {}
+
+
+def handler(kind, validate=None, staff_only=False):
+    """Registra `run(payload, context) -> result` para los trabajos de tipo `kind`."""
+    def register(run):
+        HANDLERS[kind] = JobHandler(run, validate, staff_only)
+        return run
+    return register
+
+
+class IdempotencyConflict(Exception):
+    """La clave de idempotencia ya se usó con otro tipo de trabajo o con otros datos."""
+
+
+def enqueue(kind, payload, user=None, idempotency_key=None):
+    """Devuelve (job, created)."""
+    if idempotency_key:
+        existing = Job.objects.filter(created_by=user, idempotency_key=idempotency_key).first()
+        if existing is None:
+            try:
+                with transaction.atomic():
+                    return Job.objects.create(kind=kind, payload=payload, created_by=user,
+                                              idempotency_key=idempotency_key), True
+            except IntegrityError:  # otra petición con la misma clave ganó la carrera
+                existing = Job.objects.get(created_by=user, idempotency_key=idempotency_key)
+        if existing.kind != kind or existing.payload != payload:
+            raise IdempotencyConflict(idempotency_key)
+        return existing, False
+    return Job.objects.create(kind=kind, payload=payload, created_by=user), True
+
+
+def claim(worker_id):
+    """Reclama el trabajo pendiente más antiguo (o uno huérfano) y lo marca 'running'."""
+    while True:
+        now = timezone.now()
+        stale = now - timedelta(seconds=settings.JOBS_HEARTBEAT_TIMEOUT)
+        with transaction.atomic():
+            job = (Job.objects.select_for_update(skip_locked=True)
+                   .filter(Q(status='queued') | Q(status='running', heartbeat_at__lt=stale))
+                   .order_by('created_at').first())
+            if job is None:
+                return None
+            if job.attempts >= settings.JOBS_MAX_ATTEMPTS:
+                job.status, job.finished_at = 'failed', now
+                job.error = f'Abandonado tras {job.attempts} intentos sin terminar.'
+                job.save(update_fields=['status', 'finished_at', 'error'])
+                JOB_RUNS.labels(job.kind, 'failed').inc()
+                continue
+            job.status, job.worker, job.attempts = 'running', worker_id, job.attempts + 1
+            job.started_at = job.heartbeat_at = now
+            # Un reintento vuelve a empezar por el primer lote
+            job.progress, job.result, job.error = 0, None, ''
+            job.save(update_fields=['status', 'worker', 'attempts', 'started_at', 'heartbeat_at',
+                                    'progress', 'result', 'error'])
+            return job
+
+
+class JobContext:
+    def __init__(self, job):
+        self.job = job
+
+    def set_total(self, total):
+        self.job.total = total
+        Job.objects.filter(pk=self.job.pk).update(total=total, heartbeat_at=timezone.now())
+
+    def advance(self, done):
+        self.job.progress += done
+        Job.objects.filter(pk=self.job.pk).update(progress=self.job.progress, heartbeat_at=timezone.now())
+
+    @contextmanager
+    def keepalive(self):
+        """Latido desde un hilo mientras dura un paso que no avanza por lotes."""
+        stop = threading.Event()
+
+        def beat():
+            try:
+                while not stop.wait(settings.JOBS_HEARTBEAT_TIMEOUT / 3):
+                    Job.objects.filter(pk=self.job.pk).update(heartbeat_at=timezone.now())
+            finally:
+                connection.close()  # la conexión propia del hilo
+
+        thread = threading.Thread(target=beat, name=f'job-{self.job.pk}-heartbeat', daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+
+def run(job):
+    """Ejecuta un trabajo ya reclamado y guarda su resultado o su error."""
+    started = time.perf_counter()
+    try:
+        job.result = HANDLERS[job.kind].run(job.payload, JobContext(job))
+        job.status = 'succeeded'
+    except Exception as exc:
+        logger.exception('Trabajo %s (%s) fallido', job.id, job.kind)
+        job.status, job.error = 'failed', f'{type(exc).__name__}: {exc}'
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'finished_at'])
+    JOB_RUNS.labels(job.kind, job.status).inc()
+    JOB_DURATION.labels(job.kind).observe(time.perf_counter() - started)
+    return job
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+# ----------------------------------------------------------------------------
+# Handlers
+# ----------------------------------------------------------------------------
+def validate_bulk_kanban(payload):
+    if payload.get('framework') not in FRAMEWORKS:
+        raise serializers.ValidationError({'framework': 'Debe ser pmbok o scrum.'})
+    process_ids = payload.get('process_ids')
+    if not isinstance(process_ids, list) or not all(isinstance(pk, int) for pk in process_ids):
+        raise serializers.ValidationError({'process_ids': 'Debe ser una lista de IDs.'})
+    if payload.get('kanban_status') not in dict(KANBAN_STATUS_CHOICES):
+        raise serializers.ValidationError({'kanban_status': 'Estado Kanban inválido.'})
+
+
+@handler('bulk_kanban', validate=validate_bulk_kanban)
+def bulk_kanban(payload, context):
+    """Mueve procesos y sus personalizaciones a `kanban_status`, por lotes de procesos."""
+    framework, new_status = payload['framework'], payload['kanban_status']
+    process_model, customization_model = FRAMEWORKS[framework]
+    process_ids = payload['process_ids']
+    context.set_total(len(process_ids))
+
+    area_field = f'{progress.AREA_FIELD[framework]}_id'
+    rows = 0
+    for chunk in chunks(process_ids, settings.JOBS_CHUNK_SIZE):
+        customizations = customization_model.objects.filter(process_id__in=chunk)
+        processes = process_model.objects.filter(id__in=chunk)
+        with transaction.atomic():
+            # Estado previo de las filas del lote (una consulta por modelo), bloqueadas hasta el
+            # commit: deltas del resumen de progreso, métricas y transiciones Kanban salen de
+            # filas que ningún PATCH concurrente puede cambiar antes del UPDATE
+            locked = customizations.select_for_update().order_by('id').values_list(
+                'id', 'process_id', 'country_code', 'department_id', f'process__{area_field}', 'kanban_status')
+            changing = [row for row in locked if row[-1] != new_status]
+            locked_processes = processes.select_for_update().order_by('id').values_list(
+                'id', area_field, 'kanban_status')
+            changing_processes = [row for row in locked_processes if row[-1] != new_status]
+            before = Counter(progress.group_key(country_code, department_id, area_id, old_status)
+                             for _, _, country_code, department_id, area_id, old_status in changing)
+            chunk_rows = customizations.update(kanban_status=new_status)
+            chunk_rows += processes.update(kanban_status=new_status)
+            progress.apply_deltas(framework, progress.transition_deltas(before, new_status))
+            now = timezone.now()
+            kanban_log.record([
+                *(kanban_log.transition(framework, process_id, old_status, new_status, pk, country_code,
+                                        department_id, area_id, at=now)
+                  for pk, process_id, country_code, department_id, area_id, old_status in changing),
+                *(kanban_log.transition(framework, pk, old_status, new_status, area_id=area_id, at=now)
+                  for pk, area_id, old_status in changing_processes),
+            ])
+            bump_catalog_version()  # .update() no dispara señales
+
+        previous = {}
+        for (_, _, _, old_status), n in before.items():
+            previous[old_status] = previous.get(old_status, 0) + n
+        record_kanban_transitions(framework, previous, new_status)
+        rows += chunk_rows
+        context.advance(len(chunk))
+
+    BULK_ROWS.labels(framework, 'bulk_kanban').observe(rows)
+    return {'rows': rows}
+
+
+# Mismos comandos y orden que la fase de seed de `manage.py startup`
+SEED_COMMANDS = ('seed_pmbok', 'seed_scrum', 'seed_departments')
+
+
+def validate_seed(payload):
+    commands = payload.get('commands', list(SEED_COMMANDS))
+    if not isinstance(commands, list) or not set(commands) <= set(SEED_COMMANDS):
+        raise serializers.ValidationError({'commands': f'Valores permitidos: {", ".join(SEED_COMMANDS)}.'})
+
+
+@handler('seed', validate=validate_seed, staff_only=True)
+def seed(payload, context):
+    commands = [name for name in SEED_COMMANDS if name in payload.get('commands', SEED_COMMANDS)]
+    context.set_total(len(commands))
+    output = {}
+    for name in commands:
+        out = StringIO()
+        with context.keepalive():
+            call_command(name, stdout=out)
+        output[name] = out.getvalue().strip().splitlines()[-1:]
+        context.advance(1)
+    return output
+
+
+def validate_export(payload):
+    if payload.get('framework', 'all') not in ('all', *FRAMEWORKS):
+        raise serializers.ValidationError({'framework': 'Debe ser all, pmbok o scrum.'})
+    if payload.get('format', 'csv') not in export.FORMATS:
+        raise serializers.ValidationError({'format': f'Valores permitidos: {", ".join(export.FORMATS)}.'})
+    if payload.get('country') not in (None, '') and not is_country_code(payload['country']):
+        raise serializers.ValidationError({'country': 'Debe ser un código de país de 2 letras.'})
+    department = payload.get('department')
+    if department is not None and (not isinstance(department, int) or department < 0):
+        raise serializers.ValidationError({'department': 'Debe ser un ID numérico.'})
+
+
+@handler('export', validate=validate_export)
+def export_file(payload, context):
+    """Escribe la exportación en EXPORT_ROOT; se descarga en /api/export/<job_id>/."""
+    fmt, framework = payload.get('format', 'csv'), payload.get('framework', 'all')
+    country, department = payload.get('country') or None, payload.get('department')
+    frameworks = list(FRAMEWORKS) if framework == 'all' else [framework]
+    context.set_total(sum(export.records_count(name, country, department) for name in frameworks))
+
+    # Progreso por lotes de registros: un UPDATE cada JOBS_CHUNK_SIZE, no por fila
+    pending = [0]
+
+    def on_record():
+        pending[0] += 1
+        if pending[0] >= settings.JOBS_CHUNK_SIZE:
+            context.advance(pending[0])
+            pending[0] = 0
+
+    path = export.job_path(context.job.pk, fmt)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(path.suffix + '.part')
+    with open(partial, 'wb') as output:
+        for chunk in export.stream(fmt, framework, country, department, on_record):
+            output.write(chunk)
+    partial.replace(path)  # el fichero solo aparece completo
+    if pending[0]:
+        context.advance(pending[0])
+    return {'file': export.filename(fmt, framework, country), 'format': fmt,
+            'bytes': path.stat().st_size,
+            'download': reverse('export-download', args=[context.job.pk])}
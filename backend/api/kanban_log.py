@@ -0,0 +1,159 @@
+# backend/api/kanban_log.py
+"""
+Registro de transiciones Kanban (tabla KanbanTransition) y analítica de tiempos de ciclo.
+
+`kanban_status` se sobrescribe en cada cambio; aquí se añade una fila por transición
+(framework y estados como smallint, claves enteras) en la misma transacción que el
+cambio. `update_kanban_status` inserta una fila y el trabajo `bulk_kanban` inserta las
+de cada lote con bulk_create, a partir del estado previo que ya leen (con las filas
+bloqueadas) para el resumen de progreso. Las escrituras que no pasan por esos dos caminos (admin, importación, PUT de
+la personalización) no dejan historia.
+
+`cycle_time_report` calcula en SQL, con funciones ventana comunes a PostgreSQL y SQLite:
+
+  0. Elementos con una llegada a 'done' en la ventana (rango de `changed_at`); solo se
+     lee la historia de esos elementos, no la de todo el framework.
+  1. `lap`: cuántas veces llegó el elemento a 'done' antes de cada fila; cada vuelta
+     (de una reapertura a la siguiente llegada a 'done') se mide por separado.
+  2. Por vuelta: primera transición (inicio del lead time) y última entrada en
+     'in_progress' (inicio del cycle time; sin ella la vuelta no tiene cycle time).
+  3. Las llegadas a 'done' dentro de la ventana de tiempo son las entregas; los
+     percentiles salen de ROW_NUMBER() / COUNT() por grupo (rango más cercano), así que
+     solo viajan a Python las filas agregadas.
+"""
+from datetime import timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+from .models import FRAMEWORK_CODES, KANBAN_STATUS_CODES, KanbanTransition
+
+INSERT_BATCH = 1000
+PERCENTILES = (50, 85, 95)
+# Dimensiones de agrupación de la analítica -> columna
+GROUP_COLUMNS = {'country': 'country_code', 'department': 'department_key', 'area': 'area_key'}
+
+
+def transition(framework, process_id, old_status, new_status, customization_id=None,
+               country_code='', department_id=None, area_id=None, at=None):
+    """KanbanTransition sin guardar; None si el estado no cambia o no tiene código."""
+    # Un estado fuera de KANBAN_STATUS_CHOICES (la columna no lo impide) no entra en la historia
+    if old_status == new_status or old_status not in KANBAN_STATUS_CODES or new_status not in KANBAN_STATUS_CODES:
+        return None
+    return KanbanTransition(
+        framework=FRAMEWORK_CODES[framework], process_key=process_id, item_key=customization_id or 0,
+        country_code=(country_code or '').lower(), department_key=department_id or 0,
+        area_key=area_id or 0, from_status=KANBAN_STATUS_CODES[old_status],
+        to_status=KANBAN_STATUS_CODES[new_status], changed_at=at or timezone.now())
+
+
+def record(transitions):
+    """Inserta las transiciones (las None se ignoran) en lotes. Devuelve cuántas."""
+    rows = [row for row in transitions if row is not None]
+    KanbanTransition.objects.bulk_create(rows, batch_size=INSERT_BATCH)
+    return len(rows)
+
+
+# ----------------------------------------------------------------------------
+# Analítica
+# ----------------------------------------------------------------------------
+def _seconds_between(later, earlier):
+    if connection.vendor == 'postgresql':
+        return f'EXTRACT(EPOCH FROM ({later} - {earlier}))'
+    # SQLite guarda las fechas como texto ISO
+    return f'((julianday({later}) - julianday({earlier})) * 86400.0)'
+
+
+def _percentile_columns(value, dimensions):
+    """Percentiles de `value` por rango más cercano: el menor valor con rango >= p·n."""
+    rank, total = f'{value}_rank', f'{value}_n'
+    columns = [f'MIN(CASE WHEN {rank} >= {p / 100} * {total} THEN {value} END) AS {value}_p{p}'
+               for p in PERCENTILES]
+    columns.append(f'AVG({value}) AS {value}_avg')
+    partition = f'PARTITION BY {dimensions} ' if dimensions else ''
+    # NULL al final en ambos motores (PostgreSQL los ordena al final, SQLite al principio)
+    window = (f'ROW_NUMBER() OVER ({partition}ORDER BY CASE WHEN {value} IS NULL THEN 1 ELSE 0 END, {value}) '
+              f'AS {rank}, COUNT({value}) OVER ({partition.strip()}) AS {total}')
+    return columns, window
+
+
+def cycle_time_report(framework, country_code=None, department_key=None, area_key=None,
+                      days=90, group_by=('country', 'department', 'area'), now=None):
+    """
+    Entregas (llegadas a 'done') de los últimos `days` días agrupadas por `group_by`:
+    recuento, throughput semanal y percentiles/media de lead y cycle time en horas.
+    `department_key=0` limita al nivel país; sin país se incluyen los procesos base
+    (country_code vacío).
+    """
+    until = now or timezone.now()
+    since = until - timedelta(days=days)
+    done, in_progress = KANBAN_STATUS_CODES['done'], KANBAN_STATUS_CODES['in_progress']
+    dimensions = ', '.join(GROUP_COLUMNS[name] for name in group_by)
+    item = 'framework, item_key, process_key'
+
+    conditions = ['framework = %s', 'changed_at < %s']
+    params = [FRAMEWORK_CODES[framework], connection.ops.adapt_datetimefield_value(until)]
+    for column, value in (('country_code', (country_code or '').lower() or None),
+                          ('department_key', department_key), ('area_key', area_key)):
+        if value is not None:
+            conditions.append(f'{column} = %s')
+            params.append(value)
+    since_param = connection.ops.adapt_datetimefield_value(since)
+
+    def where(alias):
+        return ' AND '.join(f'{alias}.{condition}' for condition in conditions)
+
+    cycle_columns, cycle_window = _percentile_columns('cycle_seconds', dimensions)
+    lead_columns, lead_window = _percentile_columns('lead_seconds', dimensions)
+    select_dimensions = f'{dimensions}, ' if dimensions else ''
+    table = KanbanTransition._meta.db_table
+    # Solo la historia de los elementos con una entrega en la ventana: la subconsulta acota
+    # por tiempo (índice de changed_at) y la historia se lee por kanban_transition_item_idx
+    delivered = (f'SELECT DISTINCT d.framework, d.item_key, d.process_key FROM {table} d '
+                 f'WHERE {where("d")} AND d.to_status = {done} AND d.changed_at >= %s')
+    sql = (
+        f'SELECT {select_dimensions}COUNT(*) AS completed, {", ".join(cycle_columns + lead_columns)} FROM ('
+        f'  SELECT {select_dimensions}cycle_seconds, lead_seconds, {cycle_window}, {lead_window} FROM ('
+        f'    SELECT {select_dimensions}{_seconds_between("changed_at", "started_at")} AS cycle_seconds, '
+        f'      {_seconds_between("changed_at", "lap_start")} AS lead_seconds FROM ('
+        f'      SELECT country_code, department_key, area_key, to_status, changed_at, '
+        f'        MIN(changed_at) OVER lap AS lap_start, '
+        f'        MAX(CASE WHEN to_status = {in_progress} THEN changed_at END) OVER lap AS started_at FROM ('
+        f'        SELECT t.*, COALESCE(SUM(CASE WHEN t.to_status = {done} THEN 1 ELSE 0 END) OVER ('
+        f'          PARTITION BY t.framework, t.item_key, t.process_key ORDER BY t.changed_at, t.id ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING'
+        f'        ), 0) AS lap FROM {table} t JOIN ({delivered}) items ON items.framework = t.framework '
+        f'          AND items.item_key = t.item_key AND items.process_key = t.process_key WHERE {where("t")}'
+        f'      ) laps WINDOW lap AS (PARTITION BY {item}, lap)'
+        f'    ) history WHERE to_status = {done} AND changed_at >= %s'
+        f'  ) deliveries'
+        f') ranked{" GROUP BY " + dimensions + " ORDER BY " + dimensions if dimensions else ""}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [since_param] + params + [since_param])
+        names = [column[0] for column in cursor.description]
+        rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def hours(row, value):
+        stats = {f'p{p}': row[f'{value}_p{p}'] for p in PERCENTILES}
+        stats['avg'] = row[f'{value}_avg']
+        return {key: None if seconds is None else round(seconds / 3600, 2) for key, seconds in stats.items()}
+
+    groups = []
+    for row in rows:
+        if not row['completed']:
+            continue  # sin GROUP BY el agregado devuelve una fila aunque no haya entregas
+        group = {}
+        if 'country' in group_by:
+            group['country_code'] = row['country_code'] or None
+        if 'department' in group_by:
+            group['department_id'] = row['department_key'] or None
+        if 'area' in group_by:
+            group['area_id'] = row['area_key'] or None
+        group.update(
+            completed=row['completed'],
+            throughput_per_week=round(row['completed'] * 7 / days, 2),
+            cycle_time_hours=hours(row, 'cycle_seconds'),
+            lead_time_hours=hours(row, 'lead_seconds'),
+        )
+        groups.append(group)
+    return {'since': since, 'until': until, 'days': days, 'groups': groups}
@@ -0,0 +1,314 @@
+# backend/api/management/commands/bench_api.py
+import json
+import os
+import platform
+import random
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.management.commands.bench_catalog import (
+    BENCH_PROCESS_OFFSET, BENCH_USER_EMAIL, BENCH_USER_PASSWORD
+)
+from api import jobs
+from api.models import CustomUser, Job, PMBOKProcess, PMBOKProcessCustomization, KANBAN_STATUS_CHOICES
+
+# bulk-kanban-job: el endpoint solo encola (202); se mide hasta que el trabajo termina.
+# Nombre distinto al antiguo 'bulk-kanban' (síncrono) para que --compare no los mezcle.
+SCENARIOS = ('pmbok-list', 'customizations', 'bulk-kanban-job', 'token')
+KANBAN_STATUSES = [choice[0] for choice in KANBAN_STATUS_CHOICES]
+JOB_FINISHED = ('succeeded', 'failed')
+JOB_TIMEOUT = 300
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def rss_mb(pid):
+    """RSS en MB de un proceso y sus hijos directos (workers de gunicorn). Solo Linux."""
+    total_kb = 0
+    pids = [pid]
+    try:
+        for task in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{task}/children') as fh:
+                pids.extend(int(child) for child in fh.read().split())
+    except OSError:
+        pass
+    for item in pids:
+        try:
+            with open(f'/proc/{item}/status') as fh:
+                for line in fh:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+        except OSError:
+            continue
+    return round(total_kb / 1024, 1) if total_kb else None
+
+
+def git_sha():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return os.getenv('GIT_COMMIT_SHA') or os.getenv('APP_GIT_SHA')
+
+
+class InProcessTransport:
+    """Llama a las vistas reales vía django.test.Client; cuenta consultas por petición."""
+    name = 'in-process'
+
+    def __init__(self, token):
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        self.local = threading.local()
+
+    def _client(self):
+        if not hasattr(self.local, 'client'):
+            self.local.client = Client()
+        return self.local.client
+
+    @staticmethod
+    def _counting(queries):
+        def counter(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+        return connection.execute_wrapper(counter)
+
+    def request(self, method, path, payload=None, auth=True):
+        queries = [0]
+        headers = self.auth if auth else {}
+        with self._counting(queries):
+            if method == 'GET':
+                response = self._client().get(path, **headers)
+            else:
+                response = self._client().generic(method, path, json.dumps(payload),
+                                                  content_type='application/json', **headers)
+        data = response.json() if response.get('Content-Type', '').startswith('application/json') else None
+        return response.status_code, queries[0], data
+
+    def wait_for_job(self, job_id):
+        """
+        Sin worker aparte: cada hilo del benchmark hace de `run_jobs` y vacía la cola hasta
+        que su trabajo termina (la concurrencia equivale a --concurrency workers).
+        """
+        queries = [0]
+        deadline = time.monotonic() + JOB_TIMEOUT
+        worker_id = f'bench:{threading.get_ident()}'
+        with self._counting(queries):
+            while time.monotonic() < deadline:
+                job = jobs.claim(worker_id)
+                if job is not None:
+                    jobs.run(job)
+                job_status = Job.objects.filter(pk=job_id).values_list('status', flat=True).first()
+                if job_status in JOB_FINISHED:
+                    return job_status, queries[0]
+                if job is None:
+                    time.sleep(0.01)  # lo está ejecutando otro hilo
+        return None, queries[0]
+
+
+class HTTPTransport:
+    """Peticiones HTTP reales contra un servidor ya levantado (gunicorn/runserver)."""
+    name = 'http'
+
+    def __init__(self, base_url, token):
+        self.base_url = base_url.rstrip('/')
+        self.token = token
+
+    def request(self, method, path, payload=None, auth=True):
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method)
+        req.add_header('Content-Type', 'application/json')
+        if auth and self.token:
+            req.add_header('Authorization', f'Bearer {self.token}')
+        try:
+            with urllib.request.urlopen(req, timeout=60) as response:
+                body = response.read()
+                is_json = response.headers.get('Content-Type', '').startswith('application/json')
+                return response.status, None, json.loads(body) if is_json else None
+        except urllib.error.HTTPError as exc:
+            return exc.code, None, None
+
+    def wait_for_job(self, job_id):
+        """Sondea el trabajo; lo ejecuta un `run_jobs` levantado junto al servidor."""
+        deadline = time.monotonic() + JOB_TIMEOUT
+        while time.monotonic() < deadline:
+            status, _, data = self.request('GET', f'/api/jobs/{job_id}/')
+            if status == 200 and data['status'] in JOB_FINISHED:
+                return data['status'], None
+            time.sleep(0.05)
+        return None, None
+
+
+class Command(BaseCommand):
+    help = 'Drives the real API endpoints with concurrent clients and reports latency percentiles as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                            help='Escenario a ejecutar (repetible). Por defecto: todos.')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=200, help='Peticiones por escenario.')
+        parser.add_argument('--warmup', type=int, default=5, help='Peticiones de calentamiento por escenario.')
+        parser.add_argument('--base-url', help='Servidor HTTP (ej. http://localhost:8000). '
+                                               'Sin él se usa el cliente en proceso. Para '
+                                               'bulk-kanban-job debe haber un run_jobs en marcha.')
+        parser.add_argument('--server-pid', type=int, help='PID del master de gunicorn para medir RSS.')
+        parser.add_argument('--output', help='Ruta del JSON de resultados.')
+        parser.add_argument('--compare', help='JSON de una corrida anterior para mostrar diferencias.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        scenarios = options['scenario'] or list(SCENARIOS)
+
+        self.bench_process_ids = list(PMBOKProcess.objects.filter(
+            process_number__gte=BENCH_PROCESS_OFFSET).values_list('id', flat=True))
+        if not self.bench_process_ids:
+            raise CommandError('No hay catálogo sintético. Ejecuta primero: python manage.py bench_catalog')
+        # Los países con los que se sembró bench_catalog (--countries), no un número fijo
+        self.countries = sorted(PMBOKProcessCustomization.objects.filter(
+            process_id__in=self.bench_process_ids).values_list('country_code', flat=True).distinct())
+        if not self.countries:
+            raise CommandError('El catálogo sintético no tiene personalizaciones. '
+                               'Ejecuta primero: python manage.py bench_catalog')
+
+        if options['base_url']:
+            transport = HTTPTransport(options['base_url'], self.fetch_http_token(options['base_url']))
+            rss_pid = options['server_pid']
+        else:
+            user = CustomUser.objects.get(email=BENCH_USER_EMAIL)
+            transport = InProcessTransport(str(RefreshToken.for_user(user).access_token))
+            rss_pid = os.getpid()
+
+        results = {}
+        for scenario in scenarios:
+            results[scenario] = self.run_scenario(transport, scenario, options, rss_pid)
+            r = results[scenario]
+            self.stdout.write(
+                f"{scenario:16} p50={r['p50_ms']}ms p95={r['p95_ms']}ms p99={r['p99_ms']}ms "
+                f"rps={r['throughput_rps']} errors={r['errors']} queries={r['queries_per_request']} "
+                f"rss={r['rss_mb']}MB"
+            )
+
+        report = {
+            'meta': {
+                'git_sha': git_sha(),
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'transport': transport.name,
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'concurrency': options['concurrency'],
+                'requests': options['requests'],
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}"))
+        if options['compare']:
+            self.print_comparison(options['compare'], results)
+
+    def token_payload(self):
+        return {'email': BENCH_USER_EMAIL, 'password': BENCH_USER_PASSWORD}
+
+    def fetch_http_token(self, base_url):
+        req = urllib.request.Request(base_url.rstrip('/') + '/api/token/',
+                                     data=json.dumps(self.token_payload()).encode(), method='POST')
+        req.add_header('Content-Type', 'application/json')
+        with urllib.request.urlopen(req, timeout=30) as response:
+            return json.loads(response.read())['access']
+
+    def build_request(self, scenario):
+        if scenario == 'pmbok-list':
+            return 'GET', '/api/pmbok-processes/', None, True
+        if scenario == 'customizations':
+            process_id = self.rng.choice(self.bench_process_ids)
+            items = [{'name': f'Bench item {self.rng.randint(1, 50)}', 'url': ''}]
+            return 'POST', '/api/customizations/', {
+                'process_id': process_id, 'process_type': 'pmbok',
+                'country_code': self.rng.choice(self.countries),
+                'inputs': items, 'tools_and_techniques': items, 'outputs': items,
+            }, True
+        if scenario == 'bulk-kanban-job':
+            ids = self.rng.sample(self.bench_process_ids, min(20, len(self.bench_process_ids)))
+            return 'POST', '/api/pmbok-processes/bulk-update-kanban-status/', {
+                'process_ids': ids, 'kanban_status': self.rng.choice(KANBAN_STATUSES),
+            }, True
+        return 'POST', '/api/token/', self.token_payload(), False
+
+    def run_scenario(self, transport, scenario, options, rss_pid):
+        # Las peticiones se generan antes para que el RNG no dependa del orden de los hilos
+        warmup = [self.build_request(scenario) for _ in range(options['warmup'])]
+        planned = [self.build_request(scenario) for _ in range(options['requests'])]
+        job_ids = []
+
+        def call(req):
+            method, path, payload, auth = req
+            status, queries, data = transport.request(method, path, payload, auth)
+            if status == 202 and data and data.get('job_id'):
+                # Trabajo encolado: cuenta hasta que termina, no solo el encolado
+                job_ids.append(data['job_id'])
+                job_status, job_queries = transport.wait_for_job(data['job_id'])
+                status = 200 if job_status == 'succeeded' else 500
+                if queries is not None and job_queries is not None:
+                    queries += job_queries
+            return status, queries
+
+        for req in warmup:
+            call(req)
+
+        def timed(req):
+            started = time.perf_counter()
+            status, queries = call(req)
+            return time.perf_counter() - started, status, queries
+
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                samples = list(pool.map(timed, planned))
+        finally:
+            # Los trabajos del benchmark no se quedan en la tabla (ni en cola tras un error)
+            Job.objects.filter(pk__in=job_ids).delete()
+        wall = time.perf_counter() - started
+
+        latencies = sorted(sample[0] * 1000 for sample in samples)
+        query_counts = [sample[2] for sample in samples if sample[2] is not None]
+        return {
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'mean_ms': round(sum(latencies) / len(latencies), 2),
+            'throughput_rps': round(len(samples) / wall, 1),
+            'errors': sum(1 for sample in samples if sample[1] >= 400),
+            'queries_per_request': (round(sum(query_counts) / len(query_counts), 1)
+                                    if query_counts else None),
+            'rss_mb': rss_mb(rss_pid) if rss_pid else None,
+        }
+
+    def print_comparison(self, path, results):
+        with open(path) as fh:
+            baseline = json.load(fh)
+        self.stdout.write(f"Comparación contra {path} ({baseline['meta'].get('git_sha')}):")
+        for scenario, current in results.items():
+            previous = baseline['results'].get(scenario)
+            if not previous:
+                continue
+            parts = []
+            for key in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'queries_per_request'):
+                before, after = previous.get(key), current.get(key)
+                if before and after is not None:
+                    parts.append(f"{key} {before} -> {after} ({(after - before) / before:+.1%})")
+            self.stdout.write(f"  {scenario}: " + ', '.join(parts))
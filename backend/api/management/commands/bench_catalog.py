@@ -0,0 +1,112 @@
+# backend/api/management/commands/bench_catalog.py
+import itertools
+import random
+import string
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.catalog import FRAMEWORKS, bump_catalog_version
+from api.models import CustomUser, Department
+from api.progress import schedule_rebuild as schedule_progress_rebuild
+
+# Los datos sintéticos se distinguen de los reales por estos marcadores,
+# así --reset nunca toca el catálogo sembrado por seed_pmbok/seed_scrum.
+BENCH_PROCESS_OFFSET = 100000
+BENCH_DEPARTMENT_PREFIX = 'Bench Dept '
+BENCH_USER_EMAIL = 'bench@example.com'
+BENCH_USER_PASSWORD = 'bench-password-123'
+
+
+def bench_country_codes(count):
+    """Códigos de 2 letras deterministas ('aa', 'ab', ...)."""
+    pairs = (''.join(p) for p in itertools.product(string.ascii_lowercase, repeat=2))
+    return list(itertools.islice(pairs, count))
+
+
+def synthetic_ittos(rng, size):
+    return [{'name': f'Item {rng.randint(1, 500)}-{i}', 'url': ''} for i in range(size)]
+
+
+class Command(BaseCommand):
+    help = 'Generates a synthetic catalog of configurable scale for benchmarks (bench_api)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=50,
+                            help='Procesos sintéticos por framework (además de los sembrados).')
+        parser.add_argument('--countries', type=int, default=20)
+        parser.add_argument('--departments', type=int, default=10)
+        parser.add_argument('--customizations-per-combination', type=int, default=1,
+                            help='Personalizaciones por (proceso, país): 1 = solo país, '
+                                 'N = país + N-1 departamentos.')
+        parser.add_argument('--itto-size', type=int, default=6, help='Items por lista ITTO.')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla para reproducibilidad.')
+        parser.add_argument('--reset', action='store_true',
+                            help='Elimina los datos sintéticos previos antes de generar.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        if options['reset']:
+            self.reset()
+
+        with transaction.atomic():
+            user, created = CustomUser.objects.get_or_create(email=BENCH_USER_EMAIL)
+            if created:
+                user.set_password(BENCH_USER_PASSWORD)
+                user.save(update_fields=['password'])
+
+            departments = []
+            for i in range(options['departments']):
+                dept, _ = Department.objects.get_or_create(name=f'{BENCH_DEPARTMENT_PREFIX}{i}')
+                departments.append(dept)
+
+            countries = bench_country_codes(options['countries'])
+            per_combination = max(1, options['customizations_per_combination'])
+            department_slots = [None] + departments[:per_combination - 1]
+
+            for framework, (process_model, customization_model) in FRAMEWORKS.items():
+                existing = set(process_model.objects.filter(
+                    process_number__gte=BENCH_PROCESS_OFFSET).values_list('process_number', flat=True))
+                process_model.objects.bulk_create([
+                    process_model(
+                        process_number=BENCH_PROCESS_OFFSET + n,
+                        name=f'Bench {framework} {n}',
+                        inputs=synthetic_ittos(rng, options['itto_size']),
+                        tools_and_techniques=synthetic_ittos(rng, options['itto_size']),
+                        outputs=synthetic_ittos(rng, options['itto_size']),
+                    )
+                    for n in range(options['processes'])
+                    if BENCH_PROCESS_OFFSET + n not in existing
+                ], batch_size=500)
+
+                processes = process_model.objects.filter(process_number__gte=BENCH_PROCESS_OFFSET)
+                # unique_together no protege las filas con department NULL: se filtran a mano
+                existing = set(customization_model.objects.filter(process__in=processes).values_list(
+                    'process_id', 'country_code', 'department_id'))
+                rows = [
+                    customization_model(
+                        process=process, country_code=country, department=department,
+                        inputs=process.inputs, tools_and_techniques=process.tools_and_techniques,
+                        outputs=process.outputs,
+                    )
+                    for process in processes
+                    for country in countries
+                    for department in department_slots
+                    if (process.id, country, department.id if department else None) not in existing
+                ]
+                customization_model.objects.bulk_create(rows, batch_size=1000)
+                self.stdout.write(f'{framework}: {processes.count()} procesos, {len(rows)} personalizaciones')
+
+            bump_catalog_version()
+            schedule_progress_rebuild()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Catálogo sintético listo (usuario {BENCH_USER_EMAIL} / {BENCH_USER_PASSWORD}).'))
+
+    def reset(self):
+        with transaction.atomic():
+            for process_model, _ in FRAMEWORKS.values():
+                process_model.objects.filter(process_number__gte=BENCH_PROCESS_OFFSET).delete()
+            Department.objects.filter(name__startswith=BENCH_DEPARTMENT_PREFIX).delete()
+            schedule_progress_rebuild()
+        self.stdout.write('Datos sintéticos anteriores eliminados.')
@@ -0,0 +1,105 @@
+# backend/api/management/commands/bench_middleware.py
+import json
+import logging
+import time
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.utils.module_loading import import_string
+
+from core.middleware import StatelessPathsMixin
+
+from .bench_api import percentile
+
+DEFAULT_PATHS = ('/api/', '/super-admin/login/')
+
+
+def stock_middleware(middleware):
+    """MIDDLEWARE con las clases originales de Django en lugar de las de core/middleware.py."""
+    stock = []
+    for dotted in middleware:
+        cls = import_string(dotted)
+        if issubclass(cls, StatelessPathsMixin):
+            original = cls.__mro__[2]  # (cls, StatelessPathsMixin, original, ...)
+            dotted = f'{original.__module__}.{original.__qualname__}'
+        stock.append(dotted)
+    return stock
+
+
+class Command(BaseCommand):
+    help = 'Measures the per-request middleware overhead of the stock stack vs the stateless /api/ stack'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', action='append', help=f'Ruta a medir (repetible). Por defecto: {DEFAULT_PATHS}.')
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--warmup', type=int, default=200)
+        parser.add_argument('--output', help='Ruta del JSON de resultados.')
+
+    def handle(self, *args, **options):
+        from django.conf import settings
+
+        stacks = {
+            'stock': stock_middleware(settings.MIDDLEWARE),
+            'stateless': list(settings.MIDDLEWARE),
+        }
+        # Los 401/403 esperados no deben medir el coste del logging
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        handlers = {}
+        for name, middleware in stacks.items():
+            # El handler construye la cadena de middlewares al instanciarse
+            with override_settings(MIDDLEWARE=middleware):
+                handlers[name] = WSGIHandler()
+
+        results = {}
+        for path in options['path'] or DEFAULT_PATHS:
+            results[path] = self.measure(handlers, path, options)
+            stock, stateless = results[path]['stock'], results[path]['stateless']
+            saved = stock['mean_us'] - stateless['mean_us']
+            results[path]['saved_us'] = round(saved, 1)
+            self.stdout.write(
+                f"{path:24} stock={stock['mean_us']}µs (p50 {stock['p50_us']}) "
+                f"stateless={stateless['mean_us']}µs (p50 {stateless['p50_us']}) "
+                f"ahorro={saved:.1f}µs ({saved / stock['mean_us']:+.1%}) status={stateless['status']}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}"))
+
+    def measure(self, handlers, path, options):
+        factory = RequestFactory()
+        status = {}
+        samples = {name: [] for name in handlers}
+
+        def call(name):
+            def start_response(status_line, headers):
+                status[name] = status_line
+
+            # Entorno nuevo por petición: el handler lo modifica
+            environ = factory._base_environ(PATH_INFO=path, REQUEST_METHOD='GET')
+            started = time.perf_counter()
+            for _ in handlers[name](environ, start_response):
+                pass
+            return (time.perf_counter() - started) * 1e6
+
+        # Las pilas se alternan petición a petición para que el ruido (GC, caché de CPU)
+        # afecte a ambas por igual.
+        for _ in range(options['warmup']):
+            for name in handlers:
+                call(name)
+        for _ in range(options['requests']):
+            for name in handlers:
+                samples[name].append(call(name))
+
+        results = {}
+        for name, values in samples.items():
+            values.sort()
+            results[name] = {
+                'mean_us': round(sum(values) / len(values), 1),
+                'p50_us': round(percentile(values, 50), 1),
+                'p95_us': round(percentile(values, 95), 1),
+                'status': status.get(name),
+            }
+        return results
@@ -0,0 +1,122 @@
+# backend/api/management/commands/canonicalize_ittos.py
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from api.catalog import bump_catalog_version
+from api.itto import (
+    ITTO_FIELDS, canonicalize_itto_list, canonicalize_stored_itto, compact_itto_list, materialize_itto_list
+)
+from api.models import (
+    PMBOKProcess, ScrumProcess, PMBOKProcessCustomization, ScrumProcessCustomization
+)
+
+# Procesos primero: las personalizaciones se compactan contra su base ya normalizada
+MODELS = (PMBOKProcess, ScrumProcess, PMBOKProcessCustomization, ScrumProcessCustomization)
+CUSTOMIZATION_MODELS = (PMBOKProcessCustomization, ScrumProcessCustomization)
+
+
+def json_size(value):
+    # Tamaño aproximado de la respuesta: JSON compacto, sin escapar UTF-8
+    return len(json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def table_size(model):
+    """Tamaño total de la tabla (datos + TOAST + índices). Solo en PostgreSQL."""
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_total_relation_size(%s)", [model._meta.db_table])
+        return cursor.fetchone()[0]
+
+
+class Command(BaseCommand):
+    help = 'Validates and rewrites the ITTO JSON fields in canonical form, in batches (Idempotent)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Filas leídas y actualizadas por lote.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Solo reporta lo que cambiaría, sin escribir.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        for model in MODELS:
+            size_before = table_size(model)
+            stats = self.canonicalize_model(model, batch_size, dry_run)
+            size_after = table_size(model)
+
+            label = model._meta.label
+            self.stdout.write(
+                f"{label}: {stats['rows']} filas, {stats['changed']} normalizadas, "
+                f"{stats['invalid']} inválidas; JSON {stats['bytes_before']} -> {stats['bytes_after']} bytes"
+            )
+            if size_before is not None:
+                # El espacio liberado se recupera tras VACUUM; aquí solo se reporta.
+                self.stdout.write(f"  tabla: {size_before} -> {size_after} bytes")
+            for pk, error in stats['errors']:
+                self.stdout.write(self.style.WARNING(f"  id={pk}: {error}"))
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING('Dry run: no se escribió ningún cambio.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('ITTOs normalizados correctamente.'))
+
+    def canonicalize_model(self, model, batch_size, dry_run):
+        stats = {'rows': 0, 'changed': 0, 'invalid': 0,
+                 'bytes_before': 0, 'bytes_after': 0, 'errors': []}
+        pending = []
+
+        queryset = model.objects.only('pk', *ITTO_FIELDS).order_by('pk')
+        if model in CUSTOMIZATION_MODELS:
+            queryset = queryset.select_related('process').only(
+                'pk', *ITTO_FIELDS, *(f'process__{field}' for field in ITTO_FIELDS))
+        for obj in queryset.iterator(chunk_size=batch_size):
+            stats['rows'] += 1
+            try:
+                canonical = {field: self.canonical_value(obj, field) for field in ITTO_FIELDS}
+            except ValidationError as exc:
+                stats['invalid'] += 1
+                stats['errors'].append((obj.pk, '; '.join(exc.messages)))
+                continue
+
+            changed = False
+            for field, value in canonical.items():
+                current = getattr(obj, field)
+                stats['bytes_before'] += json_size(current)
+                stats['bytes_after'] += json_size(value)
+                if value != current:
+                    setattr(obj, field, value)
+                    changed = True
+
+            if changed:
+                stats['changed'] += 1
+                pending.append(obj)
+            if len(pending) >= batch_size:
+                self.flush(model, pending, dry_run)
+                pending = []
+
+        self.flush(model, pending, dry_run)
+        return stats
+
+    def canonical_value(self, obj, field):
+        value = getattr(obj, field)
+        if not isinstance(obj, CUSTOMIZATION_MODELS):
+            return canonicalize_itto_list(value, field)
+        # Personalización: lista efectiva normalizada y guardada de nuevo en su forma mínima
+        # respecto a la base (null / diff / lista, ver api/itto.py)
+        base = getattr(obj.process, field)
+        effective = materialize_itto_list(base, canonicalize_stored_itto(value, field))
+        return compact_itto_list(base, canonicalize_itto_list(effective, field))
+
+    def flush(self, model, objs, dry_run):
+        if not objs or dry_run:
+            return
+        # bulk_update no toca `updated_at`: normalizar no es una edición del usuario.
+        with transaction.atomic():
+            model.objects.bulk_update(objs, ITTO_FIELDS, batch_size=len(objs))
+            bump_catalog_version()  # bulk_update no dispara señales: listas cacheadas
@@ -0,0 +1,79 @@
+# backend/api/management/commands/customization_partitions.py
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api import partitioning
+from api.catalog import FRAMEWORKS
+
+ACTIONS = ('status', 'enable', 'disable', 'create', 'detach', 'drop')
+
+
+class Command(BaseCommand):
+    help = 'Manages the per-country partitions of the customization tables (PostgreSQL, see api/partitioning.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=ACTIONS,
+                            help='status: particiones y filas estimadas; enable/disable: convierte las tablas; '
+                                 'create/detach/drop: partición de un país.')
+        parser.add_argument('country', nargs='?', help='Código de país (create, detach y drop).')
+        parser.add_argument('--framework', choices=sorted(FRAMEWORKS), default='all',
+                            help='Solo este framework (por defecto, ambos).')
+        parser.add_argument('--yes', action='store_true',
+                            help='Confirma drop: borra todas las personalizaciones del país.')
+
+    def handle(self, *args, **options):
+        action, country, framework = options['action'], options['country'], options['framework']
+        if action in ('create', 'detach', 'drop') and not country:
+            raise CommandError(f'{action} requiere el código de país.')
+        if action == 'drop' and not options['yes']:
+            raise CommandError('drop borra las personalizaciones del país sin posibilidad de deshacer: '
+                               'confirme con --yes (o use detach para conservarlas).')
+        try:
+            getattr(self, f'handle_{action}')(country, framework)
+        except partitioning.PartitioningError as exc:
+            raise CommandError(str(exc))
+
+    def handle_status(self, country, framework):
+        for table, parts in partitioning.status(framework).items():
+            if parts is None:
+                self.stdout.write(f'{table}: sin particionar')
+                continue
+            self.stdout.write(f'{table}: {len(parts)} particiones')
+            for name, bounds, rows in parts:
+                self.stdout.write(f'  {name} ({bounds}): ~{rows} filas')
+
+    def handle_enable(self, country, framework):
+        for table, countries in partitioning.enable(framework).items():
+            self.stdout.write(f"{table}: particionada ({len(countries)} países: {', '.join(countries) or '-'})")
+        self.stdout.write(self.style.SUCCESS('Particionado activo.'))
+        if not settings.CUSTOMIZATION_PARTITIONING:
+            self.stdout.write(self.style.WARNING(
+                'CUSTOMIZATION_PARTITIONING está desactivado: las consultas no podarán particiones.'))
+
+    def handle_disable(self, country, framework):
+        for table in partitioning.disable(framework):
+            self.stdout.write(f'{table}: tabla plana')
+        self.stdout.write(self.style.SUCCESS('Particionado desactivado.'))
+
+    def handle_create(self, country, framework):
+        for table, moved in partitioning.create(country, framework).items():
+            self.stdout.write(f'{partitioning.partition_name(table, country)}: {moved} filas movidas')
+        self.stdout.write(self.style.SUCCESS(f'Partición de {country.lower()} lista.'))
+
+    def handle_detach(self, country, framework):
+        detached = partitioning.detach(country, framework)
+        for name in detached:
+            self.stdout.write(f'{name}: desacoplada (la tabla se conserva)')
+        self.finish(detached, f'{country.lower()} dado de baja; sus datos quedan archivados.')
+
+    def handle_drop(self, country, framework):
+        dropped = partitioning.drop(country, framework)
+        for name in dropped:
+            self.stdout.write(f'{name}: eliminada')
+        self.finish(dropped, f'{country.lower()} eliminado.')
+
+    def finish(self, changed, message):
+        if changed:
+            self.stdout.write(self.style.SUCCESS(message))
+        else:
+            self.stdout.write(self.style.WARNING('No hay particiones de ese país.'))
@@ -0,0 +1,41 @@
+# backend/api/management/commands/import_customizations.py
+from django.core.management.base import BaseCommand, CommandError
+
+from api.bulk_import import FORMATS, ImportFailed, import_customizations
+
+
+class Command(BaseCommand):
+    help = 'Bulk-imports customizations from a CSV or NDJSON file (see api/bulk_import.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Fichero CSV o NDJSON (UTF-8), una fila por personalización.')
+        parser.add_argument('--format', choices=FORMATS,
+                            help='Por defecto se deduce de la extensión (.csv / .ndjson / .jsonl).')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Valida y cuenta sin escribir (la transacción se revierte).')
+        parser.add_argument('--strict', action='store_true',
+                            help='No importa nada si alguna fila tiene errores.')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or ('csv' if options['path'].lower().endswith('.csv') else 'ndjson')
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                report = import_customizations(stream, fmt, dry_run=options['dry_run'],
+                                               strict=options['strict'])
+        except ImportFailed as exc:
+            report = exc.report
+            self.write_errors(report['errors'])
+            raise CommandError(f"{len(report['errors'])} filas con errores; no se importó nada (--strict).")
+
+        self.write_errors(report['errors'])
+        self.stdout.write(
+            f"{report['rows']} filas: {report['inserted']} creadas, {report['updated']} actualizadas, "
+            f"{len(report['errors'])} con errores.")
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run: no se escribió ningún cambio.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Importación completada.'))
+
+    def write_errors(self, errors):
+        for error in errors:
+            self.stdout.write(self.style.WARNING(f"  línea {error['line']}: {error['error']}"))
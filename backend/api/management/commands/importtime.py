@@ -0,0 +1,87 @@
+# backend/api/management/commands/importtime.py
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Qué importa el intérprete medido: la aplicación tal como la carga gunicorn
+TARGETS = {
+    'app': 'import core.wsgi',
+    'cold': 'import os; os.environ["DJANGO_WARMUP"] = "0"; import core.wsgi',
+}
+
+
+def parse_importtime(stderr):
+    """
+    Líneas de `python -X importtime` -> [(módulo, self_us, cumulative_us, profundidad)].
+    Formato: 'import time:  self [us] | cumulative | imported package'.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def group_by_package(rows):
+    """Tiempo propio (self) agregado por paquete raíz, en ms."""
+    totals = {}
+    for name, self_us, _, _ in rows:
+        package = name.split('.', 1)[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return {package: round(us / 1000, 1)
+            for package, us in sorted(totals.items(), key=lambda item: item[1], reverse=True)}
+
+
+class Command(BaseCommand):
+    help = 'Profiles the cold start of a worker with python -X importtime and reports the heaviest imports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=sorted(TARGETS), default='app',
+                            help='app = core.wsgi con calentamiento (lo que hace --preload); '
+                                 'cold = sin calentamiento (lo que paga cada worker al arrancar).')
+        parser.add_argument('--top', type=int, default=25)
+        parser.add_argument('--output', help='Ruta del JSON de resultados.')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'core.settings'))
+        started = time.perf_counter()
+        # Intérprete nuevo: en este proceso todo está ya importado
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', TARGETS[options['target']]],
+                                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+        wall_ms = round((time.perf_counter() - started) * 1000, 1)
+        if result.returncode != 0:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+
+        rows = parse_importtime(result.stderr)
+        report = {
+            'target': options['target'],
+            'wall_ms': wall_ms,
+            'modules': len(rows),
+            'import_ms': round(sum(row[2] for row in rows if row[3] == 0) / 1000, 1),
+            'by_package_ms': group_by_package(rows),
+            'top_self_ms': [(name, round(self_us / 1000, 2)) for name, self_us, _, _ in
+                            sorted(rows, key=lambda row: row[1], reverse=True)[:options['top']]],
+        }
+
+        self.stdout.write(f"{report['target']}: {report['modules']} módulos, "
+                          f"imports {report['import_ms']}ms, proceso {wall_ms}ms")
+        self.stdout.write('Por paquete (tiempo propio):')
+        for package, ms in list(report['by_package_ms'].items())[:options['top']]:
+            self.stdout.write(f'  {ms:8.1f}ms  {package}')
+        self.stdout.write('Módulos más lentos (tiempo propio):')
+        for name, ms in report['top_self_ms']:
+            self.stdout.write(f'  {ms:8.2f}ms  {name}')
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}"))
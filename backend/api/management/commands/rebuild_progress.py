@@ -0,0 +1,36 @@
+# backend/api/management/commands/rebuild_progress.py
+from django.core.management.base import BaseCommand, CommandError
+
+from api.catalog import FRAMEWORKS
+from api.progress import computed_summary, rebuild, stored_summary
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the per-country progress summary (ProgressSummary) from the customizations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--framework', choices=sorted(FRAMEWORKS),
+                            help='Solo este framework (por defecto, todos).')
+        parser.add_argument('--check', action='store_true',
+                            help='No modifica nada: compara el resumen con las personalizaciones y '
+                                 'termina con error si hay diferencias.')
+
+    def handle(self, *args, **options):
+        frameworks = [options['framework']] if options['framework'] else list(FRAMEWORKS)
+
+        if options['check']:
+            drifted = 0
+            for framework in frameworks:
+                expected, stored = computed_summary(framework), stored_summary(framework)
+                for key in sorted(set(expected) | set(stored)):
+                    if expected[key] != stored[key]:
+                        drifted += 1
+                        self.stdout.write(f'{framework} {key}: resumen={stored[key]} real={expected[key]}')
+            if drifted:
+                raise CommandError(f'{drifted} grupos desalineados; ejecute rebuild_progress.')
+            self.stdout.write(self.style.SUCCESS('Resumen de progreso al día.'))
+            return
+
+        for framework, groups in rebuild(frameworks).items():
+            self.stdout.write(f'{framework}: {groups} grupos')
+        self.stdout.write(self.style.SUCCESS('Resumen de progreso reconstruido.'))
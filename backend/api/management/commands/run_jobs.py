@@ -0,0 +1,79 @@
+# backend/api/management/commands/run_jobs.py
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api import export, jobs
+from core.metrics import mark_worker_dead
+
+
+# Segundos entre limpiezas de las exportaciones caducadas (api/export.py)
+PURGE_INTERVAL = 600
+
+
+class Command(BaseCommand):
+    help = 'Runs queued background jobs (api/jobs.py) until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--burst', action='store_true',
+                            help='Termina cuando la cola queda vacía (CI, cron, pruebas).')
+        parser.add_argument('--max-jobs', type=int, default=0,
+                            help='Termina tras N trabajos (0 = sin límite) para reciclar memoria.')
+        parser.add_argument('--poll-interval', type=float,
+                            default=float(os.getenv('JOBS_POLL_INTERVAL', '2')),
+                            help='Segundos de espera cuando no hay trabajos.')
+        parser.add_argument('--worker-id', default=f'{socket.gethostname()}:{os.getpid()}')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        # SIGTERM (k8s/docker stop): se termina el trabajo en curso y se sale
+        previous = {sig: signal.signal(sig, self.stop) for sig in (signal.SIGTERM, signal.SIGINT)}
+        try:
+            processed = self.work(options)
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+            # Modo multiproceso: fuera sus gauges en vivo; contadores e histogramas se conservan
+            mark_worker_dead(os.getpid())
+        self.stdout.write(f'[run_jobs] {processed} trabajos procesados')
+
+    def work(self, options):
+        processed = 0
+        next_purge = 0
+        self.stdout.write(f"[run_jobs] worker {options['worker_id']} esperando trabajos")
+        while not self.stopping:
+            if time.monotonic() >= next_purge:
+                removed = export.purge_expired()
+                if removed:
+                    self.stdout.write(f'[run_jobs] {removed} exportaciones caducadas borradas')
+                next_purge = time.monotonic() + PURGE_INTERVAL
+            close_old_connections()
+            job = jobs.claim(options['worker_id'])
+            if job is None:
+                if options['burst']:
+                    break
+                self.sleep(options['poll_interval'])
+                continue
+
+            started = time.perf_counter()
+            jobs.run(job)
+            processed += 1
+            self.stdout.write(f'[run_jobs] {job.kind} {job.id}: {job.status} '
+                              f'({job.progress}/{job.total}) en {time.perf_counter() - started:.2f}s')
+            if options['max_jobs'] and processed >= options['max_jobs']:
+                break
+        close_old_connections()
+        return processed
+
+    def stop(self, signum, frame):
+        self.stopping = True
+
+    def sleep(self, seconds):
+        # Pasos cortos para atender la señal de parada sin esperar el intervalo completo
+        deadline = time.monotonic() + seconds
+        while not self.stopping and time.monotonic() < deadline:
+            time.sleep(min(0.5, seconds))
@@ -1,6 +1,8 @@
 # backend/api/management/commands/seed_departments.py
 from django.core.management.base import BaseCommand
 from api.models import Department
+from api.metrics import SEED_ROWS
+from api.progress import rebuild as rebuild_progress
 
 class Command(BaseCommand):
     help = 'Seeds the database with corporate departments and sub-departments'
@@ -71,6 +73,7 @@ class Command(BaseCommand):
             )
             parent_departments[name] = parent_obj
             if created:
+                SEED_ROWS.labels('departments', 'created').inc()
                 self.stdout.write(f'  Created parent department: {name}')
 
         # 2. Crear los subdepartamentos y asignarlos a su padre
@@ -88,7 +91,10 @@ class Command(BaseCommand):
                     }
                 )
                 if created:
+                    SEED_ROWS.labels('departments', 'created').inc()
                     self.stdout.write(f'    Created sub-department: {sub_name} under {parent_name}')
 
 
+        # Las personalizaciones pierden su departamento (SET_NULL): se recalcula el resumen
+        rebuild_progress()
         self.stdout.write(self.style.SUCCESS('Database has been successfully seeded with departments!'))
@@ -1,6 +1,8 @@
 # /webapps/erd-ecosystem/apps/pmbok/backend/api/management/commands/seed_pmbok.py
 from django.core.management.base import BaseCommand
 from api.models import ProcessStatus, ProcessStage, PMBOKProcess
+from api.metrics import SEED_ROWS
+from api.progress import rebuild as rebuild_progress
 
 # --- NUEVA FUNCIÓN ---
 # Helper para convertir string a formato JSON [{name: "...", url: ""}]
@@ -186,5 +188,9 @@ class Command(BaseCommand):
             else:
                 count_updated += 1
 
+        SEED_ROWS.labels('pmbok', 'created').inc(count_created)
+        SEED_ROWS.labels('pmbok', 'updated').inc(count_updated)
+        # Un proceso puede cambiar de etapa: el resumen de progreso se recalcula
+        rebuild_progress(['pmbok'])
         self.stdout.write(self.style.SUCCESS(
             f'Seeding complete! Created: {count_created}, Updated: {count_updated}.'))
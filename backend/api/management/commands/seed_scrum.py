@@ -1,6 +1,8 @@
 # backend/api/management/commands/seed_scrum.py
 from django.core.management.base import BaseCommand
 from api.models import ProcessStatus, ScrumPhase, ScrumProcess
+from api.metrics import SEED_ROWS
+from api.progress import rebuild as rebuild_progress
 
 # --- NUEVA FUNCIÓN ---
 # Helper para convertir string a formato JSON [{name: "...", url: ""}]
@@ -11,12 +13,11 @@ def to_json_list(text_block):
     return [{"name": item.strip(), "url": ""} for item in text_block.split('\n') if item.strip()]
 
 class Command(BaseCommand):
-    help = 'Seeds the database with the 27 Scrum processes with full details'
+    help = 'Seeds the database with the 27 Scrum processes with full details (Idempotent)'
 
     def handle(self, *args, **options):
-        self.stdout.write('Deleting existing Scrum data...')
-        ScrumProcess.objects.all().delete()
-        ScrumPhase.objects.all().delete()
+        # Sin borrado previo: eliminar los procesos borraba en cascada las personalizaciones
+        # de todos los países, y `startup` vuelve a ejecutar el seed cuando cambia
 
         # --- ESTATUS CONCEPTUALES PARA EL FLUJO DE TRABAJO SCRUM (SIN EMOJIS) ---
         status_fase0, _ = ProcessStatus.objects.get_or_create(
@@ -90,17 +91,31 @@ class Command(BaseCommand):
             (27, "Retrospectiva de lanzamientos del programa o portafolio", "Portfolio Product Owner*\nPortfolio Scrum Master*\nProgram Product Owner*\nProgram Scrum Master*\nStakeholders\nRecomendaciones del Scrum Guidance Body", "Reunión de retrospectiva del programa o portafolio*\nExperiencia del Scrum Guidance Body", "Agreed Actionable Improvements*\nAssigned Action Items y fechas límite*\nMejoramientos recomendados del Scrum Guidance Body", phase_empresa, status_escalado),
         ]
 
-        self.stdout.write('Seeding all 27 Scrum processes with full details...')
+        self.stdout.write('Upserting all 27 Scrum processes (Non-destructive)...')
+        count_created = 0
+        count_updated = 0
         for num, name, inputs, tools, outputs, phase_obj, status_obj in scrum_processes_data:
-            ScrumProcess.objects.create(
+            _, created = ScrumProcess.objects.update_or_create(
                 process_number=num,
-                name=name,
-                inputs=to_json_list(inputs),
-                tools_and_techniques=to_json_list(tools),
-                outputs=to_json_list(outputs),
-                phase=phase_obj,
-                status=status_obj,
-                kanban_status='unassigned',
+                defaults={
+                    'name': name,
+                    'inputs': to_json_list(inputs),
+                    'tools_and_techniques': to_json_list(tools),
+                    'outputs': to_json_list(outputs),
+                    'phase': phase_obj,
+                    'status': status_obj,
+                    # Sin 'kanban_status': se conserva el estado que haya puesto el usuario
+                },
+                create_defaults={'kanban_status': 'unassigned'},
             )
-        
-        self.stdout.write(self.style.SUCCESS('Database has been seeded successfully with full Scrum details!'))
+            if created:
+                count_created += 1
+            else:
+                count_updated += 1
+
+        SEED_ROWS.labels('scrum', 'created').inc(count_created)
+        SEED_ROWS.labels('scrum', 'updated').inc(count_updated)
+        # Un proceso puede cambiar de fase: el resumen de progreso se recalcula
+        rebuild_progress(['scrum'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Scrum seeding complete! Created: {count_created}, Updated: {count_updated}.'))
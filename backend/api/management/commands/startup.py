@@ -0,0 +1,122 @@
+# backend/api/management/commands/startup.py
+import time
+from contextlib import ExitStack
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.db.utils import OperationalError
+
+from api.models import Department, PMBOKProcess, ScrumProcess, StartupState
+from api.startup import (
+    PhaseTimer, advisory_lock, migration_plan, seed_digest, static_source_digest
+)
+
+# (comando de seed, modelo que debe tener filas)
+SEEDS = (
+    ('seed_pmbok', PMBOKProcess),
+    ('seed_scrum', ScrumProcess),
+    ('seed_departments', Department),
+)
+STATIC_DIGEST_FILE = '.source-digest'
+
+
+class Command(BaseCommand):
+    help = ('Container startup: waits for the DB, then migrates, collects static files and seeds '
+            'only when something changed, under a Postgres advisory lock; reports per-phase timings')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skip-migrations', action='store_true')
+        parser.add_argument('--skip-collectstatic', action='store_true')
+        parser.add_argument('--seed', choices=('auto', 'always', 'skip'), default='auto',
+                            help='auto = solo si cambió el seed o la tabla está vacía.')
+        parser.add_argument('--db-timeout', type=int, default=30, help='Segundos esperando a la BD.')
+        parser.add_argument('--lock-timeout', type=int, default=300,
+                            help='Segundos esperando a que otra réplica termine de migrar/sembrar.')
+        parser.add_argument('--migrate-retries', type=int, default=5)
+
+    def handle(self, *args, **options):
+        timer = PhaseTimer()
+        try:
+            self.run_phases(timer, options)
+        finally:
+            self.log(timer.summary())
+
+    def log(self, message):
+        self.stdout.write(f'[startup] {message}')
+
+    def run_phases(self, timer, options):
+        with timer.phase('wait-db'):
+            self.wait_for_db(options['db_timeout'])
+
+        # STATIC_ROOT vive en el contenedor: no necesita el lock compartido
+        with timer.phase('collectstatic') as phase:
+            phase['outcome'] = 'skipped' if options['skip_collectstatic'] else self.collectstatic()
+
+        with ExitStack() as held:
+            with timer.phase('lock') as phase:
+                waited = held.enter_context(advisory_lock(
+                    timeout=options['lock_timeout'],
+                    on_wait=lambda seconds: self.log(f'esperando a otra réplica ({seconds:.0f}s)…'),
+                ))
+                phase['outcome'] = f'waited {waited:.1f}s' if waited >= 0.05 else 'acquired'
+            with timer.phase('migrate') as phase:
+                phase['outcome'] = 'skipped' if options['skip_migrations'] else self.migrate(
+                    options['migrate_retries'])
+            with timer.phase('seed') as phase:
+                phase['outcome'] = 'skipped' if options['seed'] == 'skip' else self.seed(
+                    force=options['seed'] == 'always')
+
+    def wait_for_db(self, timeout):
+        started = time.monotonic()
+        while True:
+            try:
+                connection.ensure_connection()
+                return
+            except OperationalError:
+                if time.monotonic() - started > timeout:
+                    raise CommandError(f'La base de datos no respondió en {timeout}s')
+                time.sleep(1)
+
+    def collectstatic(self):
+        digest = static_source_digest()
+        stamp = Path(settings.STATIC_ROOT) / STATIC_DIGEST_FILE
+        if stamp.exists() and stamp.read_text().strip() == digest:
+            return 'up to date'
+        call_command('collectstatic', interactive=False, verbosity=0)
+        stamp.write_text(digest)
+        return 'collected'
+
+    def migrate(self, retries):
+        plan = migration_plan()
+        if not plan:
+            return 'up to date'
+        self.log(f'{len(plan)} migraciones pendientes')
+        for attempt in range(1, retries + 1):
+            try:
+                call_command('migrate', interactive=False, verbosity=1, stdout=self.stdout)
+                return f'{len(plan)} applied'
+            except OperationalError:
+                if attempt == retries:
+                    raise
+                self.log(f'migraciones fallaron; reintento {attempt + 1}/{retries} en 5s…')
+                time.sleep(5)
+
+    def seed(self, force):
+        try:
+            stored = dict(StartupState.objects.values_list('key', 'digest'))
+        except DatabaseError:  # sin migrar (--skip-migrations): se decide por filas
+            stored = {}
+        ran = []
+        for command_name, model in SEEDS:
+            key = f'seed:{command_name}'
+            digest = seed_digest(command_name)
+            if not force and stored.get(key) == digest and model.objects.exists():
+                continue
+            call_command(command_name, stdout=StringIO())
+            StartupState.objects.update_or_create(key=key, defaults={'digest': digest})
+            ran.append(command_name)
+        return ', '.join(ran) if ran else 'up to date'
@@ -0,0 +1,140 @@
+# backend/api/metrics.py
+"""
+Métricas de negocio para Prometheus (además de las HTTP/DB de django_prometheus).
+
+Diseño de etiquetas: solo valores acotados (framework, operación, estado Kanban,
+nivel país/departamento). El país NUNCA es una etiqueta: el inventario por país se
+resume en agregados (total, países activos, máximo por país) para que el scrape de
+/prometheus/ no crezca con el número de países.
+"""
+import logging
+import threading
+
+from django.db import connection
+from django.db.models import Count
+from prometheus_client import Counter, Gauge, Histogram
+
+from .models import KANBAN_STATUS_CHOICES
+
+logger = logging.getLogger(__name__)
+
+ROW_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+BYTE_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7)
+
+BULK_ROWS = Histogram(
+    'pmbok_bulk_operation_rows', 'Filas escritas por operación masiva.',
+    ['framework', 'operation'], buckets=ROW_BUCKETS)
+CUSTOMIZATION_WRITES = Counter(
+    'pmbok_customization_writes', 'Personalizaciones guardadas vía API.',
+    ['framework', 'result'])
+KANBAN_TRANSITIONS = Counter(
+    'pmbok_kanban_transitions', 'Transiciones Kanban por estado origen/destino.',
+    ['framework', 'from_status', 'to_status'])
+PROCESS_LIST_BYTES = Histogram(
+    'pmbok_process_list_response_bytes', 'Tamaño de las respuestas de listado de procesos.',
+    ['framework'], buckets=BYTE_BUCKETS)
+CACHE_REQUESTS = Counter(
+    'pmbok_catalog_cache_requests', 'Accesos a la caché del catálogo.',
+    ['namespace', 'result'])
+SINGLE_FLIGHT_WAIT = Histogram(
+    'pmbok_single_flight_wait_seconds', 'Espera de las peticiones agrupadas tras un cálculo ajeno (api/singleflight.py).',
+    ['namespace'], buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+SEED_ROWS = Counter(
+    'pmbok_seed_rows_written', 'Filas escritas por los comandos de seed.',
+    ['seed', 'result'])
+JOB_RUNS = Counter(
+    'pmbok_jobs_finished', 'Trabajos de la cola terminados.',
+    ['kind', 'status'])
+EXPORT_ROWS = Counter(
+    'pmbok_export_rows', 'Filas exportadas (api/export.py).',
+    ['format'])
+# Inventario: lo calculan los workers y, en modo multiproceso, el scrape del master lee el
+# valor más reciente de los workers vivos (ver refresh_inventory)
+CUSTOMIZATIONS = Gauge(
+    'pmbok_customizations', 'Personalizaciones existentes.',
+    ['framework', 'level'], multiprocess_mode='livemostrecent')
+CUSTOMIZATION_COUNTRIES = Gauge(
+    'pmbok_customization_countries', 'Países con al menos una personalización.',
+    ['framework'], multiprocess_mode='livemostrecent')
+CUSTOMIZATIONS_PER_COUNTRY_MAX = Gauge(
+    'pmbok_customizations_per_country_max', 'Máximo de personalizaciones en un país.',
+    ['framework'], multiprocess_mode='livemostrecent')
+JOB_DURATION = Histogram(
+    'pmbok_job_duration_seconds', 'Duración de los trabajos de la cola.',
+    ['kind'], buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 900))
+
+
+KANBAN_STATUSES = frozenset(value for value, _ in KANBAN_STATUS_CHOICES)
+
+
+def _status_label(value):
+    # Etiquetas acotadas: un estado fuera de KANBAN_STATUS_CHOICES (la columna no lo impide)
+    # se cuenta como 'other' en lugar de crear una serie nueva
+    return value if value in KANBAN_STATUSES else 'other'
+
+
+def record_kanban_transitions(framework, counts_by_status, new_status):
+    """`counts_by_status`: {estado_anterior: filas} tal como estaban antes del update."""
+    for old_status, count in counts_by_status.items():
+        if count and old_status != new_status:
+            KANBAN_TRANSITIONS.labels(framework, _status_label(old_status), _status_label(new_status)).inc(count)
+
+
+def compute_inventory():
+    from .catalog import FRAMEWORKS
+
+    inventory = {}
+    for framework, (_, customization_model) in FRAMEWORKS.items():
+        rows = customization_model.objects.values(
+            'country_code', 'department_id').annotate(n=Count('id')).order_by()
+        per_country = {}
+        by_level = {'country': 0, 'department': 0}
+        for row in rows:
+            level = 'country' if row['department_id'] is None else 'department'
+            by_level[level] += row['n']
+            code = row['country_code'].lower()
+            per_country[code] = per_country.get(code, 0) + row['n']
+        inventory[framework] = {
+            'by_level': by_level,
+            'countries': len(per_country),
+            'max_per_country': max(per_country.values(), default=0),
+        }
+    return inventory
+
+
+def refresh_inventory():
+    """
+    Recalcula el inventario de personalizaciones (memoizado por versión del catálogo: si
+    nada cambió solo se lee la versión) y lo publica en los gauges. Solo en procesos que
+    atienden peticiones: nunca en el master de gunicorn, donde un candado de la caché o una
+    conexión abierta pasarían a los workers en el fork.
+    """
+    from .catalog import memoize  # evita importar modelos al cargar el módulo
+
+    try:
+        inventory = memoize(('metrics-inventory',), compute_inventory)
+    except Exception:
+        return  # Sin DB (arranque, migraciones): el resto de métricas sigue disponible
+    for framework, data in inventory.items():
+        for level, count in data['by_level'].items():
+            CUSTOMIZATIONS.labels(framework, level).set(count)
+        CUSTOMIZATION_COUNTRIES.labels(framework).set(data['countries'])
+        CUSTOMIZATIONS_PER_COUNTRY_MAX.labels(framework).set(data['max_per_country'])
+
+
+def start_inventory_refresh(interval):
+    """Hilo del worker (post_worker_init en core/gunicorn_conf.py) que refresca el inventario."""
+    def loop():
+        while True:
+            try:
+                refresh_inventory()
+            except Exception:  # noqa: BLE001 - una métrica nunca debe tumbar el worker
+                logger.exception('No se pudo refrescar el inventario de métricas')
+            finally:
+                connection.close()  # la conexión propia del hilo
+            if stop.wait(interval):
+                return
+
+    stop = threading.Event()
+    threading.Thread(target=loop, name='metrics-inventory', daemon=True).start()
+    return stop
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_catalog_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StartupState',
+            fields=[
+                ('key', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('digest', models.CharField(max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
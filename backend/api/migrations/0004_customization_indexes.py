@@ -0,0 +1,49 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:14
+
+import django.db.models.deletion
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_startup_state'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pmbokprocesscustomization',
+            name='process',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='customizations', to='api.pmbokprocess'),
+        ),
+        migrations.AlterField(
+            model_name='scrumprocesscustomization',
+            name='process',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='customizations', to='api.scrumprocess'),
+        ),
+        migrations.AddIndex(
+            model_name='pmbokprocesscustomization',
+            index=models.Index(fields=['process', '-updated_at'], name='pmbok_cust_proc_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pmbokprocesscustomization',
+            index=models.Index(django.db.models.functions.text.Upper('country_code'), models.F('kanban_status'), models.F('process'), name='pmbok_cust_country_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pmbokprocesscustomization',
+            index=models.Index(django.db.models.functions.text.Upper('country_code'), models.F('process'), condition=models.Q(('department__isnull', True)), name='pmbok_cust_country_lvl_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scrumprocesscustomization',
+            index=models.Index(fields=['process', '-updated_at'], name='scrum_cust_proc_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scrumprocesscustomization',
+            index=models.Index(django.db.models.functions.text.Upper('country_code'), models.F('kanban_status'), models.F('process'), name='scrum_cust_country_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scrumprocesscustomization',
+            index=models.Index(django.db.models.functions.text.Upper('country_code'), models.F('process'), condition=models.Q(('department__isnull', True)), name='scrum_cust_country_lvl_idx'),
+        ),
+    ]
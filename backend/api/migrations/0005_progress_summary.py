@@ -0,0 +1,54 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:17
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# Copia de api.progress: las migraciones no importan código de la app
+FRAMEWORKS = {
+    'pmbok': ('PMBOKProcessCustomization', 'stage'),
+    'scrum': ('ScrumProcessCustomization', 'phase'),
+}
+
+
+def build_progress_summary(apps, schema_editor):
+    ProgressSummary = apps.get_model('api', 'ProgressSummary')
+    for framework, (model_name, area_field) in FRAMEWORKS.items():
+        customization_model = apps.get_model('api', model_name)
+        counts = {}
+        rows = customization_model.objects.order_by().values_list(
+            'country_code', 'department_id', f'process__{area_field}_id', 'kanban_status',
+        ).annotate(n=Count('id'))
+        for country_code, department_id, area_id, kanban_status, n in rows:
+            key = (country_code.lower(), department_id or 0, area_id or 0, kanban_status)
+            counts[key] = counts.get(key, 0) + n
+        ProgressSummary.objects.bulk_create([
+            ProgressSummary(framework=framework, country_code=country_code, department_key=department_key,
+                            area_key=area_key, kanban_status=kanban_status, count=n)
+            for (country_code, department_key, area_key, kanban_status), n in counts.items()
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_customization_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgressSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('framework', models.CharField(max_length=10)),
+                ('country_code', models.CharField(help_text='En minúsculas.', max_length=2)),
+                ('department_key', models.IntegerField(default=0, help_text='ID del departamento; 0 = nivel país.')),
+                ('area_key', models.IntegerField(default=0, help_text='ID de la etapa (PMBOK) o fase (Scrum) del proceso; 0 = sin asignar.')),
+                ('kanban_status', models.CharField(choices=[('unassigned', 'No Asignado'), ('backlog', 'Pendiente'), ('todo', 'Por Hacer'), ('in_progress', 'En Progreso'), ('in_review', 'En Revisión'), ('done', 'Hecho')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('framework', 'country_code', 'department_key', 'area_key', 'kanban_status'), name='progress_summary_group_uniq')],
+            },
+        ),
+        migrations.RunPython(build_progress_summary, migrations.RunPython.noop),
+    ]
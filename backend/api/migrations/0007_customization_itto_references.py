@@ -0,0 +1,100 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:29
+
+from django.db import migrations, models
+
+# Copias de api.itto: las migraciones no importan código de la app
+ITTO_FIELDS = ('inputs', 'tools_and_techniques', 'outputs')
+CUSTOMIZATION_MODELS = ('PMBOKProcessCustomization', 'ScrumProcessCustomization')
+
+
+def materialize(base, stored):
+    if stored is None:
+        return base
+    if isinstance(stored, dict):
+        removed = stored.get('remove', [])
+        return [item for item in base if item not in removed] + stored.get('add', [])
+    return stored
+
+
+def compact(base, items):
+    # None o diff siempre que reproduzcan la lista (siguen heredando los cambios de la
+    # base); lista completa solo si un diff no la expresa (reordenaciones)
+    if items == base:
+        return None
+    diff = {'add': [item for item in items if item not in base],
+            'remove': [item for item in base if item not in items]}
+    if materialize(base, diff) == items:
+        return diff
+    return items
+
+
+def _convert(apps, transform):
+    for model_name in CUSTOMIZATION_MODELS:
+        model = apps.get_model('api', model_name)
+        rows = model.objects.select_related('process').only(
+            'id', *ITTO_FIELDS, *(f'process__{field}' for field in ITTO_FIELDS)).order_by('id')
+        changed = []
+        for customization in rows.iterator(chunk_size=2000):
+            dirty = False
+            for field in ITTO_FIELDS:
+                value = transform(getattr(customization.process, field) or [], getattr(customization, field))
+                if value != getattr(customization, field):
+                    setattr(customization, field, value)
+                    dirty = True
+            if dirty:
+                changed.append(customization)
+            if len(changed) >= 1000:
+                model.objects.bulk_update(changed, ITTO_FIELDS)
+                changed = []
+        if changed:
+            model.objects.bulk_update(changed, ITTO_FIELDS)
+
+
+def to_references(apps, schema_editor):
+    # Las copias idénticas a la base pasan a NULL (hereda); las parecidas, a diff
+    _convert(apps, lambda base, stored: compact(base, stored) if isinstance(stored, list) else stored)
+
+
+def to_full_lists(apps, schema_editor):
+    _convert(apps, materialize)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_job_queue'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pmbokprocesscustomization',
+            name='inputs',
+            field=models.JSONField(blank=True, default=None, null=True),
+        ),
+        migrations.AlterField(
+            model_name='pmbokprocesscustomization',
+            name='outputs',
+            field=models.JSONField(blank=True, default=None, null=True),
+        ),
+        migrations.AlterField(
+            model_name='pmbokprocesscustomization',
+            name='tools_and_techniques',
+            field=models.JSONField(blank=True, default=None, null=True),
+        ),
+        migrations.AlterField(
+            model_name='scrumprocesscustomization',
+            name='inputs',
+            field=models.JSONField(blank=True, default=None, null=True),
+        ),
+        migrations.AlterField(
+            model_name='scrumprocesscustomization',
+            name='outputs',
+            field=models.JSONField(blank=True, default=None, null=True),
+        ),
+        migrations.AlterField(
+            model_name='scrumprocesscustomization',
+            name='tools_and_techniques',
+            field=models.JSONField(blank=True, default=None, null=True),
+        ),
+        migrations.RunPython(to_references, to_full_lists),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+TIME_INDEX = 'kanban_transition_at_idx'
+
+
+def create_time_index(apps, schema_editor):
+    # BRIN en PostgreSQL: la tabla solo crece y en orden de `changed_at`, así que un resumen
+    # por rango de páginas basta para filtrar por ventana de tiempo. Django no lo
+    # declara en Meta sin django.contrib.postgres y SQLite no lo admite: B-tree ahí.
+    method = 'USING brin ' if schema_editor.connection.vendor == 'postgresql' else ''
+    schema_editor.execute(f'CREATE INDEX {TIME_INDEX} ON api_kanbantransition {method}(changed_at)')
+
+
+def drop_time_index(apps, schema_editor):
+    schema_editor.execute(f'DROP INDEX {TIME_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_customization_itto_references'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KanbanTransition',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('framework', models.PositiveSmallIntegerField(choices=[(1, 'pmbok'), (2, 'scrum')])),
+                ('process_key', models.IntegerField(help_text='ID del proceso base.')),
+                ('item_key', models.IntegerField(default=0, help_text='ID de la personalización; 0 = proceso base.')),
+                ('country_code', models.CharField(blank=True, help_text='En minúsculas; vacío = proceso base.', max_length=2)),
+                ('department_key', models.IntegerField(default=0, help_text='ID del departamento; 0 = nivel país.')),
+                ('area_key', models.IntegerField(default=0, help_text='Etapa (PMBOK) o fase (Scrum) del proceso al cambiar; 0 = sin asignar.')),
+                ('from_status', models.PositiveSmallIntegerField(choices=[(0, 'No Asignado'), (1, 'Pendiente'), (2, 'Por Hacer'), (3, 'En Progreso'), (4, 'En Revisión'), (5, 'Hecho')])),
+                ('to_status', models.PositiveSmallIntegerField(choices=[(0, 'No Asignado'), (1, 'Pendiente'), (2, 'Por Hacer'), (3, 'En Progreso'), (4, 'En Revisión'), (5, 'Hecho')])),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['framework', 'item_key', 'process_key', 'changed_at'], name='kanban_transition_item_idx')],
+            },
+        ),
+        migrations.RunPython(create_time_index, drop_time_index),
+    ]
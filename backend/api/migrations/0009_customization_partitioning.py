@@ -0,0 +1,108 @@
+import itertools
+import re
+
+from django.conf import settings
+from django.db import migrations
+
+# Nombres fijos: la conversión trabaja sobre las tablas, no sobre el estado de los modelos
+TABLES = ['api_pmbokprocesscustomization', 'api_scrumprocesscustomization']
+
+# Copia de api.partitioning: las migraciones no importan código de la app
+COUNTRY_CODE = re.compile(r'^[a-z0-9]{1,2}$')
+DEFAULT_SUFFIX = 'default'
+CONSTRAINT_TYPES = ('p', 'u', 'f', 'c')
+
+
+def case_variants(country_code):
+    return sorted({''.join(chars) for chars in itertools.product(*({c, c.upper()} for c in country_code.lower()))})
+
+
+def is_partitioned(cursor, table):
+    cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)', [table])
+    return cursor.fetchone() is not None
+
+
+def definitions(cursor, table):
+    cursor.execute(
+        'SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint '
+        'WHERE conrelid = to_regclass(%s) AND contype::text = ANY(%s) ORDER BY contype DESC, conname',
+        [table, list(CONSTRAINT_TYPES)])
+    constraints = cursor.fetchall()
+    cursor.execute(
+        'SELECT i.relname, pg_get_indexdef(i.oid) FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid '
+        'WHERE x.indrelid = to_regclass(%s) ORDER BY i.relname', [table])
+    owned = {name for name, _, _ in constraints}
+    indexes = [(name, sql) for name, sql in cursor.fetchall() if name not in owned]
+    return constraints, indexes
+
+
+def rebuild_table(cursor, qn, table, partitioned):
+    constraints, indexes = definitions(cursor, table)
+    cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [table, 'id'])
+    cursor.execute(f'SELECT last_value FROM {cursor.fetchone()[0]}')
+    last_id = cursor.fetchone()[0]
+    cursor.execute(f'SELECT DISTINCT LOWER(country_code) FROM {qn(table)}')
+    countries = sorted(row[0] for row in cursor.fetchall() if COUNTRY_CODE.match(row[0]))
+
+    old = f'{table}_old'
+    cursor.execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(old)}')
+    suffix = ' PARTITION BY LIST (country_code)' if partitioned else ''
+    cursor.execute(f'CREATE TABLE {qn(table)} (LIKE {qn(old)}){suffix}')
+    if partitioned:
+        cursor.execute(f'CREATE TABLE {qn(f"{table}_{DEFAULT_SUFFIX}")} PARTITION OF {qn(table)} DEFAULT')
+        for country_code in countries:
+            values = case_variants(country_code)
+            cursor.execute(
+                f'CREATE TABLE {qn(f"{table}_{country_code}")} PARTITION OF {qn(table)} '
+                f"FOR VALUES IN ({', '.join(['%s'] * len(values))})", values)
+    cursor.execute(f'INSERT INTO {qn(table)} SELECT * FROM {qn(old)}')
+    cursor.execute(f'DROP TABLE {qn(old)} CASCADE')
+
+    if partitioned:
+        sequence = f'{table}_id_seq'
+        cursor.execute(f'CREATE SEQUENCE {qn(sequence)} OWNED BY {qn(table)}.id')
+        cursor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+    else:
+        cursor.execute(f'ALTER TABLE {qn(table)} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY')
+    cursor.execute('SELECT setval(pg_get_serial_sequence(%s, %s), %s)', [table, 'id', last_id])
+
+    for name, kind, definition in constraints:
+        if kind == 'p':
+            definition = 'PRIMARY KEY (id, country_code)' if partitioned else 'PRIMARY KEY (id)'
+        cursor.execute(f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}')
+    for _, sql in indexes:
+        cursor.execute(sql)
+    cursor.execute(f'ANALYZE {qn(table)}')
+
+
+def partition(apps, schema_editor):
+    # Opcional: sin CUSTOMIZATION_PARTITIONING (o fuera de PostgreSQL) no hace nada, y se
+    # puede activar más tarde con `manage.py customization_partitions enable`
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql' or not settings.CUSTOMIZATION_PARTITIONING:
+        return
+    with connection.cursor() as cursor:
+        for table in TABLES:
+            if not is_partitioned(cursor, table):
+                rebuild_table(cursor, connection.ops.quote_name, table, partitioned=True)
+
+
+def unpartition(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for table in TABLES:
+            if is_partitioned(cursor, table):
+                rebuild_table(cursor, connection.ops.quote_name, table, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_kanban_transitions'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, unpartition),
+    ]
@@ -0,0 +1,26 @@
+from importlib import import_module
+
+from django.db import migrations
+
+# Mismas copias de api.itto que 0007, ya con la regla actual: diff siempre que reproduzca
+# la lista, lista completa solo para reordenaciones
+references = import_module('api.migrations.0007_customization_itto_references')
+
+
+def recompact(apps, schema_editor):
+    # Las bases que ya aplicaron 0007 con la regla de tamaño guardaron listas completas
+    # que un diff expresa: pasan a diff para seguir heredando los cambios de la base
+    references._convert(
+        apps, lambda base, stored: references.compact(base, stored) if isinstance(stored, list) else stored)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_customization_partitioning'),
+    ]
+
+    operations = [
+        # Sin vuelta atrás necesaria: diff y lista completa dan la misma lista efectiva
+        migrations.RunPython(recompact, migrations.RunPython.noop),
+    ]
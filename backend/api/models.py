@@ -1,7 +1,14 @@
 # backend/api/models.py
+import uuid
+
+from django.conf import settings
 from django.db import models
+from django.db.models.functions import Upper
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 
+from .itto import clean_itto_fields
+
 # --- Manager para el Modelo de Usuario Personalizado ---
 class CustomUserManager(BaseUserManager):
     """
@@ -154,6 +161,10 @@ class PMBOKProcess(models.Model):
     def __str__(self):
         return f"{self.process_number}. {self.name}"
 
+    def clean(self):
+        # Valida y normaliza los ITTOs (ver api/itto.py)
+        clean_itto_fields(self)
+
 # --- Modelo ScrumProcess ---
 class ScrumProcess(models.Model):
     process_number = models.IntegerField(unique=True)
@@ -183,20 +194,46 @@ class ScrumProcess(models.Model):
     def __str__(self):
         return f"{self.process_number}. {self.name}"
 
+    def clean(self):
+        # Valida y normaliza los ITTOs (ver api/itto.py)
+        clean_itto_fields(self)
+
 # ===== MODELOS DE PERSONALIZACIÓN (MODIFICADOS) =====
+def customization_indexes(prefix):
+    """
+    Índices para los accesos frecuentes a las personalizaciones (iguales en ambos frameworks):
+      * proceso + más reciente: prefetch `customizations` de los listados (filtra por
+        process_id IN y ordena por -updated_at dentro de cada proceso sin ordenar aparte)
+        y `bulk_update_kanban_status` (process_id IN).
+      * país + estado Kanban: vistas por país (`country_code__iexact` -> UPPER(...)) con
+        el proceso incluido para resolver recuentos sin leer la tabla.
+      * país, solo nivel país (parcial, department IS NULL): resolución de ITTOs efectivos
+        sin departamento (api/effective.py).
+    """
+    return [
+        models.Index(fields=['process', '-updated_at'], name=f'{prefix}_cust_proc_recent_idx'),
+        models.Index(Upper('country_code'), 'kanban_status', 'process',
+                     name=f'{prefix}_cust_country_status_idx'),
+        models.Index(Upper('country_code'), 'process', name=f'{prefix}_cust_country_lvl_idx',
+                     condition=models.Q(department__isnull=True)),
+    ]
+
+
 class PMBOKProcessCustomization(models.Model):
     """
     Almacena los ITTOs personalizados para un proceso PMBOK específico y un país.
     """
+    # Sin índice propio: lo cubren unique_together y pmbok_cust_proc_recent_idx (process primero)
     process = models.ForeignKey(
-        PMBOKProcess, on_delete=models.CASCADE, related_name="customizations")
+        PMBOKProcess, on_delete=models.CASCADE, related_name="customizations", db_index=False)
     country_code = models.CharField(
         max_length=2, help_text="Código de 2 letras del país (ej: CO, US).")
 
-    # Campos que se pueden personalizar
-    inputs = models.JSONField(default=list, blank=True)
-    tools_and_techniques = models.JSONField(default=list, blank=True)
-    outputs = models.JSONField(default=list, blank=True)
+    # Campos que se pueden personalizar. Se guardan respecto a los ITTOs del proceso base:
+    # null = hereda, {'add', 'remove'} = diff, lista = propia (ver api/itto.py).
+    inputs = models.JSONField(null=True, blank=True, default=None)
+    tools_and_techniques = models.JSONField(null=True, blank=True, default=None)
+    outputs = models.JSONField(null=True, blank=True, default=None)
 
     # ===== INICIO: CAMBIO - AÑADIR RELACIÓN CON DEPARTAMENTO =====
     department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True, blank=True, related_name="pmbok_customizations")
@@ -216,24 +253,31 @@ class PMBOKProcessCustomization(models.Model):
         # Asegura que solo haya una personalización por proceso y país.
         unique_together = ('process', 'country_code', 'department')
         ordering = ['-updated_at']
+        indexes = customization_indexes('pmbok')
 
     def __str__(self):
         return f"PMBOK Customization for {self.process.name} in {self.country_code.upper()}"
 
+    def clean(self):
+        # Valida y normaliza los ITTOs (ver api/itto.py)
+        clean_itto_fields(self, stored=True)
+
 
 class ScrumProcessCustomization(models.Model):
     """
     Almacena los ITTOs personalizados para un proceso Scrum específico y un país.
     """
+    # Sin índice propio: lo cubren unique_together y scrum_cust_proc_recent_idx (process primero)
     process = models.ForeignKey(
-        ScrumProcess, on_delete=models.CASCADE, related_name="customizations")
+        ScrumProcess, on_delete=models.CASCADE, related_name="customizations", db_index=False)
     country_code = models.CharField(
         max_length=2, help_text="Código de 2 letras del país (ej: CO, US).")
 
-    # Campos que se pueden personalizar
-    inputs = models.JSONField(default=list, blank=True)
-    tools_and_techniques = models.JSONField(default=list, blank=True)
-    outputs = models.JSONField(default=list, blank=True)
+    # Campos que se pueden personalizar. Se guardan respecto a los ITTOs del proceso base:
+    # null = hereda, {'add', 'remove'} = diff, lista = propia (ver api/itto.py).
+    inputs = models.JSONField(null=True, blank=True, default=None)
+    tools_and_techniques = models.JSONField(null=True, blank=True, default=None)
+    outputs = models.JSONField(null=True, blank=True, default=None)
     
     # ===== INICIO: CAMBIO - AÑADIR RELACIÓN CON DEPARTAMENTO =====
     department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True, blank=True, related_name="scrum_customizations")
@@ -253,10 +297,171 @@ class ScrumProcessCustomization(models.Model):
         # Asegura que solo haya una personalización por proceso y país.
         unique_together = ('process', 'country_code', 'department')
         ordering = ['-updated_at']
+        indexes = customization_indexes('scrum')
 
     def __str__(self):
         return f"Scrum Customization for {self.process.name} in {self.country_code.upper()}"
 
+    def clean(self):
+        # Valida y normaliza los ITTOs (ver api/itto.py)
+        clean_itto_fields(self, stored=True)
+
+# ===== INICIO: VERSIÓN DEL CATÁLOGO (INVALIDACIÓN DE CACHÉS) =====
+class CatalogVersion(models.Model):
+    """
+    Contador global (fila única) que se incrementa con cada escritura sobre procesos,
+    personalizaciones o departamentos. Las cachés derivadas del catálogo incluyen
+    este número en su clave, así que un cambio en cualquier worker las invalida todas.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Catalog v{self.version}"
+# ===== FIN: VERSIÓN DEL CATÁLOGO =====
+
+
+# ===== INICIO: ESTADO DEL ARRANQUE (ver api/startup.py) =====
+class StartupState(models.Model):
+    """
+    Huellas (hashes) del último trabajo de arranque aplicado sobre esta base de datos
+    (p. ej. el contenido de cada seed), para que los pods siguientes lo omitan.
+    """
+    key = models.CharField(max_length=100, primary_key=True)
+    digest = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key}: {self.digest[:12]}"
+# ===== FIN: ESTADO DEL ARRANQUE =====
+
+
+# ===== INICIO: RESUMEN DE PROGRESO POR PAÍS (ver api/progress.py) =====
+class ProgressSummary(models.Model):
+    """
+    Recuento desnormalizado de personalizaciones por (framework, país, departamento,
+    etapa/fase, estado Kanban). Lo mantienen las escrituras de la API de forma incremental
+    y se puede reconstruir con `manage.py rebuild_progress`.
+    """
+    framework = models.CharField(max_length=10)
+    country_code = models.CharField(max_length=2, help_text="En minúsculas.")
+    department_key = models.IntegerField(default=0, help_text="ID del departamento; 0 = nivel país.")
+    area_key = models.IntegerField(
+        default=0, help_text="ID de la etapa (PMBOK) o fase (Scrum) del proceso; 0 = sin asignar.")
+    kanban_status = models.CharField(max_length=20, choices=KANBAN_STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        # Claves con 0 en lugar de NULL para que la unicidad también cubra el nivel país
+        constraints = [
+            models.UniqueConstraint(
+                fields=['framework', 'country_code', 'department_key', 'area_key', 'kanban_status'],
+                name='progress_summary_group_uniq'),
+        ]
+
+    @property
+    def group(self):
+        return (self.country_code, self.department_key, self.area_key, self.kanban_status)
+
+    def __str__(self):
+        return f"{self.framework}/{self.country_code}/{self.department_key}/{self.area_key}/{self.kanban_status}: {self.count}"
+# ===== FIN: RESUMEN DE PROGRESO =====
+
+
+# ===== INICIO: COLA DE TRABAJOS EN BASE DE DATOS (ver api/jobs.py) =====
+JOB_STATUS_CHOICES = [
+    ('queued', 'En cola'),
+    ('running', 'En ejecución'),
+    ('succeeded', 'Completado'),
+    ('failed', 'Fallido'),
+]
+
+
+class Job(models.Model):
+    """
+    Operación pesada que se ejecuta fuera de la petición (`manage.py run_jobs`).
+    `progress`/`total` se actualizan por lotes mientras corre.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=JOB_STATUS_CHOICES, default='queued')
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+                                   null=True, blank=True, related_name='jobs')
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Solo los trabajos pendientes: la tabla crece con el historial, la cola no
+            models.Index(fields=['status', 'created_at'], name='job_pending_idx',
+                         condition=models.Q(status__in=['queued', 'running'])),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['created_by', 'idempotency_key'], name='job_idempotency_uniq',
+                                    condition=models.Q(idempotency_key__isnull=False)),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.id} ({self.status})"
+# ===== FIN: COLA DE TRABAJOS =====
+
+
+# ===== INICIO: REGISTRO DE TRANSICIONES KANBAN (ver api/kanban_log.py) =====
+# Códigos compactos (smallint) de framework y estado, fijos: son los valores guardados en
+# la historia y no dependen del orden de KANBAN_STATUS_CHOICES. Un estado nuevo lleva un
+# código nuevo; nunca se reutiliza ni se renumera uno existente.
+FRAMEWORK_CODES = {'pmbok': 1, 'scrum': 2}
+KANBAN_STATUS_CODES = {
+    'unassigned': 0, 'backlog': 1, 'todo': 2, 'in_progress': 3, 'in_review': 4, 'done': 5,
+}
+KANBAN_STATUS_CODE_CHOICES = [(KANBAN_STATUS_CODES[value], label) for value, label in KANBAN_STATUS_CHOICES]
+
+
+class KanbanTransition(models.Model):
+    """
+    Cambio de estado Kanban de un proceso base (item_key = 0) o de una personalización.
+    Solo se inserta: el estado actual sigue en `kanban_status` y esta tabla guarda la
+    historia para calcular tiempos de ciclo y throughput. Sin claves foráneas, con
+    claves enteras y 0 en lugar de NULL como ProgressSummary: la fila es pequeña, la
+    inserción no comprueba otras tablas y el historial sobrevive a los borrados.
+    """
+    id = models.BigAutoField(primary_key=True)
+    framework = models.PositiveSmallIntegerField(
+        choices=[(code, name) for name, code in FRAMEWORK_CODES.items()])
+    process_key = models.IntegerField(help_text="ID del proceso base.")
+    item_key = models.IntegerField(default=0, help_text="ID de la personalización; 0 = proceso base.")
+    country_code = models.CharField(max_length=2, blank=True, help_text="En minúsculas; vacío = proceso base.")
+    department_key = models.IntegerField(default=0, help_text="ID del departamento; 0 = nivel país.")
+    area_key = models.IntegerField(
+        default=0, help_text="Etapa (PMBOK) o fase (Scrum) del proceso al cambiar; 0 = sin asignar.")
+    from_status = models.PositiveSmallIntegerField(choices=KANBAN_STATUS_CODE_CHOICES)
+    to_status = models.PositiveSmallIntegerField(choices=KANBAN_STATUS_CODE_CHOICES)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        # El índice sobre `changed_at` (BRIN en PostgreSQL) se crea en la migración 0008: las
+        # filas llegan en orden de tiempo y el índice ocupa unas pocas páginas.
+        indexes = [
+            # Historia de un elemento en orden: particiones de las funciones ventana
+            models.Index(fields=['framework', 'item_key', 'process_key', 'changed_at'], name='kanban_transition_item_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.framework}/{self.process_key}/{self.item_key}: {self.from_status} -> {self.to_status}"
+# ===== FIN: REGISTRO DE TRANSICIONES KANBAN =====
+
+
 # --- Modelo de Tareas (SIN CAMBIOS) ---
 class Task(models.Model):
     title = models.CharField(max_length=200)
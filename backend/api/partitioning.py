@@ -0,0 +1,302 @@
+# backend/api/partitioning.py
+"""
+Particionado por país (LIST sobre `country_code`) de las tablas de personalizaciones.
+Solo PostgreSQL y opcional: la migración 0009 lo activa con CUSTOMIZATION_PARTITIONING
+y `manage.py customization_partitions` lo gestiona después.
+
+  * Cada país tiene su partición `<tabla>_<país>` con las cuatro variantes de mayúsculas
+    del código ('co', 'CO', 'Co', 'cO'): una personalización creada como 'CO' cae en la
+    misma partición que 'co'. Los países sin partición propia van a `<tabla>_default`.
+  * La clave primaria pasa a ser (id, country_code), que PostgreSQL exige en una tabla
+    particionada; `id` sigue saliendo de una secuencia y el ORM no cambia.
+  * Las consultas por país usan `country_filter()`: además del iexact (índices UPPER de
+    customization_indexes) filtran `country_code IN (variantes)`, que sí poda particiones,
+    pero solo con CUSTOMIZATION_PARTITIONING y si la tabla está particionada de verdad.
+  * Dar de baja un país es DROP TABLE de su partición (o DETACH para archivarla), sin
+    borrar fila a fila.
+
+Las sentencias no disparan señales: la versión del catálogo y el resumen de progreso se
+actualizan explícitamente, como en cloning.py.
+"""
+import itertools
+import re
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+
+from . import progress
+from .catalog import FRAMEWORKS, bump_catalog_version
+
+COUNTRY_CODE = re.compile(r'^[a-z0-9]{1,2}$')
+DEFAULT_SUFFIX = 'default'
+# Tipos de restricción que se recrean al convertir la tabla (NOT NULL viaja con LIKE)
+CONSTRAINT_TYPES = ('p', 'u', 'f', 'c')
+# El estado solo decide si se añade el IN (el iexact ya filtra): basta con releerlo cada tanto
+STATE_TTL = 60
+_state = (None, frozenset())  # (instante de la lectura, tablas particionadas)
+
+
+class PartitioningError(Exception):
+    pass
+
+
+def case_variants(country_code):
+    """Todas las combinaciones de mayúsculas del código: valores de la partición del país."""
+    # 2^n variantes: solo códigos de país, nunca texto arbitrario
+    if len(country_code) > 2:
+        raise PartitioningError(f'Código de país inválido: {country_code!r}.')
+    return sorted({''.join(chars) for chars in itertools.product(*({c, c.upper()} for c in country_code.lower()))})
+
+
+def partitioned_tables():
+    """Tablas de personalizaciones particionadas ahora mismo (cacheado STATE_TTL segundos)."""
+    global _state
+    if connection.vendor != 'postgresql' or not settings.CUSTOMIZATION_PARTITIONING:
+        return frozenset()
+    checked_at, partitioned = _state
+    if checked_at is None or time.monotonic() - checked_at > STATE_TTL:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT c.relname FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid '
+                'WHERE c.relname = ANY(%s)', [tables()])
+            partitioned = frozenset(row[0] for row in cursor.fetchall())
+        _state = (time.monotonic(), partitioned)
+    return partitioned
+
+
+def _forget_state():
+    global _state
+    _state = (None, frozenset())
+
+
+def country_filter(country_code, model):
+    """Filtro por país sin distinguir mayúsculas; en tablas particionadas además poda particiones."""
+    condition = Q(country_code__iexact=country_code)
+    if model._meta.db_table in partitioned_tables():
+        condition &= Q(country_code__in=case_variants(country_code))
+    return condition
+
+
+def tables(framework='all'):
+    return [FRAMEWORKS[name][1]._meta.db_table for name in (FRAMEWORKS if framework == 'all' else [framework])]
+
+
+def partition_name(table, country_code):
+    country_code = country_code.lower()
+    if not COUNTRY_CODE.match(country_code):
+        raise PartitioningError(f'Código de país inválido: {country_code!r}.')
+    return f'{table}_{country_code}'
+
+
+def _require_postgres():
+    if connection.vendor != 'postgresql':
+        raise PartitioningError('El particionado por país requiere PostgreSQL.')
+
+
+def _qn(name):
+    return connection.ops.quote_name(name)
+
+
+# ----------------------------------------------------------------------------
+# Estado
+# ----------------------------------------------------------------------------
+def is_partitioned(cursor, table):
+    cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)', [table])
+    return cursor.fetchone() is not None
+
+
+def partitions(cursor, table):
+    """[(nombre, límites, filas estimadas)] de las particiones de la tabla."""
+    cursor.execute(
+        'SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), GREATEST(c.reltuples, 0)::bigint '
+        'FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+        'WHERE i.inhparent = to_regclass(%s) ORDER BY c.relname', [table])
+    return cursor.fetchall()
+
+
+def status(framework='all'):
+    """{tabla: None si no está particionada, o la lista de particiones}."""
+    _require_postgres()
+    with connection.cursor() as cursor:
+        return {table: partitions(cursor, table) if is_partitioned(cursor, table) else None
+                for table in tables(framework)}
+
+
+# ----------------------------------------------------------------------------
+# Conversión de la tabla (plana <-> particionada)
+# ----------------------------------------------------------------------------
+def _definitions(cursor, table):
+    cursor.execute(
+        'SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint '
+        'WHERE conrelid = to_regclass(%s) AND contype::text = ANY(%s) ORDER BY contype DESC, conname',
+        [table, list(CONSTRAINT_TYPES)])
+    constraints = cursor.fetchall()
+    # Solo índices del padre (las particiones tienen los suyos, que se recrean solos)
+    cursor.execute(
+        'SELECT i.relname, pg_get_indexdef(i.oid) FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid '
+        'WHERE x.indrelid = to_regclass(%s) ORDER BY i.relname', [table])
+    owned = {name for name, _, _ in constraints}
+    indexes = [(name, sql) for name, sql in cursor.fetchall() if name not in owned]
+    return constraints, indexes
+
+
+def rebuild_table(cursor, table, partitioned):
+    """
+    Copia la tabla a una nueva plana o particionada con las mismas columnas, datos,
+    restricciones, índices y secuencia de `id`; las definiciones se leen del catálogo
+    de PostgreSQL, así no dependen de las migraciones aplicadas.
+    """
+    constraints, indexes = _definitions(cursor, table)
+    cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [table, 'id'])
+    cursor.execute(f'SELECT last_value FROM {cursor.fetchone()[0]}')
+    last_id = cursor.fetchone()[0]
+    cursor.execute(f'SELECT DISTINCT LOWER(country_code) FROM {_qn(table)}')
+    countries = sorted(row[0] for row in cursor.fetchall() if COUNTRY_CODE.match(row[0]))
+
+    old = f'{table}_old'
+    cursor.execute(f'ALTER TABLE {_qn(table)} RENAME TO {_qn(old)}')
+    suffix = ' PARTITION BY LIST (country_code)' if partitioned else ''
+    cursor.execute(f'CREATE TABLE {_qn(table)} (LIKE {_qn(old)}){suffix}')
+    if partitioned:
+        cursor.execute(f'CREATE TABLE {_qn(f"{table}_{DEFAULT_SUFFIX}")} PARTITION OF {_qn(table)} DEFAULT')
+        for country_code in countries:
+            values = case_variants(country_code)
+            cursor.execute(
+                f'CREATE TABLE {_qn(partition_name(table, country_code))} PARTITION OF {_qn(table)} '
+                f"FOR VALUES IN ({', '.join(['%s'] * len(values))})", values)
+    cursor.execute(f'INSERT INTO {_qn(table)} SELECT * FROM {_qn(old)}')
+    # Se lleva la secuencia (o identidad) de `id` y los índices/restricciones de la tabla vieja
+    cursor.execute(f'DROP TABLE {_qn(old)} CASCADE')
+
+    if partitioned:
+        # PostgreSQL < 17 no admite columnas de identidad en tablas particionadas
+        sequence = f'{table}_id_seq'
+        cursor.execute(f'CREATE SEQUENCE {_qn(sequence)} OWNED BY {_qn(table)}.id')
+        cursor.execute(f"ALTER TABLE {_qn(table)} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+    else:
+        cursor.execute(f'ALTER TABLE {_qn(table)} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY')
+    cursor.execute('SELECT setval(pg_get_serial_sequence(%s, %s), %s)', [table, 'id', last_id])
+
+    for name, kind, definition in constraints:
+        if kind == 'p':
+            # La clave primaria de una tabla particionada debe incluir la clave de partición
+            definition = 'PRIMARY KEY (id, country_code)' if partitioned else 'PRIMARY KEY (id)'
+        cursor.execute(f'ALTER TABLE {_qn(table)} ADD CONSTRAINT {_qn(name)} {definition}')
+    for _, sql in indexes:
+        cursor.execute(sql)
+    cursor.execute(f'ANALYZE {_qn(table)}')
+    return countries
+
+
+def enable(framework='all'):
+    """Convierte las tablas planas en particionadas (una partición por país existente)."""
+    _require_postgres()
+    result = {}
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in tables(framework):
+            if not is_partitioned(cursor, table):
+                result[table] = rebuild_table(cursor, table, partitioned=True)
+    _forget_state()
+    return result
+
+
+def disable(framework='all'):
+    """Vuelve a tablas planas (las particiones desacopladas no se incluyen)."""
+    _require_postgres()
+    converted = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in tables(framework):
+            if is_partitioned(cursor, table):
+                rebuild_table(cursor, table, partitioned=False)
+                converted.append(table)
+    _forget_state()
+    return converted
+
+
+# ----------------------------------------------------------------------------
+# Particiones por país
+# ----------------------------------------------------------------------------
+def _require_partitioned(cursor, table):
+    if not is_partitioned(cursor, table):
+        raise PartitioningError(f'{table} no está particionada; ejecute `customization_partitions enable`.')
+
+
+def _exists(cursor, name):
+    cursor.execute('SELECT to_regclass(%s)', [name])
+    return cursor.fetchone()[0] is not None
+
+
+def _attached(cursor, table, name):
+    cursor.execute('SELECT 1 FROM pg_inherits WHERE inhparent = to_regclass(%s) AND inhrelid = to_regclass(%s)',
+                   [table, name])
+    return cursor.fetchone() is not None
+
+
+def create(country_code, framework='all'):
+    """
+    Crea la partición del país. Sus filas, si ya había, están en la partición por defecto:
+    se mueven a la tabla nueva antes de adjuntarla. Devuelve {tabla: filas movidas}.
+    """
+    _require_postgres()
+    moved = {}
+    values = case_variants(country_code)
+    placeholders = ', '.join(['%s'] * len(values))
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in tables(framework):
+            _require_partitioned(cursor, table)
+            name = partition_name(table, country_code)
+            if _exists(cursor, name):
+                continue
+            cursor.execute(f'CREATE TABLE {_qn(name)} (LIKE {_qn(table)} INCLUDING DEFAULTS)')
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {_qn(f"{table}_{DEFAULT_SUFFIX}")} '
+                f'WHERE country_code IN ({placeholders}) RETURNING *) INSERT INTO {_qn(name)} SELECT * FROM moved',
+                values)
+            moved[table] = cursor.rowcount
+            cursor.execute(f'ALTER TABLE {_qn(table)} ATTACH PARTITION {_qn(name)} FOR VALUES IN ({placeholders})',
+                           values)
+    return moved
+
+
+def detach(country_code, framework='all'):
+    """Desacopla la partición del país: sus filas dejan de verse pero la tabla se conserva."""
+    _require_postgres()
+    detached = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in tables(framework):
+            _require_partitioned(cursor, table)
+            name = partition_name(table, country_code)
+            if _attached(cursor, table, name):
+                cursor.execute(f'ALTER TABLE {_qn(table)} DETACH PARTITION {_qn(name)}')
+                detached.append(name)
+        if detached:
+            _changed()
+    return detached
+
+
+def drop(country_code, framework='all'):
+    """
+    Elimina la partición del país con todas sus personalizaciones (instantáneo, sin borrar
+    fila a fila); también una partición ya desacoplada.
+    """
+    _require_postgres()
+    dropped = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in tables(framework):
+            _require_partitioned(cursor, table)
+            name = partition_name(table, country_code)
+            if _exists(cursor, name):
+                attached = _attached(cursor, table, name)
+                cursor.execute(f'DROP TABLE {_qn(name)}')
+                dropped.append(name)
+                if attached:
+                    _changed()
+    return dropped
+
+
+def _changed():
+    # DDL: ni señales ni deltas del resumen de progreso
+    bump_catalog_version()
+    progress.schedule_rebuild()
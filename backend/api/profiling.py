@@ -0,0 +1,190 @@
+# backend/api/profiling.py
+"""
+Perfilado opcional por petición: número de consultas, tiempo total de SQL, consultas
+más lentas, tiempo de serialización y de render.
+
+Se activa de dos formas:
+  * Cabecera `X-Profile: 1` enviada por un usuario staff -> la respuesta incluye
+    `Server-Timing` y las consultas más lentas se escriben en el log `api.profiling`.
+    El JWT se comprueba antes de empezar a medir; de cualquier otro cliente la
+    cabecera se ignora.
+  * Muestreo (`PROFILING_SAMPLE_RATE`, 0.0-1.0) -> solo se exportan métricas.
+
+Solo las peticiones muestreadas alimentan los histogramas de Prometheus (etiquetados
+por vista, nombre de URL, cardinalidad baja): la cabecera no sesga la muestra.
+"""
+import contextvars
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from prometheus_client import Histogram
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+logger = logging.getLogger('api.profiling')
+
+_current = contextvars.ContextVar('api_request_profile', default=None)
+
+SLOWEST_QUERIES = 5
+SQL_PREVIEW_CHARS = 300
+
+SQL_QUERIES = Histogram(
+    'pmbok_request_sql_queries', 'Consultas SQL por petición perfilada.', ['view'],
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100, 250))
+SQL_SECONDS = Histogram(
+    'pmbok_request_sql_seconds', 'Tiempo total de SQL por petición perfilada.', ['view'])
+SERIALIZE_SECONDS = Histogram(
+    'pmbok_request_serialize_seconds', 'Tiempo de serialización por petición perfilada.', ['view'])
+RENDER_SECONDS = Histogram(
+    'pmbok_request_render_seconds', 'Tiempo de render por petición perfilada.', ['view'])
+
+
+class RequestProfile:
+    def __init__(self):
+        self.queries = []  # (segundos, sql)
+        self.sections = {}
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((time.perf_counter() - started, sql))
+
+    @property
+    def sql_seconds(self):
+        return sum(duration for duration, _ in self.queries)
+
+    def slowest(self, count=SLOWEST_QUERIES):
+        return sorted(self.queries, key=lambda q: q[0], reverse=True)[:count]
+
+
+@contextmanager
+def profile_section(name):
+    """Acumula el tiempo del bloque en la sección `name` si la petición se está perfilando."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.sections[name] = profile.sections.get(name, 0.0) + time.perf_counter() - started
+
+
+_timed_serializer_classes = {}
+_timed_serializer_lock = threading.Lock()
+
+
+def _timed_serializer_class(cls):
+    # Subclase que mide el acceso a `.data` (donde DRF hace to_representation).
+    # Con workers gthread dos hilos pueden pedir la misma clase a la vez.
+    timed = _timed_serializer_classes.get(cls)
+    if timed is None:
+        with _timed_serializer_lock:
+            timed = _timed_serializer_classes.get(cls)
+            if timed is None:
+                def data(self):
+                    with profile_section('serialize'):
+                        return super(timed, self).data
+                timed = type(cls.__name__, (cls,), {'data': property(data)})
+                _timed_serializer_classes[cls] = timed
+    return timed
+
+
+class ProfiledSerializerMixin:
+    """Mixin de vistas DRF: mide el tiempo de serialización cuando hay perfilado activo."""
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if _current.get() is not None:
+            serializer.__class__ = _timed_serializer_class(serializer.__class__)
+        return serializer
+
+
+class ProfiledJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with profile_section('render'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = float(getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0))
+        self.header = 'HTTP_' + getattr(settings, 'PROFILING_HEADER', 'X-Profile').upper().replace('-', '_')
+
+    def __call__(self, request):
+        requested = request.META.get(self.header) == '1' and is_staff_request(request)
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        if not (requested or sampled):
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            with _wrap_connections(profile):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - started
+
+        if sampled:
+            self.export_metrics(request, profile)
+        if requested:
+            response['Server-Timing'] = self.server_timing(profile, total)
+            self.log_slowest(request, profile, total)
+        return response
+
+    def export_metrics(self, request, profile):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.url_name or match.view_name) if match else 'unresolved'
+        SQL_QUERIES.labels(view).observe(len(profile.queries))
+        SQL_SECONDS.labels(view).observe(profile.sql_seconds)
+        SERIALIZE_SECONDS.labels(view).observe(profile.sections.get('serialize', 0.0))
+        RENDER_SECONDS.labels(view).observe(profile.sections.get('render', 0.0))
+
+    def server_timing(self, profile, total):
+        slowest = profile.slowest(1)
+        parts = [
+            f'db;dur={profile.sql_seconds * 1000:.1f};desc="{len(profile.queries)} queries"',
+            f'db-slowest;dur={(slowest[0][0] if slowest else 0) * 1000:.1f}',
+            f'serialize;dur={profile.sections.get("serialize", 0.0) * 1000:.1f}',
+            f'render;dur={profile.sections.get("render", 0.0) * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ]
+        return ', '.join(parts)
+
+    def log_slowest(self, request, profile, total):
+        lines = [f'{duration * 1000:.1f}ms {sql[:SQL_PREVIEW_CHARS]}' for duration, sql in profile.slowest()]
+        logger.info('%s %s: %d consultas, SQL %.1fms, total %.1fms\n%s',
+                    request.method, request.path, len(profile.queries),
+                    profile.sql_seconds * 1000, total * 1000, '\n'.join(lines))
+
+
+def is_staff_request(request):
+    """Usuario staff por sesión (admin) o por JWT, resuelto antes que DRF."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        return False
+    return authenticated is not None and authenticated[0].is_staff
+
+
+def _wrap_connections(profile):
+    stack = ExitStack()
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(profile.record_query))
+    return stack
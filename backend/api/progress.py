@@ -0,0 +1,170 @@
+# backend/api/progress.py
+"""
+Resumen de progreso por país: recuentos de personalizaciones por (framework, país,
+departamento, etapa/fase, estado Kanban) en la tabla ProgressSummary.
+
+Las escrituras de la API aplican deltas (`apply_deltas`) en la misma transacción que el
+cambio; lo que no pasa por la API (admin, borrados en cascada de los seeds) programa una
+reconstrucción completa (`schedule_rebuild`). Un panel de resumen lee O(grupos) filas en
+lugar de todas las personalizaciones.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count
+
+from .catalog import FRAMEWORKS, memoize, on_commit_once
+from .models import ProgressSummary
+
+# Campo del proceso que agrupa por "área de conocimiento" en cada framework
+AREA_FIELD = {'pmbok': 'stage', 'scrum': 'phase'}
+
+
+def group_key(country_code, department_id, area_id, kanban_status):
+    return (country_code.lower(), department_id or 0, area_id or 0, kanban_status)
+
+
+def customization_key(framework, customization):
+    area_id = getattr(customization.process, f'{AREA_FIELD[framework]}_id')
+    return group_key(customization.country_code, customization.department_id, area_id,
+                     customization.kanban_status)
+
+
+def grouped_counts(framework, customizations):
+    """Counter {clave de grupo: filas} de un queryset de personalizaciones (una consulta)."""
+    rows = customizations.order_by().values_list(
+        'country_code', 'department_id', f'process__{AREA_FIELD[framework]}_id', 'kanban_status',
+    ).annotate(n=Count('id'))
+    counts = Counter()
+    for country_code, department_id, area_id, kanban_status, n in rows:
+        counts[group_key(country_code, department_id, area_id, kanban_status)] += n
+    return counts
+
+
+def transition_deltas(before, new_status):
+    """Deltas de mover a `new_status` las filas contadas en `before` (de grouped_counts)."""
+    deltas = Counter()
+    for (country_code, department_key, area_key, kanban_status), n in before.items():
+        if kanban_status != new_status:
+            deltas[(country_code, department_key, area_key, kanban_status)] -= n
+            deltas[(country_code, department_key, area_key, new_status)] += n
+    return deltas
+
+
+def _locked_groups(framework, keys):
+    # Filtro por columnas (superconjunto de los grupos): una sola consulta
+    countries, departments, areas, statuses = (set(column) for column in zip(*keys))
+    return {row.group: row for row in ProgressSummary.objects.select_for_update().filter(
+        framework=framework, country_code__in=countries, department_key__in=departments,
+        area_key__in=areas, kanban_status__in=statuses,
+    ) if row.group in keys}
+
+
+def apply_deltas(framework, deltas):
+    """
+    Suma los deltas a sus grupos con un número de consultas que no depende del número de
+    grupos: bloquea las filas afectadas, crea las que falten y las actualiza en lote.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    # Sin savepoint: las vistas ya abren la transacción de la escritura
+    with transaction.atomic(savepoint=False):
+        rows = _locked_groups(framework, deltas)
+        missing = [key for key in deltas if key not in rows]
+        if missing:
+            ProgressSummary.objects.bulk_create([
+                ProgressSummary(framework=framework, country_code=country_code,
+                                department_key=department_key, area_key=area_key,
+                                kanban_status=kanban_status, count=0)
+                for country_code, department_key, area_key, kanban_status in missing
+            ], ignore_conflicts=True)  # otra transacción pudo crear el mismo grupo
+            rows = _locked_groups(framework, deltas)
+        for key, row in rows.items():
+            row.count += deltas[key]
+        ProgressSummary.objects.bulk_update(rows.values(), ['count'])
+
+
+def computed_summary(framework):
+    return grouped_counts(framework, FRAMEWORKS[framework][1].objects.all())
+
+
+def stored_summary(framework):
+    rows = ProgressSummary.objects.filter(framework=framework).exclude(count=0).values_list(
+        'country_code', 'department_key', 'area_key', 'kanban_status', 'count')
+    return Counter({tuple(row[:4]): row[4] for row in rows})
+
+
+def rebuild(frameworks=None):
+    """Recalcula el resumen desde las personalizaciones. Devuelve {framework: grupos}."""
+    groups = {}
+    with transaction.atomic():
+        for framework in frameworks or FRAMEWORKS:
+            counts = computed_summary(framework)
+            ProgressSummary.objects.filter(framework=framework).delete()
+            ProgressSummary.objects.bulk_create([
+                ProgressSummary(framework=framework, country_code=country_code,
+                                department_key=department_key, area_key=area_key,
+                                kanban_status=kanban_status, count=n)
+                for (country_code, department_key, area_key, kanban_status), n in counts.items()
+            ], batch_size=1000)
+            groups[framework] = len(counts)
+    return groups
+
+
+def _rebuild_now():
+    rebuild()
+
+
+def schedule_rebuild():
+    """
+    Para escrituras que no aplican deltas (admin, cambios de etapa/fase, borrados de
+    departamentos). Igual que bump_catalog_version: una sola vez al hacer commit.
+    """
+    on_commit_once(_rebuild_now)
+
+
+def _areas(framework):
+    """{area_id: (nombre, procesos en el área)}; 0 = procesos sin etapa/fase."""
+    def compute():
+        process_model = FRAMEWORKS[framework][0]
+        area_field = AREA_FIELD[framework]
+        area_model = process_model._meta.get_field(area_field).related_model
+        names = dict(area_model.objects.values_list('id', 'name'))
+        totals = process_model.objects.order_by().values_list(f'{area_field}_id').annotate(n=Count('id'))
+        return {area_id or 0: (names.get(area_id), n) for area_id, n in totals}
+    return memoize(('progress-areas', framework), compute)
+
+
+def progress_report(framework, country_code=None, department_key=None):
+    """
+    Filas por (país, departamento, área) con el recuento por estado Kanban y el % hecho
+    sobre el total de procesos del área (los no personalizados cuentan como pendientes).
+    """
+    rows = ProgressSummary.objects.filter(framework=framework, count__gt=0)
+    if country_code:
+        rows = rows.filter(country_code=country_code.lower())
+    if department_key is not None:
+        rows = rows.filter(department_key=department_key)
+
+    areas = _areas(framework)
+    groups = {}
+    for row in rows.values_list('country_code', 'department_key', 'area_key', 'kanban_status', 'count'):
+        country, department, area, kanban_status, n = row
+        groups.setdefault((country, department, area), {})[kanban_status] = n
+
+    result = []
+    for (country, department, area), counts in sorted(groups.items()):
+        name, processes = areas.get(area, (None, 0))
+        done = counts.get('done', 0)
+        result.append({
+            'country_code': country,
+            'department_id': department or None,
+            'area_id': area or None,
+            'area': name,
+            'processes': processes,
+            'customized': sum(counts.values()),
+            'counts': counts,
+            'percent_done': round(100 * done / processes, 1) if processes else 0.0,
+        })
+    return result
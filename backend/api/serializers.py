@@ -1,5 +1,6 @@
 # backend/api/serializers.py
 from django.db import IntegrityError
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
@@ -8,8 +9,11 @@ from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from .models import (
     Task, CustomUser, PMBOKProcess, ProcessStatus, ProcessStage,
     ScrumProcess, ScrumPhase, PMBOKProcessCustomization, ScrumProcessCustomization,
-    Department
+    Department, Job
 )
+from .itto import ITTO_FIELDS, canonicalize_itto_list, compact_itto_list, materialize_itto_list
+from .bulk_import import FORMATS as BULK_IMPORT_FORMATS
+from .jobs import HANDLERS as JOB_HANDLERS
 
 
 # ===== INICIO: NUEVO SERIALIZER PARA TOKEN PERSONALIZADO =====
@@ -122,7 +126,27 @@ class DepartmentSerializer(serializers.ModelSerializer):
 # ===== FIN: NUEVOS SERIALIZADORES =====
 
 
-class PMBOKProcessCustomizationSerializer(serializers.ModelSerializer):
+class MaterializedITTOMixin:
+    """
+    Las personalizaciones guardan sus ITTOs como referencia a la base (None o diff, ver
+    api/itto.py): en la respuesta se materializan las listas efectivas. Con el contexto
+    `itto_compact` (?itto=compact) los campos heredados se devuelven como null y el
+    cliente los completa con los ITTOs del proceso, que ya vienen en la misma respuesta.
+    """
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        compact = self.context.get('itto_compact', False)
+        for field in ITTO_FIELDS:
+            stored = getattr(instance, field)
+            if compact and stored is None:
+                data[field] = None
+            else:
+                data[field] = materialize_itto_list(getattr(instance.process, field), stored)
+        return data
+
+
+class PMBOKProcessCustomizationSerializer(MaterializedITTOMixin, serializers.ModelSerializer):
     department = SubDepartmentSerializer(read_only=True)
 
     class Meta:
@@ -131,7 +155,7 @@ class PMBOKProcessCustomizationSerializer(serializers.ModelSerializer):
                   'tools_and_techniques', 'outputs', 'kanban_status', 'department')
 
 
-class ScrumProcessCustomizationSerializer(serializers.ModelSerializer):
+class ScrumProcessCustomizationSerializer(MaterializedITTOMixin, serializers.ModelSerializer):
     department = SubDepartmentSerializer(read_only=True)
 
     class Meta:
@@ -168,13 +192,24 @@ class ScrumProcessSerializer(serializers.ModelSerializer):
         )
 
 
+class ITTOListField(serializers.JSONField):
+    """Lista ITTO validada contra el esquema y guardada en forma canónica."""
+
+    def to_internal_value(self, data):
+        data = super().to_internal_value(data)
+        try:
+            return canonicalize_itto_list(data, self.field_name)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.messages)
+
+
 class CustomizationWriteSerializer(serializers.Serializer):
     process_id = serializers.IntegerField(write_only=True)
     process_type = serializers.ChoiceField(choices=['pmbok', 'scrum'], write_only=True)
     country_code = serializers.CharField(max_length=2)
-    inputs = serializers.JSONField()
-    tools_and_techniques = serializers.JSONField()
-    outputs = serializers.JSONField()
+    inputs = ITTOListField()
+    tools_and_techniques = ITTOListField()
+    outputs = ITTOListField()
     department_id = serializers.IntegerField(write_only=True, required=False, allow_null=True)
 
     def create(self, validated_data):
@@ -196,21 +231,100 @@ class CustomizationWriteSerializer(serializers.Serializer):
         except model_class.DoesNotExist:
             raise serializers.ValidationError("El proceso con el ID y tipo especificados no existe.")
 
+        # Se guarda la forma mínima frente a la base: una copia sin cambios queda en None
+        defaults = {field: compact_itto_list(getattr(process_instance, field), validated_data.get(field))
+                    for field in ITTO_FIELDS}
+        defaults['department_id'] = department_id
         instance, created = customization_model.objects.update_or_create(
             process=process_instance,
             country_code=validated_data.get('country_code'),
             department_id=department_id,
-            defaults={
-                'inputs': validated_data.get('inputs'),
-                'tools_and_techniques': validated_data.get('tools_and_techniques'),
-                'outputs': validated_data.get('outputs'),
-                'department_id': department_id
-            }
+            defaults=defaults
         )
+        self.created = created
         return instance
 
 
+# ===== INICIO: CLONADO MASIVO DE PERSONALIZACIONES (ver api/cloning.py) =====
+class CustomizationCloneSerializer(serializers.Serializer):
+    framework = serializers.ChoiceField(choices=['pmbok', 'scrum', 'all'], default='all')
+    # Sin país de origen se copian los ITTOs base de cada proceso
+    source_country = serializers.CharField(max_length=2, min_length=2, required=False, allow_null=True, default=None)
+    source_department_id = serializers.IntegerField(required=False, allow_null=True, default=None)
+    target_country = serializers.CharField(max_length=2, min_length=2)
+    target_department_id = serializers.IntegerField(required=False, allow_null=True, default=None)
+    on_conflict = serializers.ChoiceField(choices=['skip', 'overwrite'], default='skip')
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if attrs['source_department_id'] is not None and attrs['source_country'] is None:
+            raise serializers.ValidationError({'source_country': 'Obligatorio si se indica el departamento de origen.'})
+        for field in ('source_department_id', 'target_department_id'):
+            if attrs[field] is not None and not Department.objects.filter(pk=attrs[field]).exists():
+                raise serializers.ValidationError({field: 'El departamento no existe.'})
+        source = ((attrs['source_country'] or '').lower(), attrs['source_department_id'])
+        if source == (attrs['target_country'].lower(), attrs['target_department_id']):
+            raise serializers.ValidationError('El origen y el destino son el mismo.')
+        return attrs
+# ===== FIN: CLONADO MASIVO =====
+
+
+# ===== INICIO: IMPORTACIÓN MASIVA DE PERSONALIZACIONES (ver api/bulk_import.py) =====
+class CustomizationImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    # Sin formato se deduce de la extensión del fichero (.csv / .ndjson / .jsonl)
+    file_format = serializers.ChoiceField(choices=BULK_IMPORT_FORMATS, required=False)
+    dry_run = serializers.BooleanField(default=False)
+    strict = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if 'file_format' not in attrs:
+            name = attrs['file'].name.lower()
+            if name.endswith('.csv'):
+                attrs['file_format'] = 'csv'
+            elif name.endswith(('.ndjson', '.jsonl')):
+                attrs['file_format'] = 'ndjson'
+            else:
+                raise serializers.ValidationError({'file_format': 'Indique csv o ndjson.'})
+        return attrs
+# ===== FIN: IMPORTACIÓN MASIVA =====
+
+
 class TaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = '__all__'
+
+
+# ===== INICIO: TRABAJOS DE LA COLA (ver api/jobs.py) =====
+class JobSerializer(serializers.ModelSerializer):
+    percent = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = ('id', 'kind', 'status', 'progress', 'total', 'percent', 'result', 'error',
+                  'attempts', 'created_at', 'started_at', 'finished_at')
+        read_only_fields = fields
+
+    def get_percent(self, obj):
+        if obj.status == 'succeeded':
+            return 100.0
+        return round(100 * obj.progress / obj.total, 1) if obj.total else 0.0
+
+
+class JobCreateSerializer(serializers.Serializer):
+    kind = serializers.CharField()
+    payload = serializers.JSONField(required=False, default=dict)
+
+    def validate(self, attrs):
+        job_handler = JOB_HANDLERS.get(attrs['kind'])
+        if job_handler is None:
+            raise serializers.ValidationError({'kind': f'Tipos válidos: {", ".join(sorted(JOB_HANDLERS))}.'})
+        if job_handler.staff_only and not self.context['request'].user.is_staff:
+            raise serializers.ValidationError({'kind': 'Solo el personal puede encolar este trabajo.'})
+        if not isinstance(attrs['payload'], dict):
+            raise serializers.ValidationError({'payload': 'Debe ser un objeto JSON.'})
+        if job_handler.validate:
+            job_handler.validate(attrs['payload'])
+        return attrs
+# ===== FIN: TRABAJOS DE LA COLA =====
@@ -0,0 +1,26 @@
+# backend/api/signals.py
+from django.db.models.signals import post_delete, post_save
+
+from .catalog import bump_catalog_version
+from .models import (
+    Department, PMBOKProcess, ScrumProcess, PMBOKProcessCustomization, ScrumProcessCustomization,
+    ProcessStatus, ProcessStage, ScrumPhase,
+)
+
+# Estados, etapas y fases también: sus nombres y colores van en los listados cacheados
+CATALOG_MODELS = (
+    PMBOKProcess, ScrumProcess, PMBOKProcessCustomization, ScrumProcessCustomization, Department,
+    ProcessStatus, ProcessStage, ScrumPhase,
+)
+
+
+def invalidate_catalog_caches(sender, **kwargs):
+    # Cualquier escritura sobre el catálogo invalida las cachés derivadas (ver api/catalog.py)
+    bump_catalog_version()
+
+
+for model in CATALOG_MODELS:
+    post_save.connect(invalidate_catalog_caches, sender=model,
+                      dispatch_uid=f'catalog-version-save-{model.__name__}')
+    post_delete.connect(invalidate_catalog_caches, sender=model,
+                        dispatch_uid=f'catalog-version-delete-{model.__name__}')
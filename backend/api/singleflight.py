@@ -0,0 +1,76 @@
+# backend/api/singleflight.py
+"""
+Un solo cálculo por clave ante fallos de caché concurrentes ("single flight").
+
+Tras un despliegue, un seed o una escritura masiva (nueva versión del catálogo) todas
+las peticiones simultáneas fallarían a la vez la caché y recalcularían el mismo listado
+contra Postgres. Aquí solo lo calcula quien consigue el candado (`cache.add`, atómico);
+las demás:
+
+  1. Si quien llama lo pide (`stale_key`: listados de procesos, árbol de departamentos e
+     historial git), sirven el último valor calculado, aunque sea de una versión anterior
+     (stale-while-revalidate), si existe y SINGLE_FLIGHT_SERVE_STALE está activo.
+  2. Si no (o no hay valor anterior), esperan a que aparezca el nuevo hasta
+     SINGLE_FLIGHT_WAIT_TIMEOUT; si el cálculo falla o tarda más, calculan ellas mismas.
+
+Con la caché local por proceso (CACHES en settings) esto agrupa los hilos de un worker;
+con una caché compartida (Redis, Memcached) agrupa también workers y réplicas.
+Cada resultado se cuenta en pmbok_catalog_cache_requests: hit, miss (calculado),
+stale, coalesced (esperó al cálculo de otro) y fallback (calculó tras esperar).
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .metrics import CACHE_REQUESTS, SINGLE_FLIGHT_WAIT
+
+POLL_INTERVAL = 0.05
+
+
+def _compute_and_store(key, compute, timeout, stale_key):
+    value = compute()
+    cache.set(key, value, timeout)
+    if stale_key is not None:
+        cache.set(stale_key, value, settings.SINGLE_FLIGHT_STALE_TIMEOUT)
+    return value
+
+
+def get_or_compute(key, compute, timeout, namespace, stale_key=None):
+    """
+    Valor de `key` en la caché o calculado con `compute()` una sola vez entre las
+    peticiones concurrentes. `stale_key`: clave estable (sin versión) con el último valor
+    calculado, servido mientras otro recalcula.
+    """
+    value = cache.get(key)
+    if value is not None:
+        CACHE_REQUESTS.labels(namespace, 'hit').inc()
+        return value
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, settings.SINGLE_FLIGHT_LOCK_TIMEOUT):
+        CACHE_REQUESTS.labels(namespace, 'miss').inc()
+        try:
+            return _compute_and_store(key, compute, timeout, stale_key)
+        finally:
+            cache.delete(lock_key)
+
+    if stale_key is not None and settings.SINGLE_FLIGHT_SERVE_STALE:
+        value = cache.get(stale_key)
+        if value is not None:
+            CACHE_REQUESTS.labels(namespace, 'stale').inc()
+            return value
+
+    started = time.monotonic()
+    while time.monotonic() - started < settings.SINGLE_FLIGHT_WAIT_TIMEOUT:
+        time.sleep(POLL_INTERVAL)
+        value = cache.get(key)
+        if value is not None:
+            CACHE_REQUESTS.labels(namespace, 'coalesced').inc()
+            SINGLE_FLIGHT_WAIT.labels(namespace).observe(time.monotonic() - started)
+            return value
+        if cache.get(lock_key) is None:
+            break  # quien calculaba falló sin guardar nada
+    CACHE_REQUESTS.labels(namespace, 'fallback').inc()
+    SINGLE_FLIGHT_WAIT.labels(namespace).observe(time.monotonic() - started)
+    return _compute_and_store(key, compute, timeout, stale_key)
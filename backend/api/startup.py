@@ -0,0 +1,108 @@
+# backend/api/startup.py
+"""
+Piezas del arranque rápido (comando `startup`, ver entrypoint.sh): detectar de forma
+barata que no hay nada que hacer y serializar entre réplicas el trabajo que sí hay.
+
+  * Migraciones: plan pendiente calculado con el grafo en disco + django_migrations.
+  * Estáticos: huella de los ficheros fuente (ruta, tamaño, mtime) guardada junto a
+    STATIC_ROOT; es por contenedor, como el propio STATIC_ROOT.
+  * Seeds: huella del código de cada comando de seed guardada en StartupState.
+"""
+import hashlib
+import importlib
+import inspect
+import os
+import time
+from contextlib import contextmanager
+
+from django.contrib.staticfiles.finders import get_finders
+from django.db import connection as default_connection
+
+# Clave del advisory lock de Postgres (int8) compartida por todas las réplicas
+STARTUP_LOCK_KEY = int.from_bytes(b'pmbok-up', 'big') & 0x7FFFFFFFFFFFFFFF
+STATIC_IGNORE_PATTERNS = ['CVS', '.*', '*~']  # los mismos que collectstatic
+
+
+def migration_plan(connection=None):
+    """Migraciones pendientes [(Migration, backwards)] para llegar a las hojas del grafo."""
+    from django.db.migrations.executor import MigrationExecutor
+
+    executor = MigrationExecutor(connection or default_connection)
+    return executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+
+def static_source_digest():
+    digest = hashlib.sha256()
+    entries = []
+    for finder in get_finders():
+        for path, storage in finder.list(STATIC_IGNORE_PATTERNS):
+            stat = os.stat(storage.path(path))
+            prefix = getattr(storage, 'prefix', None) or ''
+            entries.append(f'{prefix}/{path}:{stat.st_size}:{stat.st_mtime_ns}')
+    for entry in sorted(entries):
+        digest.update(entry.encode())
+    return digest.hexdigest()
+
+
+def seed_digest(command_name):
+    module = importlib.import_module(f'api.management.commands.{command_name}')
+    with open(inspect.getsourcefile(module), 'rb') as fh:
+        return hashlib.sha256(fh.read()).hexdigest()
+
+
+@contextmanager
+def advisory_lock(key=STARTUP_LOCK_KEY, timeout=300, poll=1.0, on_wait=None, connection=None):
+    """
+    Advisory lock de sesión en Postgres: solo una réplica migra/siembra a la vez; el resto
+    espera y, al entrar, ve que ya no queda trabajo. En otros motores no bloquea nada.
+    Devuelve los segundos esperados.
+    """
+    connection = connection or default_connection
+    if connection.vendor != 'postgresql':
+        yield 0.0
+        return
+
+    started = time.monotonic()
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', [key])
+            if cursor.fetchone()[0]:
+                break
+            waited = time.monotonic() - started
+            if waited > timeout:
+                raise TimeoutError(f'advisory lock {key} no disponible tras {timeout}s')
+            if on_wait:
+                on_wait(waited)
+            time.sleep(poll)
+    try:
+        yield time.monotonic() - started
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', [key])
+
+
+class PhaseTimer:
+    """Tiempos por fase del arranque: [(fase, resultado, segundos)]."""
+
+    def __init__(self):
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+        record = {'outcome': 'ok'}
+        started = time.perf_counter()
+        try:
+            yield record
+        except BaseException:
+            record['outcome'] = 'failed'
+            raise
+        finally:
+            self.phases.append((name, record['outcome'], time.perf_counter() - started))
+
+    @property
+    def total(self):
+        return sum(seconds for _, _, seconds in self.phases)
+
+    def summary(self):
+        parts = [f'{name} {seconds:.2f}s ({outcome})' for name, outcome, seconds in self.phases]
+        return f'total {self.total:.2f}s: ' + ', '.join(parts)
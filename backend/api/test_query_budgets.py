@@ -0,0 +1,221 @@
+# backend/api/test_query_budgets.py
+"""
+Presupuestos de consultas SQL y de tiempo por endpoint sobre un volumen realista
+(todos los procesos PMBOK/Scrum de los seeds, todos los departamentos y muchas
+personalizaciones por país/departamento). Si un cambio en serializers o vistas
+reintroduce un N+1, estos tests fallan en CI.
+
+Los techos de tiempo son holgados a propósito (CI compartido); se pueden ajustar con
+QUERY_BUDGET_TIME_FACTOR (ej. 0.5 para ser más estricto en una máquina dedicada).
+"""
+import math
+import os
+import re
+import time
+from collections import Counter
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from api import jobs, kanban_log
+from api.models import (
+    CustomUser, Department, PMBOKProcess, ScrumProcess,
+    PMBOKProcessCustomization, ScrumProcessCustomization, KanbanTransition
+)
+
+COUNTRIES = ['co', 'ar', 'bo', 'cl', 'ec', 'mx', 'pe', 'us', 'es', 'uy']
+DEPARTMENTS_PER_COUNTRY = 2
+TIME_FACTOR = float(os.getenv('QUERY_BUDGET_TIME_FACTOR', '1'))
+STATEMENT_TABLE = re.compile(r'(?:FROM|INTO|UPDATE)\s+"(\w+)"')
+
+
+def statements(captured_queries):
+    """Counter {(SELECT/INSERT/UPDATE/..., tabla principal)} de las consultas capturadas."""
+    counts = Counter()
+    for query in captured_queries:
+        table = STATEMENT_TABLE.search(query['sql'])
+        counts[(query['sql'].split(None, 1)[0].upper(), table.group(1) if table else '')] += 1
+    return counts
+
+
+def insert_batches(model, rows, batch_size):
+    """INSERT que emite bulk_create(batch_size) para `rows` filas en esta base de datos."""
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    return math.ceil(rows / min(batch_size, connection.ops.bulk_batch_size(fields, [None] * rows)))
+
+
+class QueryBudgetTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        out = StringIO()
+        call_command('seed_pmbok', stdout=out)
+        call_command('seed_scrum', stdout=out)
+        call_command('seed_departments', stdout=out)
+
+        cls.user = CustomUser.objects.create_user(email='budget@test.com', password='password123')
+        departments = list(Department.objects.filter(parent__isnull=False)[:DEPARTMENTS_PER_COUNTRY])
+        cls.department = departments[0]
+
+        for process_model, customization_model in (
+            (PMBOKProcess, PMBOKProcessCustomization),
+            (ScrumProcess, ScrumProcessCustomization),
+        ):
+            rows = []
+            for process in process_model.objects.all():
+                for country in COUNTRIES:
+                    for department in [None] + departments:
+                        rows.append(customization_model(
+                            process=process, country_code=country, department=department,
+                            inputs=process.inputs, tools_and_techniques=process.tools_and_techniques,
+                            outputs=process.outputs))
+            customization_model.objects.bulk_create(rows, batch_size=500)
+        call_command('rebuild_progress', stdout=out)
+
+        cls.pmbok = PMBOKProcess.objects.order_by('process_number').first()
+        cls.scrum = ScrumProcess.objects.order_by('process_number').first()
+        cls.customization = PMBOKProcessCustomization.objects.filter(process=cls.pmbok).first()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(user=self.user)
+
+    def assertWithinBudget(self, method, url, max_queries, max_seconds, data=None, expected_status=200):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = getattr(self.client, method)(url, data, format='json')
+            elapsed = time.perf_counter() - started
+
+        self.assertEqual(response.status_code, expected_status, response.content[:500])
+        self.statements = statements(ctx.captured_queries)
+        queries = '\n'.join(q['sql'] for q in ctx.captured_queries)
+        self.assertLessEqual(
+            len(ctx), max_queries,
+            f"{method.upper()} {url}: {len(ctx)} consultas (presupuesto {max_queries}):\n{queries}")
+        self.assertLessEqual(
+            elapsed, max_seconds * TIME_FACTOR,
+            f"{method.upper()} {url}: {elapsed:.3f}s (techo {max_seconds * TIME_FACTOR:.3f}s)")
+        return response
+
+    def assertStatements(self, counts, expected):
+        """Nº exacto de sentencias por (tipo, tabla) para las claves de `expected`."""
+        self.assertEqual({key: counts[key] for key in expected}, expected, sorted(counts.items()))
+
+    # --- Lecturas del catálogo ---
+
+    def test_pmbok_process_list(self):
+        # +1: versión del catálogo (la lista serializada se cachea por versión)
+        response = self.assertWithinBudget('get', '/api/pmbok-processes/', 4, 5.0)
+        self.assertEqual(len(response.data), PMBOKProcess.objects.count())
+        # Segunda llamada: lista ya serializada en la caché de esta versión
+        self.assertWithinBudget('get', '/api/pmbok-processes/', 1, 1.0)
+
+    def test_pmbok_process_list_compact(self):
+        # Representación compacta: otra entrada de caché, mismas consultas
+        response = self.assertWithinBudget('get', '/api/pmbok-processes/?itto=compact', 4, 5.0)
+        self.assertEqual(len(response.data), PMBOKProcess.objects.count())
+
+    def test_scrum_process_list(self):
+        response = self.assertWithinBudget('get', '/api/scrum-processes/', 4, 5.0)
+        self.assertEqual(len(response.data), ScrumProcess.objects.count())
+
+    def test_scrum_process_list_compact(self):
+        response = self.assertWithinBudget('get', '/api/scrum-processes/?itto=compact', 4, 5.0)
+        self.assertEqual(len(response.data), ScrumProcess.objects.count())
+
+    def test_pmbok_process_detail(self):
+        self.assertWithinBudget('get', f'/api/pmbok-processes/{self.pmbok.id}/', 3, 1.0)
+
+    def test_department_list(self):
+        # +1: versión del catálogo (el árbol serializado se cachea por versión)
+        response = self.assertWithinBudget('get', '/api/departments/', 3, 1.0)
+        self.assertEqual(len(response.data), Department.objects.count())
+        self.assertWithinBudget('get', '/api/departments/', 1, 1.0)
+
+    def test_effective_endpoints(self):
+        url = f'/api/pmbok-processes/{self.pmbok.id}/effective/?country=co&department={self.department.id}'
+        self.assertWithinBudget('get', url, 4, 1.0)
+        self.assertWithinBudget('get', '/api/pmbok-processes/effective/?country=co', 3, 2.0)
+        # Segunda llamada: servida desde la caché (solo se lee la versión del catálogo)
+        self.assertWithinBudget('get', '/api/pmbok-processes/effective/?country=co', 1, 1.0)
+
+    # --- Escrituras ---
+
+    def test_customization_create(self):
+        payload = {
+            'process_id': self.pmbok.id, 'process_type': 'pmbok', 'country_code': 'br',
+            'inputs': self.pmbok.inputs, 'tools_and_techniques': self.pmbok.tools_and_techniques,
+            'outputs': self.pmbok.outputs, 'department_id': None,
+        }
+        # +5: resumen de progreso (bloqueo, alta del grupo nuevo, relectura y actualización)
+        self.assertWithinBudget('post', '/api/customizations/', 13, 1.0, payload, expected_status=201)
+        self.assertStatements(self.statements, {
+            ('INSERT', 'api_pmbokprocesscustomization'): 1,
+            # Resumen de progreso: bloqueo, alta del grupo 'br', relectura y suma en lote
+            ('SELECT', 'api_progresssummary'): 2,
+            ('INSERT', 'api_progresssummary'): 1,
+            ('UPDATE', 'api_progresssummary'): 1,
+            # Un alta no es una transición Kanban
+            ('INSERT', 'api_kanbantransition'): 0,
+        })
+
+    def test_customization_update_kanban_status(self):
+        url = f'/api/customizations/{self.customization.id}/update-kanban-status/'
+        # +5: savepoint y resumen de progreso (el grupo 'todo' aún no existe); +1: registro de la transición
+        self.assertWithinBudget('patch', url, 10, 1.0, {'kanban_status': 'todo'})
+        self.assertStatements(self.statements, {
+            # Lectura con bloqueo (SELECT ... FOR UPDATE en PostgreSQL) y UPDATE de la fila
+            ('SELECT', 'api_pmbokprocesscustomization'): 1,
+            ('UPDATE', 'api_pmbokprocesscustomization'): 1,
+            ('SELECT', 'api_progresssummary'): 2,
+            ('INSERT', 'api_progresssummary'): 1,
+            ('UPDATE', 'api_progresssummary'): 1,
+            ('INSERT', 'api_kanbantransition'): 1,
+        })
+
+    def test_bulk_update_kanban_status(self):
+        # La petición solo encola (INSERT del Job); el trabajo se mide aparte
+        process_ids = list(PMBOKProcess.objects.values_list('id', flat=True))
+        self.assertWithinBudget('post', '/api/pmbok-processes/bulk-update-kanban-status/', 1, 1.0,
+                                {'process_ids': process_ids, 'kanban_status': 'backlog'}, expected_status=202)
+        process_ids = list(ScrumProcess.objects.values_list('id', flat=True))
+        self.assertWithinBudget('post', '/api/scrum-processes/bulk-update-kanban-status/', 1, 1.0,
+                                {'process_ids': process_ids, 'kanban_status': 'backlog'}, expected_status=202)
+
+        # Por trabajo (un lote): reclamar, total, lote, progreso, resultado. Los deltas del
+        # resumen de progreso y el registro de transiciones (~1500 filas, INSERT de 1000) son
+        # un nº fijo de sentencias en PostgreSQL; en SQLite el límite de parámetros parte los
+        # INSERT/UPDATE en lotes (~170 grupos, ~110 transiciones por INSERT)
+        budget = 21 if connection.vendor == 'postgresql' else 40
+        for framework in ('pmbok', 'scrum'):
+            logged = KanbanTransition.objects.count()
+            with CaptureQueriesContext(connection) as ctx:
+                job = jobs.claim('budget')
+                jobs.run(job)
+            self.assertEqual(job.status, 'succeeded', job.error)
+            queries = '\n'.join(q['sql'] for q in ctx.captured_queries)
+            self.assertLessEqual(len(ctx), budget, f'{job.kind}: {len(ctx)} consultas:\n{queries}')
+
+            counts = statements(ctx.captured_queries)
+            logged = KanbanTransition.objects.count() - logged
+            self.assertStatements(counts, {
+                # Cola: reclamar (lectura + marca), total, progreso del lote y resultado
+                ('SELECT', 'api_job'): 1,
+                ('UPDATE', 'api_job'): 4,
+                # Un lote: filas bloqueadas y un UPDATE por modelo
+                ('SELECT', f'api_{framework}process'): 1,
+                ('SELECT', f'api_{framework}processcustomization'): 1,
+                ('UPDATE', f'api_{framework}process'): 1,
+                ('UPDATE', f'api_{framework}processcustomization'): 1,
+                # Deltas del resumen de progreso: bloqueo y relectura tras crear los grupos nuevos
+                ('SELECT', 'api_progresssummary'): 2,
+                # Registro de transiciones: solo los INSERT que exige el tamaño de lote
+                ('INSERT', 'api_kanbantransition'): insert_batches(
+                    KanbanTransition, logged, kanban_log.INSERT_BATCH),
+            })
+            if connection.vendor == 'postgresql':
+                self.assertStatements(counts, {('INSERT', 'api_progresssummary'): 1,
+                                               ('UPDATE', 'api_progresssummary'): 1})
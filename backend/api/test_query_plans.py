@@ -0,0 +1,71 @@
+# backend/api/test_query_plans.py
+"""
+Planes de ejecución (EXPLAIN) de los accesos frecuentes a personalizaciones sobre un
+catálogo sintético grande (bench_catalog). Comprueban que se usan los índices de
+`customization_indexes()` (api/models.py) y no un recorrido completo de la tabla.
+
+Los índices funcionales sobre UPPER(country_code) solo se verifican en PostgreSQL: en
+SQLite `__iexact` se traduce a LIKE y no los usa.
+"""
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from rest_framework.test import APITestCase
+
+from api.management.commands.bench_catalog import BENCH_PROCESS_OFFSET
+from api.models import PMBOKProcess, PMBOKProcessCustomization
+
+TABLE = PMBOKProcessCustomization._meta.db_table
+
+
+def is_postgres():
+    return connection.vendor == 'postgresql'
+
+
+class CustomizationQueryPlanTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # 200 procesos x 20 países x (país + 1 departamento) = 8000 filas por framework
+        call_command('bench_catalog', '--processes', '200', '--countries', '20', '--departments', '1',
+                     '--customizations-per-combination', '2', '--itto-size', '2', stdout=StringIO())
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {TABLE}' if is_postgres() else 'ANALYZE')
+        cls.process_ids = list(PMBOKProcess.objects.filter(
+            process_number__gte=BENCH_PROCESS_OFFSET).values_list('id', flat=True)[:20])
+
+    def explain(self, queryset):
+        return queryset.explain()
+
+    def assertUsesIndex(self, plan, index_name):
+        self.assertIn(index_name, plan, f'Se esperaba {index_name} en el plan:\n{plan}')
+
+    def assertNoFullScan(self, plan):
+        full_scan = 'Seq Scan' if is_postgres() else f'SCAN {TABLE}\n'
+        self.assertNotIn(full_scan, plan + '\n', f'Recorrido completo de la tabla:\n{plan}')
+
+    def test_prefetch_uses_process_recent_index_without_sort(self):
+        queryset = PMBOKProcessCustomization.objects.filter(
+            process_id__in=self.process_ids).order_by('process_id', '-updated_at')
+        plan = self.explain(queryset)
+        self.assertUsesIndex(plan, 'pmbok_cust_proc_recent_idx')
+        if not is_postgres():
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_bulk_kanban_filter_uses_an_index(self):
+        plan = self.explain(PMBOKProcessCustomization.objects.filter(
+            process_id__in=self.process_ids).order_by())
+        self.assertNoFullScan(plan)
+
+    @skipUnless(is_postgres(), 'Índice funcional UPPER(country_code): solo PostgreSQL')
+    def test_country_and_status_uses_covering_index(self):
+        plan = self.explain(PMBOKProcessCustomization.objects.filter(
+            country_code__iexact='AA', kanban_status='unassigned').order_by().values('process_id'))
+        self.assertUsesIndex(plan, 'pmbok_cust_country_status_idx')
+
+    @skipUnless(is_postgres(), 'Índice funcional UPPER(country_code): solo PostgreSQL')
+    def test_country_level_resolution_uses_partial_index(self):
+        plan = self.explain(PMBOKProcessCustomization.objects.filter(
+            country_code__iexact='aa', department__isnull=True).order_by())
+        self.assertUsesIndex(plan, 'pmbok_cust_country_lvl_idx')
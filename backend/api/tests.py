@@ -1,11 +1,58 @@
 # /webapps/erd-ecosystem/apps/pmbok/backend/api/tests.py
-from rest_framework.test import APITestCase
+import csv
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from io import BytesIO, StringIO
+from pathlib import Path
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DatabaseError, connection, transaction
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.middleware.csrf import CsrfViewMiddleware
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from prometheus_client import REGISTRY, generate_latest
+from prometheus_client.mmap_dict import MmapedDict, mmap_key
+from rest_framework.test import APITestCase, APITransactionTestCase
 from rest_framework import status
 from django.urls import reverse
 from api.models import (
-    CustomUser, PMBOKProcess, PMBOKProcessCustomization,
-    ProcessStatus, ProcessStage, Department
+    CustomUser, PMBOKProcess, PMBOKProcessCustomization, ScrumProcess, ScrumProcessCustomization,
+    ProcessStatus, ProcessStage, Department, StartupState, ProgressSummary, Job,
+    KanbanTransition, KANBAN_STATUS_CODES
 )
+from api import git_history, jobs, kanban_log, partitioning, singleflight
+from api import metrics as api_metrics
+from api.catalog import bump_catalog_version, get_catalog_version, memoize
+from api.itto import materialize_itto_list
+from api.itto_graph import clear_graphs
+from api.progress import computed_summary, stored_summary
+from api.management.commands.importtime import group_by_package, parse_importtime
+from core import gunicorn_conf, metrics as core_metrics
+from core.health import HealthCheckWSGIMiddleware, ReadinessCheck
+
+
+def run_queued_jobs():
+    # Como `run_jobs --burst`, pero sin cerrar la conexión de la transacción del test
+    while True:
+        job = jobs.claim('test')
+        if job is None:
+            return
+        jobs.run(job)
 
 
 class PMBOKProcessTests(APITestCase):
@@ -62,6 +109,20 @@ class PMBOKProcessTests(APITestCase):
         self.assertEqual(customization['country_code'], "CO")
         self.assertEqual(customization['inputs'][0]['name'], "Input Custom CO")
 
+    def test_process_list_reflects_status_and_stage_edits(self):
+        cache.clear()
+        self.assertEqual(self.client.get('/api/pmbok-processes/').data[0]['status']['name'], "Status Test")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.status.name = "Status Renombrado"
+            self.status.save()
+            self.stage.name = "Stage Renombrado"
+            self.stage.save()
+
+        process = self.client.get('/api/pmbok-processes/').data[0]
+        self.assertEqual(process['status']['name'], "Status Renombrado")
+        self.assertEqual(process['stage']['name'], "Stage Renombrado")
+
     def test_get_process_unauthenticated(self):
         """
         Debe rechazar usuarios anónimos (401 Unauthorized).
@@ -70,3 +131,1279 @@ class PMBOKProcessTests(APITestCase):
         url = f'/api/pmbok-processes/{self.process.id}/'
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class CustomizationITTOSchemaTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email='itto@test.com', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.process = PMBOKProcess.objects.create(
+            process_number=1, name="Test Process")
+
+    def test_create_stores_canonical_ittos(self):
+        """
+        Debe eliminar claves desconocidas, normalizar espacios y quitar duplicados.
+        """
+        payload = {
+            'process_id': self.process.id,
+            'process_type': 'pmbok',
+            'country_code': 'CO',
+            'inputs': [
+                {'id': 'uuid-1', 'name': '  Acta   de constitución ', 'url': '', 'isActive': False, 'versions': []},
+                {'id': 'uuid-2', 'name': 'Acta de constitución', 'url': ''},
+                {'name': 'Registro', 'url': 'https://x', 'versions': [{'id': 'v', 'name': 'V2', 'url': '', 'isActive': True}]},
+            ],
+            'tools_and_techniques': [],
+            'outputs': [],
+        }
+        response = self.client.post('/api/customizations/', payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        stored = PMBOKProcessCustomization.objects.get(pk=response.data['id'])
+        # La base está vacía: se guarda como diff, con los items ya canónicos
+        self.assertEqual(stored.inputs, {'add': [
+            {'name': 'Acta de constitución', 'url': ''},
+            {'name': 'Registro', 'url': 'https://x', 'versions': [{'name': 'V2', 'url': '', 'isActive': True}]},
+        ], 'remove': []})
+
+    def test_create_rejects_invalid_ittos(self):
+        payload = {
+            'process_id': self.process.id,
+            'process_type': 'pmbok',
+            'country_code': 'CO',
+            'inputs': [{'url': 'sin nombre'}],
+            'tools_and_techniques': 'no es una lista',
+            'outputs': [],
+        }
+        response = self.client.post('/api/customizations/', payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('inputs', response.data)
+        self.assertIn('tools_and_techniques', response.data)
+        self.assertFalse(PMBOKProcessCustomization.objects.exists())
+
+    def test_canonicalize_command_rewrites_existing_rows(self):
+        customization = PMBOKProcessCustomization.objects.create(
+            process=self.process, country_code='CO',
+            inputs=[{'id': 'a', 'name': 'X', 'url': ''}, {'id': 'b', 'name': 'X', 'url': ''}])
+
+        call_command('canonicalize_ittos', batch_size=1, stdout=StringIO())
+
+        customization.refresh_from_db()
+        self.assertEqual(customization.inputs, {'add': [{'name': 'X', 'url': ''}], 'remove': []})
+
+
+class EffectiveITTOTests(APITransactionTestCase):
+    # Transaccional: la versión del catálogo se incrementa al hacer commit
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            email='effective@test.com', password='password123')
+        self.client.force_authenticate(user=self.user)
+
+        self.parent = Department.objects.create(name="Tecnología")
+        self.child = Department.objects.create(name="DevOps", parent=self.parent)
+        self.process = PMBOKProcess.objects.create(
+            process_number=1, name="Test Process",
+            inputs=[{"name": "Base", "url": ""}],
+            outputs=[{"name": "Salida Base", "url": ""}])
+        self.other = PMBOKProcess.objects.create(
+            process_number=2, name="Other", inputs=[{"name": "Otro", "url": ""}])
+
+        PMBOKProcessCustomization.objects.create(
+            process=self.process, country_code="co",
+            inputs=[{"name": "País", "url": ""}], kanban_status='todo')
+        PMBOKProcessCustomization.objects.create(
+            process=self.process, country_code="co", department=self.parent,
+            inputs=[{"name": "Padre", "url": ""}], kanban_status='in_progress')
+
+    def test_effective_follows_department_parent(self):
+        """
+        El subdepartamento sin personalización hereda la de su departamento padre.
+        """
+        url = f'/api/pmbok-processes/{self.process.id}/effective/?country=CO&department={self.child.id}'
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['inputs'], [{"name": "Padre", "url": ""}])
+        self.assertEqual(response.data['kanban_status'], 'in_progress')
+        self.assertEqual([s['level'] for s in response.data['sources']], ['base', 'country', 'department'])
+
+    def test_effective_country_only_and_cache_invalidation(self):
+        url = f'/api/pmbok-processes/{self.process.id}/effective/?country=co'
+        self.assertEqual(self.client.get(url).data['inputs'], [{"name": "País", "url": ""}])
+
+        PMBOKProcessCustomization.objects.filter(department__isnull=True).get().delete()
+
+        self.assertEqual(self.client.get(url).data['inputs'], [{"name": "Base", "url": ""}])
+
+    def test_bulk_effective(self):
+        response = self.client.get('/api/pmbok-processes/effective/?country=co')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([p['process_number'] for p in response.data], [1, 2])
+        self.assertEqual(response.data[1]['inputs'], [{"name": "Otro", "url": ""}])
+
+    def test_catalog_version_bumps_once_per_commit(self):
+        start = get_catalog_version()
+        with transaction.atomic():
+            for _ in range(3):
+                bump_catalog_version()
+            self.assertEqual(get_catalog_version(), start)
+        self.assertEqual(get_catalog_version(), start + 1)
+
+        # El rollback de un savepoint descarta su callback; el siguiente aviso lo repone
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    bump_catalog_version()
+                    raise DatabaseError('rollback')
+            except DatabaseError:
+                pass
+            bump_catalog_version()
+        self.assertEqual(get_catalog_version(), start + 2)
+
+        # Tras un rollback completo no queda nada pendiente que impida el siguiente
+        with self.assertRaises(DatabaseError), transaction.atomic():
+            bump_catalog_version()
+            raise DatabaseError('rollback')
+        self.assertEqual(get_catalog_version(), start + 2)
+        with transaction.atomic():
+            bump_catalog_version()
+        self.assertEqual(get_catalog_version(), start + 3)
+
+    def test_case_variants_resolve_to_the_latest_edit(self):
+        url = f'/api/pmbok-processes/{self.process.id}/effective/?country=co'
+        upper = PMBOKProcessCustomization.objects.create(
+            process=self.process, country_code="CO", inputs=[{"name": "Mayúsculas", "url": ""}])
+        self.assertEqual(self.client.get(url).data['inputs'], [{"name": "Mayúsculas", "url": ""}])
+
+        lower = PMBOKProcessCustomization.objects.get(country_code="co", department__isnull=True)
+        lower.save()
+        response = self.client.get(url)
+        self.assertEqual(response.data['inputs'], [{"name": "País", "url": ""}])
+        self.assertEqual([s.get('customization_id') for s in response.data['sources']],
+                         [None, upper.id, lower.id])
+
+    def test_effective_requires_country(self):
+        response = self.client.get(f'/api/pmbok-processes/{self.process.id}/effective/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ReferenceCustomizationTests(APITestCase):
+    """Personalizaciones guardadas como herencia o diff respecto a los ITTOs base."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(email='ref@test.com', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.base = [{'name': f'Entrada {n}', 'url': ''} for n in range(1, 6)]
+        self.process = PMBOKProcess.objects.create(
+            process_number=1, name='Proceso', inputs=self.base,
+            tools_and_techniques=[{'name': 'Juicio de expertos', 'url': ''}],
+            outputs=[{'name': 'Salida', 'url': ''}])
+
+    def customize(self, inputs):
+        response = self.client.post('/api/customizations/', {
+            'process_id': self.process.id, 'process_type': 'pmbok', 'country_code': 'co',
+            'inputs': inputs, 'tools_and_techniques': [], 'outputs': self.process.outputs,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response, PMBOKProcessCustomization.objects.get(pk=response.data['id'])
+
+    def test_unchanged_copy_is_stored_as_inherit(self):
+        response, stored = self.customize(self.base)
+        self.assertIsNone(stored.inputs)
+        self.assertIsNone(stored.outputs)
+        self.assertEqual(stored.tools_and_techniques, {'add': [], 'remove': self.process.tools_and_techniques})
+        self.assertEqual(response.data['inputs'], self.base)
+        self.assertEqual(response.data['tools_and_techniques'], [])
+
+    def test_small_change_is_stored_as_diff(self):
+        edited = self.base[1:] + [{'name': 'Nueva', 'url': ''}]
+        response, stored = self.customize(edited)
+        self.assertEqual(stored.inputs, {'add': [{'name': 'Nueva', 'url': ''}], 'remove': [self.base[0]]})
+        self.assertEqual(response.data['inputs'], edited)
+
+    def test_large_change_still_inherits_base_additions(self):
+        # El tamaño del cambio no decide: quitar casi todo sigue siendo un diff
+        _, stored = self.customize(self.base[:1])
+        self.assertEqual(stored.inputs, {'add': [], 'remove': self.base[1:]})
+        added = {'name': 'Añadida en la base', 'url': ''}
+        self.process.inputs = self.base + [added]
+        self.process.save()
+        self.assertEqual(materialize_itto_list(self.process.inputs, stored.inputs), [self.base[0], added])
+
+    def test_reorder_is_stored_as_full_list(self):
+        reordered = list(reversed(self.base))
+        _, stored = self.customize(reordered)
+        self.assertEqual(stored.inputs, reordered)
+
+    def test_process_list_materializes_or_returns_null_in_compact_mode(self):
+        self.customize(self.base)
+        full = self.client.get('/api/pmbok-processes/').data[0]['customizations'][0]
+        compact = self.client.get('/api/pmbok-processes/?itto=compact').data[0]['customizations'][0]
+        self.assertEqual(full['inputs'], self.base)
+        self.assertIsNone(compact['inputs'])
+        self.assertEqual(compact['tools_and_techniques'], [])
+
+    def test_canonicalize_command_converts_copies_to_references(self):
+        customization = PMBOKProcessCustomization.objects.create(
+            process=self.process, country_code='pe', inputs=list(self.base),
+            tools_and_techniques=[], outputs=[{'name': 'Salida', 'url': '', 'id': 'x'}])
+
+        call_command('canonicalize_ittos', stdout=StringIO())
+
+        customization.refresh_from_db()
+        self.assertEqual((customization.inputs, customization.outputs), (None, None))
+        self.assertEqual(customization.tools_and_techniques,
+                         {'add': [], 'remove': self.process.tools_and_techniques})
+        # Una personalización ya heredada sigue heredando
+        call_command('canonicalize_ittos', stdout=StringIO())
+        customization.refresh_from_db()
+        self.assertIsNone(customization.inputs)
+
+
+class ITTOGraphTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        clear_graphs()
+        self.user = CustomUser.objects.create_user(email='graph@test.com', password='password123')
+        self.client.force_authenticate(user=self.user)
+        planning, execution = ProcessStage.objects.create(name='Planificación'), ProcessStage.objects.create(name='Ejecución')
+        self.planning = planning
+
+        def item(name):
+            return {'name': name, 'url': ''}
+
+        def process(number, stage, inputs=(), outputs=()):
+            return PMBOKProcess.objects.create(
+                process_number=number, name=f'Proceso {number}', stage=stage,
+                inputs=[item(n) for n in inputs], outputs=[item(n) for n in outputs])
+
+        self.p1 = process(1, planning, outputs=['Acta'])
+        self.p2 = process(2, planning, inputs=['  acta '], outputs=['Plan'])
+        self.p3 = process(3, planning, inputs=['Plan'], outputs=['Registro'])
+        self.p4 = process(4, execution, inputs=['Plan', 'Registro'], outputs=['Informe'])
+        self.p5 = process(5, planning, outputs=['Acta'])
+        self.p6 = process(6, execution, inputs=['Informe'])
+
+    def ids(self, items):
+        return [item['id'] for item in items]
+
+    def test_neighbours_with_depth(self):
+        response = self.client.get(f'/api/pmbok-processes/{self.p2.id}/graph/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.ids(response.data['upstream']), [self.p1.id, self.p5.id])
+        self.assertEqual(self.ids(response.data['downstream']), [self.p3.id, self.p4.id])
+        self.assertEqual(response.data['upstream'][0]['artifacts'], ['Acta'])
+
+        response = self.client.get(f'/api/pmbok-processes/{self.p2.id}/graph/?direction=downstream&depth=0')
+        self.assertNotIn('upstream', response.data)
+        self.assertEqual(self.ids(response.data['downstream']), [self.p3.id, self.p4.id, self.p6.id])
+
+    def test_topological_order_of_a_stage(self):
+        response = self.client.get(f'/api/pmbok-processes/graph/order/?area={self.planning.id}')
+        self.assertEqual(self.ids(response.data['order']), [self.p1.id, self.p5.id, self.p2.id, self.p3.id])
+        self.assertEqual(response.data['cycles'], [])
+
+    def test_impact_of_removing_an_output(self):
+        # Acta tiene otro productor: no se rompe nada
+        data = self.client.get(f'/api/pmbok-processes/{self.p1.id}/graph/impact/?output=acta').data
+        self.assertEqual((data['artifacts'][0]['breaks'], data['broken']), (False, []))
+
+        data = self.client.get(f'/api/pmbok-processes/{self.p2.id}/graph/impact/').data
+        self.assertEqual(self.ids(data['broken']), [self.p3.id, self.p4.id])
+        self.assertEqual(self.ids(data['transitively_affected']), [self.p6.id])
+
+        response = self.client.get(f'/api/pmbok-processes/{self.p2.id}/graph/impact/?output=Informe')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_country_graph_uses_effective_ittos_and_reports_cycles(self):
+        PMBOKProcessCustomization.objects.create(
+            process=self.p1, country_code='co', inputs=[{'name': 'Registro', 'url': ''}])
+        data = self.client.get(f'/api/pmbok-processes/graph/order/?area={self.planning.id}&country=CO').data
+        self.assertEqual(self.ids(data['order']), [self.p5.id, self.p1.id, self.p2.id, self.p3.id])
+        self.assertEqual(self.ids(data['cycles']), [self.p1.id, self.p2.id, self.p3.id])
+        # El grafo base no cambia
+        data = self.client.get(f'/api/pmbok-processes/graph/order/?area={self.planning.id}').data
+        self.assertEqual(data['cycles'], [])
+
+    def test_graph_is_served_from_memory(self):
+        url = f'/api/pmbok-processes/{self.p2.id}/graph/'
+        self.client.get(url)
+        with self.assertNumQueries(1):  # solo la versión del catálogo
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get('/api/pmbok-processes/999/graph/').status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+
+class GitHistoryLayoutTests(SimpleTestCase):
+    def commits(self):
+        # Orden topológico (hijos primero): M fusiona la rama F sobre A; ambas salen de B
+        return [{'id': 'M', 'parents': ['A', 'F']}, {'id': 'F', 'parents': ['B']},
+                {'id': 'A', 'parents': ['B']}, {'id': 'B', 'parents': []}]
+
+    def test_lanes_merges_and_branch_points(self):
+        commits, edges, width = git_history.layout(self.commits())
+        self.assertEqual([(c['id'], c['row'], c['column']) for c in commits],
+                         [('M', 0, 0), ('F', 1, 1), ('A', 2, 0), ('B', 3, 0)])
+        self.assertEqual(width, 2)
+        self.assertTrue(commits[0]['is_merge'])
+        self.assertTrue(commits[3]['is_branch_point'])
+        merge = next(edge for edge in edges if edge['type'] == 'merge')
+        self.assertEqual((merge['source'], merge['target'], merge['target_column']), ('M', 'F', 1))
+
+    def test_window_returns_edges_leaving_the_rows(self):
+        commits, edges, width = git_history.layout(self.commits())
+        data = {'state': 'x', 'commits': commits, 'edges': edges, 'columns': width}
+        page = git_history.window(data, offset=1, limit=2)
+        self.assertEqual([c['id'] for c in page['commits']], ['F', 'A'])
+        self.assertEqual([(e['source'], e['target']) for e in page['edges']], [('F', 'B'), ('A', 'B')])
+        self.assertEqual((page['total'], page['next_offset']), (4, 3))
+        self.assertIsNone(git_history.window(data, offset=3, limit=2)['next_offset'])
+
+    @skipUnless(shutil.which('git'), 'Requiere git')
+    def test_snapshot_is_cached_per_repository_state(self):
+        repo = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, repo)
+        git = ['git', '-C', repo, '-c', 'user.name=Test', '-c', 'user.email=t@t.com']
+        subprocess.run(git[:3] + ['init', '-q'], check=True)
+        subprocess.run(git + ['commit', '-q', '--allow-empty', '-m', 'uno'], check=True)
+        cache.clear()
+
+        first = git_history.snapshot(repo)
+        with mock.patch.object(git_history, 'read_commits') as read_commits:
+            self.assertEqual(git_history.snapshot(repo), first)
+            read_commits.assert_not_called()
+        subprocess.run(git + ['commit', '-q', '--allow-empty', '-m', 'dos'], check=True)
+        second = git_history.snapshot(repo)
+        self.assertNotEqual(second['state'], first['state'])
+        self.assertEqual([c['message'] for c in second['commits']], ['dos', 'uno'])
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='export@test.com', password='password123')
+        self.client.force_authenticate(user=self.user)
+        stage = ProcessStage.objects.create(name='Inicio')
+        self.process = PMBOKProcess.objects.create(
+            process_number=1, name='Acta', stage=stage,
+            inputs=[{'name': 'Caso de negocio', 'url': ''}, {'name': 'Acuerdos', 'url': 'https://x'}],
+            outputs=[{'name': 'Acta', 'url': ''}])
+        PMBOKProcess.objects.create(process_number=2, name='Sin ITTOs')
+        # Hereda las entradas y cambia las salidas
+        PMBOKProcessCustomization.objects.create(
+            process=self.process, country_code='CO', outputs=[{'name': 'Acta CO', 'url': ''}])
+
+    def download(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content)
+
+    def test_csv_flattens_ittos_and_materializes_inherited_fields(self):
+        body = self.download('/api/export/?framework=pmbok&format=csv')
+        rows = list(csv.DictReader(StringIO(body.decode('utf-8-sig'))))
+        # Base: 3 ítems + 1 fila del proceso sin ITTOs; personalización: 2 heredados + 1 propio
+        self.assertEqual([row['level'] for row in rows], ['base'] * 4 + ['country'] * 3)
+        country = [row for row in rows if row['level'] == 'country']
+        self.assertEqual([(row['itto_field'], row['item_name']) for row in country], [
+            ('inputs', 'Caso de negocio'), ('inputs', 'Acuerdos'), ('outputs', 'Acta CO')])
+        self.assertEqual((country[0]['country_code'], country[0]['area']), ('co', 'Inicio'))
+
+    def test_ndjson_filtered_by_country(self):
+        body = self.download('/api/export/?framework=all&country=co&format=ndjson')
+        rows = [json.loads(line) for line in body.decode('utf-8').splitlines()]
+        self.assertEqual({row['level'] for row in rows}, {'country'})
+        self.assertEqual(len(rows), 3)
+
+    def test_xlsx_is_a_valid_workbook(self):
+        body = self.download('/api/export/?framework=pmbok&format=xlsx')
+        with zipfile.ZipFile(BytesIO(body)) as workbook:
+            self.assertIn('xl/workbook.xml', workbook.namelist())
+            sheet = workbook.read('xl/worksheets/sheet1.xml').decode('utf-8')
+        self.assertEqual(sheet.count('<row>'), 8)  # cabecera + 7 filas
+        self.assertIn('Caso de negocio', sheet)
+
+    def test_rejects_invalid_parameters(self):
+        response = self.client.get('/api/export/?framework=kanban')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # El país va en Content-Disposition: comillas o saltos de línea romperían la cabecera
+        for country in ('c"o', 'c%0Ao', 'col'):
+            self.assertEqual(self.client.get(f'/api/export/?country={country}').status_code,
+                             status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.post('/api/export/', {'country': 'c"'}, format='json').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+    def test_expired_export_files_are_purged(self):
+        export_root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, export_root)
+        old, fresh = export_root / '1.csv', export_root / '2.csv.part'
+        old.write_text('x')
+        fresh.write_text('x')
+        two_days_ago = time.time() - 48 * 3600
+        os.utime(old, (two_days_ago, two_days_ago))
+
+        with override_settings(EXPORT_ROOT=export_root, EXPORT_TTL_HOURS=24):
+            call_command('run_jobs', '--burst', stdout=StringIO())
+
+        self.assertFalse(old.exists())
+        self.assertTrue(fresh.exists())
+
+    def test_background_export_job(self):
+        export_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, export_root)
+        with override_settings(EXPORT_ROOT=Path(export_root)):
+            response = self.client.post('/api/export/', {'framework': 'pmbok', 'format': 'ndjson'}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            run_queued_jobs()
+            job = Job.objects.get(pk=response.data['job_id'])
+            self.assertEqual((job.status, job.progress, job.total), ('succeeded', 3, 3))
+            download = self.client.get(job.result['download'])
+            self.assertEqual(download.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(b''.join(download.streaming_content).splitlines()), 7)
+
+            other = CustomUser.objects.create_user(email='other@test.com', password='password123')
+            self.client.force_authenticate(user=other)
+            self.assertEqual(self.client.get(job.result['download']).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class BulkImportTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(email='import@test.com', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.department = Department.objects.create(name='Compras')
+        self.base = [{'name': 'Base', 'url': ''}]
+        self.p1 = PMBOKProcess.objects.create(process_number=1, name='Uno', inputs=self.base)
+        self.p2 = PMBOKProcess.objects.create(process_number=2, name='Dos', inputs=self.base)
+        # Nivel país existente con el país en mayúsculas: se actualiza, no se duplica
+        self.existing = PMBOKProcessCustomization.objects.create(
+            process=self.p1, country_code='CO', kanban_status='done', inputs=[{'name': 'Vieja', 'url': ''}])
+
+    def upload(self, name, content, **data):
+        upload = SimpleUploadedFile(name, content.encode('utf-8'))
+        return self.client.post('/api/customizations/import/', {'file': upload, **data}, format='multipart')
+
+    def test_csv_upserts_and_reports_row_errors(self):
+        content = (
+            'framework,process_number,country_code,department_id,inputs,kanban_status\n'
+            'pmbok,1,co,,"[{""name"": ""Nueva"", ""url"": """"}]",\n'
+            f'pmbok,2,co,{self.department.id},,in_progress\n'
+            'pmbok,99,co,,,\n'
+            'pmbok,2,co,999,,\n'
+            'pmbok,2,pe,,,estado\n'
+            'pmbok,1,CO,,,\n'
+            'pmbok,2,x,,,\n'
+            'pmbok,2,1a,,,\n'
+        )
+        response = self.upload('co.csv', content)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual((response.data['updated'], response.data['inserted']), (1, 1))
+        self.assertEqual([error['line'] for error in response.data['errors']], [4, 5, 6, 7, 8, 9])
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.inputs, self.existing.kanban_status), (
+            {'add': [{'name': 'Nueva', 'url': ''}], 'remove': [{'name': 'Base', 'url': ''}]}, 'done'))
+        created = PMBOKProcessCustomization.objects.get(process=self.p2, department=self.department)
+        # ITTOs vacíos = heredar la base
+        self.assertEqual((created.country_code, created.inputs, created.kanban_status), ('co', None, 'in_progress'))
+        self.assertEqual(PMBOKProcessCustomization.objects.filter(country_code__iexact='co').count(), 2)
+
+    def test_ndjson_dry_run_and_strict(self):
+        content = '\n'.join(json.dumps(row) for row in [
+            {'framework': 'pmbok', 'process_number': 2, 'country': 'mx', 'inputs': self.base},
+            {'framework': 'scrum', 'process_number': 1, 'country': 'mx'},
+        ])
+        response = self.upload('mx.ndjson', content, dry_run=True)
+        self.assertEqual((response.data['inserted'], len(response.data['errors'])), (1, 1))
+        self.assertFalse(PMBOKProcessCustomization.objects.filter(country_code='mx').exists())
+
+        response = self.upload('mx.ndjson', content, strict=True)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(PMBOKProcessCustomization.objects.filter(country_code='mx').exists())
+
+    def test_command_imports_and_updates_progress_summary(self):
+        call_command('rebuild_progress', stdout=StringIO())
+        path = os.path.join(tempfile.mkdtemp(), 'ar.ndjson')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, 'w', encoding='utf-8') as handle:
+            for number in (1, 2):
+                handle.write(json.dumps({'framework': 'pmbok', 'process_number': number, 'country_code': 'ar'}) + '\n')
+
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_customizations', path, stdout=out)
+
+        self.assertIn('2 creadas', out.getvalue())
+        self.assertEqual(stored_summary('pmbok'), computed_summary('pmbok'))
+
+
+class ProfilingMiddlewareTests(APITestCase):
+    def setUp(self):
+        self.process = PMBOKProcess.objects.create(process_number=1, name="Test Process")
+
+    def get_with_header(self, email, **extra):
+        CustomUser.objects.create_user(email=email, password='password123', **extra)
+        token = self.client.post('/api/token/', {'email': email, 'password': 'password123'},
+                                 format='json').data['access']
+        return self.client.get('/api/pmbok-processes/', HTTP_X_PROFILE='1', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def profiled_requests(self):
+        return REGISTRY.get_sample_value('pmbok_request_sql_queries_count', {'view': 'pmbokprocess-list'}) or 0
+
+    def test_server_timing_for_staff_with_header(self):
+        before = self.profiled_requests()
+
+        response = self.get_with_header('staff@test.com', is_staff=True)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timing = response['Server-Timing']
+        for metric in ('db;dur=', 'serialize;dur=', 'render;dur=', 'total;dur='):
+            self.assertIn(metric, timing)
+        # Solo el muestreo alimenta los histogramas
+        self.assertEqual(self.profiled_requests(), before)
+
+    def test_header_is_ignored_for_regular_and_anonymous_users(self):
+        with mock.patch('api.profiling._wrap_connections') as wrap:
+            response = self.get_with_header('user@test.com')
+            anonymous = self.client.get('/api/pmbok-processes/', HTTP_X_PROFILE='1')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(anonymous.status_code, status.HTTP_401_UNAUTHORIZED)
+        wrap.assert_not_called()
+
+
+class BusinessMetricsTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='metrics@test.com', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.process = PMBOKProcess.objects.create(process_number=1, name="Test Process")
+        PMBOKProcessCustomization.objects.create(
+            process=self.process, country_code='co', kanban_status='todo')
+
+    def sample(self, name, labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_bulk_update_counts_transitions_and_rows(self):
+        labels = {'framework': 'pmbok', 'from_status': 'todo', 'to_status': 'done'}
+        before = self.sample('pmbok_kanban_transitions_total', labels)
+        rows_before = self.sample('pmbok_bulk_operation_rows_sum',
+                                  {'framework': 'pmbok', 'operation': 'bulk_kanban'})
+
+        response = self.client.post('/api/pmbok-processes/bulk-update-kanban-status/',
+                                    {'process_ids': [self.process.id], 'kanban_status': 'done'},
+                                    format='json')
+        run_queued_jobs()
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(self.sample('pmbok_kanban_transitions_total', labels), before + 1)
+        # 1 personalización + 1 proceso base
+        self.assertEqual(self.sample('pmbok_bulk_operation_rows_sum',
+                                     {'framework': 'pmbok', 'operation': 'bulk_kanban'}), rows_before + 2)
+
+    def test_kanban_labels_are_bounded_to_known_statuses(self):
+        customization = PMBOKProcessCustomization.objects.get()
+        url = f'/api/customizations/{customization.id}/update-kanban-status/'
+        # Estado ajeno en la columna (admin, SQL a mano): no crea una serie nueva
+        PMBOKProcessCustomization.objects.filter(pk=customization.pk).update(kanban_status='x' * 20)
+        labels = {'framework': 'pmbok', 'from_status': 'other', 'to_status': 'done'}
+        before = self.sample('pmbok_kanban_transitions_total', labels)
+
+        self.assertEqual(self.client.patch(url, {'kanban_status': 'y' * 20}, format='json').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.patch(url, {'kanban_status': 'done'}, format='json').status_code,
+                         status.HTTP_200_OK)
+        self.assertEqual(self.sample('pmbok_kanban_transitions_total', labels), before + 1)
+        self.assertIsNone(REGISTRY.get_sample_value(
+            'pmbok_kanban_transitions_total', {'framework': 'pmbok', 'from_status': 'x' * 20, 'to_status': 'done'}))
+
+    def test_inventory_has_no_country_label(self):
+        cache.clear()
+        api_metrics.refresh_inventory()
+        self.assertEqual(self.sample('pmbok_customizations',
+                                     {'framework': 'pmbok', 'level': 'country'}), 1)
+        self.assertEqual(self.sample('pmbok_customization_countries', {'framework': 'pmbok'}), 1)
+
+
+class KanbanTransitionLogTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='kanban@test.com', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.stage = ProcessStage.objects.create(name='Ejecución')
+        self.process = PMBOKProcess.objects.create(process_number=1, name='Proceso 1', stage=self.stage)
+        self.customization = PMBOKProcessCustomization.objects.create(process=self.process, country_code='CO')
+
+    def test_write_paths_append_transitions(self):
+        url = f'/api/customizations/{self.customization.id}/update-kanban-status/'
+        self.client.patch(url, {'kanban_status': 'in_progress'}, format='json')
+        self.client.patch(url, {'kanban_status': 'in_progress'}, format='json')  # sin cambio: sin fila
+        self.assertEqual(self.client.patch(url, {'kanban_status': 'hecho'}, format='json').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.client.post('/api/pmbok-processes/bulk-update-kanban-status/',
+                         {'process_ids': [self.process.id], 'kanban_status': 'done'}, format='json')
+        run_queued_jobs()
+
+        rows = list(KanbanTransition.objects.order_by('id').values_list(
+            'item_key', 'country_code', 'area_key', 'from_status', 'to_status'))
+        codes = KANBAN_STATUS_CODES
+        self.assertEqual(rows, [
+            (self.customization.id, 'co', self.stage.id, codes['unassigned'], codes['in_progress']),
+            (self.customization.id, 'co', self.stage.id, codes['in_progress'], codes['done']),
+            (0, '', self.stage.id, codes['unassigned'], codes['done']),  # proceso base
+        ])
+
+    def log(self, item, country, *steps):
+        start = timezone.now() - timedelta(days=10)
+        previous = 'unassigned'
+        for hours, new_status in steps:
+            kanban_log.record([kanban_log.transition('pmbok', self.process.id, previous, new_status, item, country,
+                                                     at=start + timedelta(hours=hours))])
+            previous = new_status
+
+    def test_cycle_time_percentiles_and_throughput_are_computed_per_group(self):
+        # Lead desde la primera transición de la vuelta; cycle desde la última entrada en curso
+        self.log(1, 'co', (0, 'todo'), (10, 'in_progress'), (14, 'done'))
+        self.log(2, 'co', (0, 'in_progress'), (8, 'done'))
+        self.log(3, 'co', (0, 'todo'), (2, 'done'))  # sin pasar por en curso: sin cycle time
+        # Reabierta: cada vuelta se mide por separado
+        self.log(4, 'ar', (0, 'in_progress'), (1, 'done'), (5, 'todo'), (6, 'in_progress'), (9, 'done'))
+        self.log(5, 'ar', (0, 'in_progress'))  # sin entregar
+
+        report = kanban_log.cycle_time_report('pmbok', days=14, group_by=['country'])
+
+        ar, co = report['groups']
+        self.assertEqual((co['country_code'], co['completed'], co['throughput_per_week']), ('co', 3, 1.5))
+        self.assertEqual(co['cycle_time_hours'], {'p50': 4.0, 'p85': 8.0, 'p95': 8.0, 'avg': 6.0})
+        self.assertEqual(co['lead_time_hours'], {'p50': 8.0, 'p85': 14.0, 'p95': 14.0, 'avg': 8.0})
+        self.assertEqual((ar['country_code'], ar['completed']), ('ar', 2))
+        self.assertEqual(ar['cycle_time_hours']['avg'], 2.0)
+        self.assertEqual(ar['lead_time_hours']['p95'], 4.0)
+        # Fuera de la ventana no hay entregas
+        self.assertEqual(kanban_log.cycle_time_report('pmbok', days=5)['groups'], [])
+
+    def test_deliveries_in_the_window_read_their_whole_history(self):
+        # Empezada antes de la ventana de 5 días y entregada dentro: el lead time la incluye
+        self.log(1, 'co', (0, 'in_progress'), (216, 'done'))
+        self.log(2, 'co', (0, 'in_progress'), (24, 'done'))  # entregada fuera de la ventana
+
+        [group] = kanban_log.cycle_time_report('pmbok', days=5, group_by=['country'])['groups']
+
+        self.assertEqual(group['completed'], 1)
+        self.assertEqual(group['lead_time_hours']['p50'], 216.0)
+
+    def test_unknown_stored_status_is_not_logged(self):
+        self.assertIsNone(kanban_log.transition('pmbok', self.process.id, 'x' * 20, 'done'))
+        self.assertIsNotNone(kanban_log.transition('pmbok', self.process.id, 'todo', 'done'))
+
+    def test_status_codes_are_fixed(self):
+        # Valores guardados en la historia: no dependen del orden de KANBAN_STATUS_CHOICES
+        self.assertEqual(KANBAN_STATUS_CODES, {'unassigned': 0, 'backlog': 1, 'todo': 2,
+                                               'in_progress': 3, 'in_review': 4, 'done': 5})
+
+    def test_analytics_endpoint_filters_and_validates(self):
+        self.log(1, 'co', (0, 'in_progress'), (6, 'done'))
+        self.log(2, 'ar', (0, 'in_progress'), (6, 'done'))
+
+        response = self.client.get('/api/kanban-analytics/?framework=pmbok&country=CO&department=0')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [group] = response.data['groups']
+        self.assertEqual((group['country_code'], group['department_id'], group['area_id']), ('co', None, None))
+        self.assertEqual(group['cycle_time_hours']['p50'], 6.0)
+        self.assertEqual(self.client.get('/api/kanban-analytics/?group_by=status').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/api/kanban-analytics/?days=-1').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+
+class CustomizationPartitioningTests(APITestCase):
+    def setUp(self):
+        self.process = PMBOKProcess.objects.create(process_number=1, name='Proceso 1')
+
+    def test_country_filter_matches_every_case_variant(self):
+        self.assertEqual(partitioning.case_variants('co'), ['CO', 'Co', 'cO', 'co'])
+        for country_code in ('CO', 'cO', 'ar'):
+            PMBOKProcessCustomization.objects.create(process=self.process, country_code=country_code)
+        self.assertEqual(PMBOKProcessCustomization.objects.filter(
+            partitioning.country_filter('co', PMBOKProcessCustomization)).count(), 2)
+        with self.assertRaises(partitioning.PartitioningError):
+            partitioning.partition_name('api_pmbokprocesscustomization', 'c; DROP')
+        # 2^n variantes: nunca para texto arbitrario
+        with self.assertRaises(partitioning.PartitioningError):
+            partitioning.case_variants('a' * 18)
+
+    def test_flat_tables_filter_without_case_variants(self):
+        sql = str(PMBOKProcessCustomization.objects.filter(
+            partitioning.country_filter('co', PMBOKProcessCustomization)).query)
+        self.assertNotIn(' IN (', sql)
+
+    def test_api_rejects_country_codes_that_are_not_two_letters(self):
+        self.client.force_authenticate(user=CustomUser.objects.create_user(email='ana@test.com', password='x'))
+        for url in ('/api/pmbok-processes/effective/?country=' + 'a' * 18,
+                    f'/api/pmbok-processes/{self.process.id}/effective/?country=c',
+                    '/api/pmbok-processes/graph/order/?country=c%22o',
+                    '/api/export/?country=c%0Ao',
+                    '/api/progress/?country=col',
+                    '/api/kanban-analytics/?country=1'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+
+    @skipUnless(connection.vendor != 'postgresql', 'Comprueba el error fuera de PostgreSQL')
+    def test_commands_require_postgresql(self):
+        with self.assertRaisesMessage(CommandError, 'requiere PostgreSQL'):
+            call_command('customization_partitions', 'status', stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, '--yes'):
+            call_command('customization_partitions', 'drop', 'co', stdout=StringIO())
+
+    @skipUnless(connection.vendor == 'postgresql', 'El particionado requiere PostgreSQL')
+    def test_country_partitions_keep_orm_access_and_drop_instantly(self):
+        PMBOKProcessCustomization.objects.create(process=self.process, country_code='co')
+        PMBOKProcessCustomization.objects.create(process=self.process, country_code='AR')
+        partitioning.enable('pmbok')
+        table = PMBOKProcessCustomization._meta.db_table
+
+        # País nuevo en la partición por defecto, luego movido a la suya
+        PMBOKProcessCustomization.objects.create(process=self.process, country_code='cl')
+        self.assertEqual(partitioning.create('cl', 'pmbok'), {table: 1})
+        names = [name for name, _, _ in partitioning.status('pmbok')[table]]
+        self.assertEqual(names, [f'{table}_ar', f'{table}_cl', f'{table}_co', f'{table}_default'])
+        customization = PMBOKProcessCustomization.objects.get(country_code='AR')
+        customization.kanban_status = 'done'
+        customization.save()
+
+        self.assertEqual(partitioning.drop('ar', 'pmbok'), [f'{table}_ar'])
+        self.assertFalse(PMBOKProcessCustomization.objects.filter(
+            partitioning.country_filter('ar', PMBOKProcessCustomization)).exists())
+        self.assertEqual(PMBOKProcessCustomization.objects.count(), 2)
+        partitioning.disable('pmbok')
+        self.assertIsNone(partitioning.status('pmbok')[table])
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def requests(self, result):
+        return REGISTRY.get_sample_value(
+            'pmbok_catalog_cache_requests_total', {'namespace': 'single-flight-test', 'result': result}) or 0
+
+    def get(self, compute, stale_key=None):
+        return singleflight.get_or_compute('single-flight-test:v2', compute, 60,
+                                           namespace='single-flight-test', stale_key=stale_key)
+
+    def test_concurrent_misses_compute_once(self):
+        calls, results = [], []
+        coalesced = self.requests('coalesced')
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'listado'
+
+        threads = [threading.Thread(target=lambda: results.append(self.get(compute))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['listado'] * 5)
+        self.assertEqual(self.requests('coalesced') - coalesced, 4)
+
+    def test_stale_value_is_served_while_another_request_computes(self):
+        cache.set('single-flight-test:latest', 'versión 1')
+        cache.add('single-flight-test:v2:lock', 1)  # otro worker está calculando la versión 2
+        compute = mock.Mock(return_value='versión 2')
+
+        self.assertEqual(self.get(compute, stale_key='single-flight-test:latest'), 'versión 1')
+        compute.assert_not_called()
+
+    @override_settings(SINGLE_FLIGHT_WAIT_TIMEOUT=0.2)
+    def test_memoize_serves_stale_values_only_when_asked(self):
+        cache.set('catalog:latest:department-parents', {1: None})
+        cache.add('catalog:7:department-parents:lock', 1)
+
+        # La validación de departamentos nunca ve el mapa anterior
+        self.assertEqual(memoize(('department-parents',), lambda: {1: None, 2: 1}, version=7), {1: None, 2: 1})
+        cache.set('catalog:latest:process-list', ['anterior'])
+        cache.add('catalog:7:process-list:lock', 1)
+        self.assertEqual(memoize(('process-list',), lambda: ['nueva'], version=7, stale=True), ['anterior'])
+
+    @override_settings(SINGLE_FLIGHT_WAIT_TIMEOUT=5)
+    def test_waiter_computes_when_the_lock_holder_gives_up(self):
+        cache.add('single-flight-test:v2:lock', 1)
+        threading.Timer(0.1, cache.delete, ['single-flight-test:v2:lock']).start()  # falló sin guardar
+        fallback = self.requests('fallback')
+
+        self.assertEqual(self.get(lambda: 'listado'), 'listado')
+        self.assertEqual(self.requests('fallback') - fallback, 1)
+        self.assertEqual(cache.get('single-flight-test:v2'), 'listado')
+
+
+class MultiprocessMetricsTests(APITestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        PMBOKProcessCustomization.objects.create(
+            process=PMBOKProcess.objects.create(process_number=1, name='Proceso 1'), country_code='co')
+
+    def write_counter(self, pid, value):
+        # Lo que escribe prometheus_client en cada worker con PROMETHEUS_MULTIPROC_DIR
+        values = MmapedDict(os.path.join(self.directory, f'counter_{pid}.db'))
+        key = mmap_key('pmbok_export_rows', 'pmbok_export_rows_total', ['format'], ['csv'],
+                       'Filas exportadas (api/export.py).')
+        values.write_value(key, value, 0)
+        values.close()
+
+    def write_inventory(self, pid, value, timestamp):
+        # Gauge del inventario tal como lo publica el hilo de refresco de un worker
+        values = MmapedDict(os.path.join(self.directory, f'gauge_livemostrecent_{pid}.db'))
+        key = mmap_key('pmbok_customizations', 'pmbok_customizations', ['framework', 'level'],
+                       ['pmbok', 'country'], 'Personalizaciones existentes.')
+        values.write_value(key, value, timestamp)
+        values.close()
+
+    def test_scrape_sums_every_worker_and_keeps_the_inventory(self):
+        self.write_counter(101, 3)
+        self.write_counter(102, 4)  # worker ya reciclado: su contador se conserva
+        self.write_inventory(101, 1, timestamp=20)
+        self.write_inventory(102, 5, timestamp=30)  # en vivo: se descarta al morir
+
+        with mock.patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': self.directory}):
+            core_metrics.mark_worker_dead(102)
+            response = self.client.get('/prometheus/metrics')
+
+        body = response.content.decode()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('pmbok_export_rows_total{format="csv"} 7.0', body)
+        self.assertIn('pmbok_customizations{framework="pmbok",level="country"} 1.0', body)
+
+    def test_master_scrape_uses_neither_orm_nor_cache(self):
+        # El puerto dedicado corre en un hilo del master de gunicorn: solo lee ficheros
+        self.write_inventory(101, 1, timestamp=20)
+        with mock.patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': self.directory}), \
+                mock.patch.object(cache, 'get', side_effect=AssertionError('caché en el master')), \
+                CaptureQueriesContext(connection) as ctx:
+            body = generate_latest(core_metrics.export_registry()).decode()
+        self.assertEqual(len(ctx), 0)
+        self.assertIn('pmbok_customizations{framework="pmbok",level="country"} 1.0', body)
+
+    def test_without_directory_the_process_registry_is_exported(self):
+        with mock.patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': ''}):
+            self.assertIs(core_metrics.export_registry(), REGISTRY)
+
+
+class ProgressSummaryTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(email='progress@test.com', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.stage = ProcessStage.objects.create(name='Planificación')
+        self.department = Department.objects.create(name='Finanzas')
+        self.processes = [PMBOKProcess.objects.create(process_number=n, name=f'Proceso {n}', stage=self.stage)
+                          for n in (1, 2, 3, 4)]
+
+    def customize(self, process, country_code, department=None):
+        response = self.client.post('/api/customizations/', {
+            'process_id': process.id, 'process_type': 'pmbok', 'country_code': country_code,
+            'inputs': [], 'tools_and_techniques': [], 'outputs': [],
+            'department_id': department.id if department else None,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def test_write_paths_keep_summary_equal_to_rebuild(self):
+        first = self.customize(self.processes[0], 'co')
+        self.customize(self.processes[0], 'co')  # actualización: no cuenta dos veces
+        self.customize(self.processes[1], 'co')
+        self.customize(self.processes[1], 'co', self.department)
+        self.customize(self.processes[2], 'ar')
+
+        self.client.patch(f'/api/customizations/{first}/update-kanban-status/',
+                          {'kanban_status': 'in_progress'}, format='json')
+        self.client.patch(f'/api/customizations/{first}/update-kanban-status/',
+                          {'kanban_status': 'in_progress'}, format='json')
+        self.client.post('/api/pmbok-processes/bulk-update-kanban-status/',
+                         {'process_ids': [self.processes[0].id, self.processes[1].id], 'kanban_status': 'done'},
+                         format='json')
+        run_queued_jobs()
+
+        self.assertEqual(stored_summary('pmbok'), computed_summary('pmbok'))
+        self.assertEqual(stored_summary('pmbok')[('co', 0, self.stage.id, 'done')], 2)
+        call_command('rebuild_progress', '--check', stdout=StringIO())
+
+    @skipUnless(connection.features.has_select_for_update, 'Requiere SELECT ... FOR UPDATE')
+    def test_kanban_writes_lock_the_rows_they_compute_deltas_from(self):
+        first = self.customize(self.processes[0], 'co')
+        with CaptureQueriesContext(connection) as patch:
+            self.client.patch(f'/api/customizations/{first}/update-kanban-status/',
+                              {'kanban_status': 'in_progress'}, format='json')
+        self.client.post('/api/pmbok-processes/bulk-update-kanban-status/',
+                         {'process_ids': [self.processes[0].id], 'kanban_status': 'done'}, format='json')
+        with CaptureQueriesContext(connection) as bulk:
+            run_queued_jobs()
+
+        self.assertTrue(any('FOR UPDATE' in query['sql'] for query in patch.captured_queries))
+        self.assertEqual(sum('FOR UPDATE' in query['sql'] for query in bulk.captured_queries
+                             if 'api_job' not in query['sql']), 2)
+
+    def test_progress_endpoint_reports_percent_done(self):
+        self.customize(self.processes[0], 'CO')
+        self.customize(self.processes[1], 'co')
+        self.client.post('/api/pmbok-processes/bulk-update-kanban-status/',
+                         {'process_ids': [self.processes[0].id], 'kanban_status': 'done'}, format='json')
+        run_queued_jobs()
+
+        response = self.client.get('/api/progress/?framework=pmbok&country=co&department=0')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [group] = response.data['groups']
+        self.assertEqual(group['area'], 'Planificación')
+        self.assertEqual((group['processes'], group['customized']), (4, 2))
+        self.assertEqual(group['counts'], {'done': 1, 'unassigned': 1})
+        self.assertEqual(group['percent_done'], 25.0)
+        self.assertEqual(self.client.get('/api/progress/?framework=kanban').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_fixes_drift_from_writes_outside_the_api(self):
+        self.customize(self.processes[0], 'co')
+        PMBOKProcessCustomization.objects.update(kanban_status='todo')  # sin deltas
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_progress', '--check', stdout=StringIO())
+        call_command('rebuild_progress', stdout=StringIO())
+        self.assertEqual(ProgressSummary.objects.get(framework='pmbok').kanban_status, 'todo')
+
+
+class JobQueueTests(APITransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(email='jobs@test.com', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.processes = [PMBOKProcess.objects.create(process_number=n, name=f'Proceso {n}') for n in (1, 2, 3)]
+        for process in self.processes:
+            PMBOKProcessCustomization.objects.create(process=process, country_code='co')
+
+    def bulk(self, process_ids, kanban_status='done', key=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return self.client.post('/api/pmbok-processes/bulk-update-kanban-status/',
+                                {'process_ids': process_ids, 'kanban_status': kanban_status},
+                                format='json', **headers)
+
+    @override_settings(JOBS_CHUNK_SIZE=2)
+    def test_bulk_action_is_accepted_and_runs_in_chunks(self):
+        response = self.bulk([p.id for p in self.processes])
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response['Location'], response.data['url'])
+        self.assertEqual(self.client.get(response.data['url']).data['status'], 'queued')
+        # Nada cambia hasta que el worker procesa el trabajo
+        self.assertFalse(PMBOKProcessCustomization.objects.filter(kanban_status='done').exists())
+
+        out = StringIO()
+        call_command('run_jobs', '--burst', stdout=out)
+
+        job = self.client.get(response.data['url']).data
+        self.assertEqual((job['status'], job['progress'], job['total'], job['percent']),
+                         ('succeeded', 3, 3, 100.0))
+        self.assertEqual(job['result'], {'rows': 6})
+        self.assertEqual(PMBOKProcessCustomization.objects.filter(kanban_status='done').count(), 3)
+        self.assertIn('1 trabajos procesados', out.getvalue())
+
+    def test_idempotency_key_returns_the_same_job(self):
+        ids = [self.processes[0].id]
+        first = self.bulk(ids, key='mover-1')
+        replay = self.bulk(ids, key='mover-1')
+        self.assertEqual(replay.data['job_id'], first.data['job_id'])
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(self.bulk(ids, 'todo', key='mover-1').status_code,
+                         status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_jobs_are_private_and_seed_requires_staff(self):
+        url = self.bulk([self.processes[0].id]).data['url']
+        other = CustomUser.objects.create_user(email='other@test.com', password='password123')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.post('/api/jobs/', {'kind': 'seed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(JOBS_HEARTBEAT_TIMEOUT=60, JOBS_MAX_ATTEMPTS=2)
+    def test_orphaned_jobs_are_retried_then_abandoned(self):
+        job_id = self.bulk([self.processes[0].id]).data['job_id']
+        long_ago = timezone.now() - timedelta(minutes=5)
+        # Un worker murió a mitad del trabajo: se reintenta
+        Job.objects.filter(pk=job_id).update(status='running', attempts=1, heartbeat_at=long_ago)
+        Job.objects.filter(pk=job_id).update(progress=1, error='parcial')
+        retried = jobs.claim('w2')
+        self.assertEqual(str(retried.pk), job_id)
+        # Empieza de nuevo por el primer lote: el progreso no pasa del total
+        self.assertEqual((retried.progress, retried.error), (0, ''))
+        # Y vuelve a morir: agotados los intentos, se marca como fallido
+        Job.objects.filter(pk=job_id).update(heartbeat_at=long_ago)
+        self.assertIsNone(jobs.claim('w3'))
+        self.assertEqual(Job.objects.get(pk=job_id).status, 'failed')
+
+
+    @override_settings(JOBS_HEARTBEAT_TIMEOUT=0.3)
+    def test_keepalive_refreshes_the_heartbeat_of_steps_without_chunks(self):
+        job = Job.objects.create(kind='seed', payload={}, status='running',
+                                 heartbeat_at=timezone.now() - timedelta(minutes=5))
+        with jobs.JobContext(job).keepalive():
+            time.sleep(0.5)
+        self.assertGreater(Job.objects.get(pk=job.pk).heartbeat_at, timezone.now() - timedelta(seconds=1))
+
+class CustomizationCloneTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(email='clone@test.com', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.department = Department.objects.create(name='Ventas')
+        base = [{'name': 'Base', 'url': ''}]
+        self.processes = [PMBOKProcess.objects.create(process_number=n, name=f'Proceso {n}', inputs=base)
+                          for n in (1, 2, 3)]
+        for process in self.processes[:2]:
+            PMBOKProcessCustomization.objects.create(
+                process=process, country_code='CO', inputs=[{'name': f'CO {process.process_number}', 'url': ''}])
+        # Ya existe en el destino: conflicto
+        self.existing = PMBOKProcessCustomization.objects.create(
+            process=self.processes[0], country_code='pe', kanban_status='done',
+            inputs=[{'name': 'Propio de PE', 'url': ''}])
+
+    def clone(self, **data):
+        response = self.client.post('/api/customizations/clone/', {'framework': 'pmbok', **data}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return response.data['results']['pmbok']
+
+    def test_dry_run_reports_counts_without_writing(self):
+        counts = self.clone(source_country='co', target_country='pe', dry_run=True)
+        self.assertEqual(counts, {'source': 2, 'inserted': 1, 'updated': 0, 'skipped': 1})
+        self.assertEqual(PMBOKProcessCustomization.objects.filter(country_code__iexact='pe').count(), 1)
+
+    def test_skip_keeps_existing_and_inserts_the_rest(self):
+        counts = self.clone(source_country='co', target_country='PE')
+        self.assertEqual((counts['inserted'], counts['skipped']), (1, 1))
+        cloned = PMBOKProcessCustomization.objects.get(process=self.processes[1], country_code='pe')
+        self.assertEqual((cloned.inputs, cloned.kanban_status), ([{'name': 'CO 2', 'url': ''}], 'unassigned'))
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.inputs, [{'name': 'Propio de PE', 'url': ''}])
+
+    def test_overwrite_replaces_ittos_but_keeps_status(self):
+        counts = self.clone(source_country='co', target_country='pe', on_conflict='overwrite')
+        self.assertEqual((counts['inserted'], counts['updated'], counts['skipped']), (1, 1, 0))
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.inputs, self.existing.kanban_status), ([{'name': 'CO 1', 'url': ''}], 'done'))
+
+    def test_base_ittos_to_a_department_and_progress_summary(self):
+        call_command('rebuild_progress', stdout=StringIO())
+        counts = self.clone(target_country='mx', target_department_id=self.department.id)
+        self.assertEqual(counts['inserted'], 3)
+        # Desde la base se guarda herencia (NULL), no una copia de las listas
+        self.assertEqual(PMBOKProcessCustomization.objects.filter(
+            country_code='mx', department=self.department, inputs__isnull=True).count(), 3)
+        self.assertEqual(stored_summary('pmbok'), computed_summary('pmbok'))
+        # Repetir no duplica
+        self.assertEqual(self.clone(target_country='mx', target_department_id=self.department.id)['inserted'], 0)
+
+    def test_rejects_same_source_and_target(self):
+        response = self.client.post('/api/customizations/clone/',
+                                    {'source_country': 'co', 'target_country': 'CO'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class HealthProbeTests(TransactionTestCase):
+    def setUp(self):
+        self.inner_calls = []
+
+        def inner(environ, start_response):
+            self.inner_calls.append(environ['PATH_INFO'])
+            start_response('200 OK', [])
+            return [b'django']
+
+        self.app = HealthCheckWSGIMiddleware(inner)
+
+    def call(self, path):
+        captured = {}
+
+        def start_response(status_line, headers):
+            captured['status'] = status_line
+
+        body = b''.join(self.app({'PATH_INFO': path, 'REQUEST_METHOD': 'GET'}, start_response))
+        return captured['status'], json.loads(body) if body != b'django' else body
+
+    def test_liveness_skips_django_and_database(self):
+        with self.assertNumQueries(0):
+            status_line, body = self.call('/healthz')
+        self.assertEqual(status_line, '200 OK')
+        self.assertEqual(body, {'status': 'ok'})
+        self.assertEqual(self.inner_calls, [])
+
+    def test_readiness_checks_db_once_per_ttl(self):
+        status_line, body = self.call('/readyz')
+        self.assertEqual(status_line, '200 OK')
+        self.assertEqual(body['checks'], {'database': 'ok', 'migrations': 'ok'})
+        with self.assertNumQueries(0):
+            self.call('/readyz')
+
+    def test_readiness_reports_database_errors(self):
+        with mock.patch.object(ReadinessCheck, 'pending_migrations', side_effect=DatabaseError):
+            status_line, body = self.call('/readyz')
+        self.assertEqual(status_line, '503 Service Unavailable')
+        self.assertEqual(body['status'], 'unavailable')
+
+    def test_other_paths_reach_django(self):
+        status_line, body = self.call('/api/pmbok-processes/')
+        self.assertEqual(body, b'django')
+        self.assertEqual(self.inner_calls, ['/api/pmbok-processes/'])
+
+
+class StatelessMiddlewareTests(APITestCase):
+    def test_api_skips_session_and_csrf_but_admin_keeps_them(self):
+        with mock.patch.object(SessionMiddleware, 'process_request', autospec=True,
+                               side_effect=SessionMiddleware.process_request) as session, \
+                mock.patch.object(CsrfViewMiddleware, 'process_view', autospec=True,
+                                  side_effect=CsrfViewMiddleware.process_view) as csrf_view:
+            self.client.get('/api/pmbok-processes/')
+            self.assertFalse(session.called)
+            self.assertFalse(csrf_view.called)
+
+            self.client.get(reverse('admin:index'))
+            self.assertTrue(session.called)
+            self.assertTrue(csrf_view.called)
+
+    def test_jwt_user_still_reaches_request(self):
+        user = CustomUser.objects.create_user(email='jwt@test.com', password='password123')
+        token = self.client.post('/api/token/', {'email': 'jwt@test.com', 'password': 'password123'},
+                                 format='json').data['access']
+        response = self.client.get('/api/pmbok-processes/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.wsgi_request.user, user)
+
+
+class StartupCommandTests(APITestCase):
+    def run_startup(self, *args):
+        out = StringIO()
+        call_command('startup', '--skip-collectstatic', *args, stdout=out)
+        return out.getvalue().splitlines()[-1]
+
+    def test_warm_start_skips_migrations_and_seeds(self):
+        cold = self.run_startup()
+        self.assertIn('migrate', cold)
+        self.assertIn('seed_pmbok, seed_scrum, seed_departments', cold)
+        self.assertTrue(StartupState.objects.filter(key='seed:seed_pmbok').exists())
+
+        warm = self.run_startup()
+        self.assertIn('migrate', warm)
+        self.assertIn('seed 0.', warm)
+        self.assertNotIn('seed_pmbok', warm)
+        self.assertEqual(warm.count('up to date'), 2)
+
+    def test_changed_seed_digest_reruns_only_that_seed(self):
+        self.run_startup()
+        StartupState.objects.filter(key='seed:seed_departments').update(digest='stale')
+        self.assertIn('(seed_departments)', self.run_startup())
+
+    def test_rerunning_the_scrum_seed_keeps_customizations(self):
+        call_command('seed_scrum', stdout=StringIO())
+        process = ScrumProcess.objects.get(process_number=1)
+        ScrumProcess.objects.filter(pk=process.pk).update(kanban_status='done')
+        ScrumProcessCustomization.objects.create(process=process, country_code='co')
+
+        call_command('seed_scrum', stdout=StringIO())
+        self.assertEqual(ScrumProcess.objects.count(), 27)
+        self.assertEqual(ScrumProcess.objects.get(pk=process.pk).kanban_status, 'done')
+        self.assertTrue(ScrumProcessCustomization.objects.filter(process=process).exists())
+
+
+class ImportTimeParsingTests(APITestCase):
+    def test_parse_and_group(self):
+        stderr = '\n'.join([
+            'import time: self [us] | cumulative | imported package',
+            'import time:       100 |        100 |     django.utils',
+            'import time:       400 |        500 |   django.db',
+            'import time:      2000 |       2500 | core.wsgi',
+            'unrelated line',
+        ])
+        rows = parse_importtime(stderr)
+        self.assertEqual(rows[-1], ('core.wsgi', 2000, 2500, 0))
+        self.assertEqual(rows[0][3], 2)
+        self.assertEqual(group_by_package(rows), {'core': 2.0, 'django': 0.5})
+
+    def test_warm_up_loads_request_modules_before_fork(self):
+        # Proceso limpio: lo que quede en sys.modules tras crear la app lo heredan los workers
+        script = ("import sys, core.wsgi; "
+                  "print(' '.join(m for m in ('api.views', 'api.serializers', 'api.git_history') "
+                  "if m in sys.modules))")
+        env = {**os.environ, 'DJANGO_WARMUP': '1',
+               'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings')}
+        result = subprocess.run([sys.executable, '-c', script], env=env, cwd=settings.BASE_DIR,
+                                capture_output=True, text=True, timeout=120)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.split(), ['api.views', 'api.serializers', 'api.git_history'])
+
+
+class GunicornAutotuneTests(SimpleTestCase):
+    def write_cgroup(self, files):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        for name, content in files.items():
+            os.makedirs(os.path.dirname(os.path.join(root, name)), exist_ok=True)
+            with open(os.path.join(root, name), 'w') as fh:
+                fh.write(content)
+        return root
+
+    def test_cgroup_v2_limits(self):
+        root = self.write_cgroup({'cpu.max': '150000 100000\n', 'memory.max': str(512 * 1024 * 1024)})
+        self.assertEqual(gunicorn_conf.cgroup_cpu_limit(root), 2)
+        self.assertEqual(gunicorn_conf.cgroup_memory_limit_mb(root),
+                         min(512, gunicorn_conf.host_memory_mb()))
+
+    def test_cgroup_v1_limits_and_unlimited(self):
+        root = self.write_cgroup({
+            'cpu/cpu.cfs_quota_us': '-1', 'cpu/cpu.cfs_period_us': '100000',
+            'memory/memory.limit_in_bytes': str(2 ** 63 - 4096),
+        })
+        self.assertGreaterEqual(gunicorn_conf.cgroup_cpu_limit(root), 1)
+        self.assertEqual(gunicorn_conf.cgroup_memory_limit_mb(root), gunicorn_conf.host_memory_mb())
+
+    def test_memory_bound_plan_switches_to_threads(self):
+        self.assertEqual(gunicorn_conf.plan_workers(2, 4096, 180, 12), (5, 'sync', 1))
+        # 512MB * 0.8 / 180MB -> 2 workers; la concurrencia restante va en hilos
+        self.assertEqual(gunicorn_conf.plan_workers(2, 512, 180, 12), (2, 'gthread', 3))
+        self.assertEqual(gunicorn_conf.plan_workers(2, 4096, 180, 12, 'sync'), (5, 'sync', 1))
+        self.assertEqual(gunicorn_conf.plan_workers(2, 4096, 180, 12, 'gthread', 4), (2, 'gthread', 4))
+
+    def test_worker_memory_counts_only_private_pages(self):
+        root = self.write_cgroup({'123/smaps_rollup': (
+            'Rss:              307200 kB\nPss:              112640 kB\n'
+            'Shared_Clean:     204800 kB\nPrivate_Clean:      2048 kB\nPrivate_Dirty:     49152 kB\n')})
+        self.assertEqual(gunicorn_conf.uss_mb(123, proc_root=root), 50)
+        self.assertIsNone(gunicorn_conf.uss_mb(456, proc_root=root))
+        # La memoria compartida con el master se paga una vez, no por worker
+        self.assertEqual(gunicorn_conf.plan_workers(2, 1024, 300, 12), (2, 'gthread', 3))
+        self.assertEqual(gunicorn_conf.plan_workers(2, 1024, 75, 12, shared_mb=300), (5, 'sync', 1))
+
+    def test_retune_uses_worker_private_memory(self):
+        server = mock.Mock(WORKERS={111: None, 222: None}, num_workers=2)
+        server.cfg.worker_class_str, server.cfg.threads = 'sync', 1
+        with mock.patch.object(gunicorn_conf, 'rss_mb', return_value=300), \
+                mock.patch.object(gunicorn_conf, 'uss_mb', side_effect=[40, 50]), \
+                mock.patch.multiple(gunicorn_conf, CPUS=2, MEMORY_MB=1024, MAX_WORKERS=12,
+                                    RSS_HEADROOM=1.5, MAX_WORKER_RSS_MB=0), \
+                mock.patch.dict(gunicorn_conf._state):
+            gunicorn_conf._retune(server)
+            # (1024 * 0.8 - 300) / (50 * 1.5) -> 6 caben, el objetivo 2*CPU+1 manda
+            self.assertEqual(server.num_workers, 5)
+            self.assertAlmostEqual(gunicorn_conf._state['rss_threshold_mb'], (1024 * 0.8 - 300) / 5)
+
+    def test_timed_serializer_class_is_shared_across_threads(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from api.profiling import _timed_serializer_class
+        from api.serializers import TaskSerializer
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            classes = set(pool.map(lambda _: _timed_serializer_class(TaskSerializer), range(32)))
+        self.assertEqual(len(classes), 1)
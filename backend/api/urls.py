@@ -2,7 +2,7 @@
 from django.urls import path, include
 from rest_framework import routers
 from . import views
-from .views import get_git_history
+from .views import download_export, export_catalog, get_git_history, get_kanban_analytics, get_progress
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -17,6 +17,7 @@ router.register(r'customizations', views.CustomizationViewSet,
 # ===== INICIO: CAMBIO - REGISTRAR LA NUEVA RUTA DE DEPARTAMENTOS =====
 router.register(r'departments', views.DepartmentViewSet)
 # ===== FIN: CAMBIO =====
+router.register(r'jobs', views.JobViewSet, basename='job')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -30,4 +31,8 @@ urlpatterns = [
     path('2fa/login/verify/', views.TwoFALoginVerifyView.as_view(),
          name='2fa_login_verify'),
     path('git-history/', get_git_history, name='git-history'),
+    path('progress/', get_progress, name='progress'),
+    path('kanban-analytics/', get_kanban_analytics, name='kanban-analytics'),
+    path('export/', export_catalog, name='export'),
+    path('export/<uuid:job_id>/', download_export, name='export-download'),
 ]
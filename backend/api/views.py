@@ -1,12 +1,18 @@
 # /webapps/erd-ecosystem/apps/pmbok/backend/api/views.py
-import subprocess
 from django.conf import settings
+import io
+import json
 import os
-from rest_framework import viewsets, generics, permissions, status
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework import viewsets, generics, mixins, permissions, serializers, status
+from rest_framework.decorators import action, api_view, permission_classes, renderer_classes
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
-from django.http import JsonResponse
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.db import transaction
+from django.db.models import Prefetch
 from rest_framework.permissions import IsAuthenticated
 
 
@@ -14,13 +20,25 @@ from .serializers import (
     TaskSerializer, UserRegistrationSerializer, PMBOKProcessSerializer,
     ScrumProcessSerializer, CustomizationWriteSerializer,
     PMBOKProcessCustomizationSerializer, ScrumProcessCustomizationSerializer,
-    DepartmentSerializer,
+    DepartmentSerializer, JobSerializer, JobCreateSerializer, CustomizationCloneSerializer,
+    CustomizationImportSerializer,
     MyTokenObtainPairSerializer
 )
 from .models import (
     Task, CustomUser, PMBOKProcess, ScrumProcess, KANBAN_STATUS_CHOICES,
     PMBOKProcessCustomization, ScrumProcessCustomization,
-    Department
+    Department, Job
+)
+from .catalog import FRAMEWORKS, is_country_code, memoize
+from .effective import effective_ittos, bulk_effective_ittos
+from .itto_graph import get_graph
+from . import export, git_history, kanban_log, progress
+from .bulk_import import ImportFailed, import_customizations
+from .cloning import clone_customizations
+from .jobs import IdempotencyConflict, enqueue, validate_bulk_kanban, validate_export
+from .profiling import ProfiledSerializerMixin
+from .metrics import (
+    CUSTOMIZATION_WRITES, PROCESS_LIST_BYTES, record_kanban_transitions
 )
 
 # ===== INICIO: VISTA PERSONALIZADA PARA OBTENER TOKEN =====
@@ -75,50 +93,203 @@ class TwoFALoginVerifyView(generics.GenericAPIView):
 # ===== VISTA DEPARTAMENTOS =====
 
 
-class DepartmentViewSet(viewsets.ModelViewSet):
-    queryset = Department.objects.all()
+class DepartmentViewSet(ProfiledSerializerMixin, viewsets.ModelViewSet):
+    # prefetch evita una consulta por departamento al serializar `sub_departments`
+    queryset = Department.objects.prefetch_related('sub_departments').all()
     serializer_class = DepartmentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def list(self, request, *args, **kwargs):
+        # El árbol completo cambia con el catálogo (las señales de Department suben la versión)
+        return Response(memoize(('department-tree',), lambda: list(
+            self.get_serializer(self.filter_queryset(self.get_queryset()), many=True).data), stale=True))
+
+    def perform_destroy(self, instance):
+        # Sus personalizaciones pasan a nivel país (SET_NULL)
+        with transaction.atomic():
+            instance.delete()
+            progress.schedule_rebuild()
+
 # --- VISTAS PROCESOS (Scrum/PMBOK) ---
 
 
-class ScrumProcessViewSet(viewsets.ModelViewSet):
-    queryset = ScrumProcess.objects.select_related(
-        'status', 'phase').prefetch_related('customizations__department').all()
-    serializer_class = ScrumProcessSerializer
+class EffectiveITTOMixin:
+    """
+    Acciones de solo lectura con los ITTOs efectivos (base -> país -> departamento ->
+    subdepartamento) resueltos en el servidor. Ver api/effective.py.
+    """
+    framework = None
+
+    def _effective_params(self, request, country_required=True):
+        country = request.query_params.get('country', '').strip()
+        department = request.query_params.get('department') or None
+        if not country and (country_required or department is not None):
+            return None, None, Response({'error': 'El parámetro country es obligatorio.'},
+                                        status=status.HTTP_400_BAD_REQUEST)
+        if country and not is_country_code(country):
+            return None, None, Response({'error': 'country debe ser un código de 2 letras.'},
+                                        status=status.HTTP_400_BAD_REQUEST)
+        if department is not None:
+            try:
+                department = int(department)
+            except ValueError:
+                return None, None, Response({'error': 'Departamento inválido.'},
+                                            status=status.HTTP_400_BAD_REQUEST)
+        return country, department, None
+
+    @action(detail=True, methods=['get'], url_path='effective')
+    def effective(self, request, pk=None):
+        country, department, error = self._effective_params(request)
+        if error:
+            return error
+        try:
+            data = effective_ittos(self.framework, int(pk), country, department)
+        except (KeyError, ValueError):
+            data = None
+        if data is None:
+            return Response({'error': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(data)
+
+    @action(detail=False, methods=['get'], url_path='effective', url_name='bulk-effective')
+    def bulk_effective(self, request):
+        country, department, error = self._effective_params(request)
+        if error:
+            return error
+        try:
+            data = bulk_effective_ittos(self.framework, country, department)
+        except KeyError:
+            return Response({'error': 'Departamento inválido.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
+
+
+class ITTOGraphMixin:
+    """
+    Grafo de flujo de datos entre procesos (salidas -> entradas con el mismo nombre), con
+    los ITTOs base o, con `country` (y `department`), los efectivos. Ver api/itto_graph.py.
+    """
+    framework = None
+
+    def _graph(self, request):
+        country, department, error = self._effective_params(request, country_required=False)
+        if error:
+            return None, error
+        try:
+            return get_graph(self.framework, country or None, department), None
+        except KeyError:
+            return None, Response({'error': 'Departamento inválido.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    def _graph_process(self, request, pk):
+        graph, error = self._graph(request)
+        if error:
+            return None, None, error
+        try:
+            pid = int(pk)
+        except ValueError:
+            pid = None
+        if pid not in graph.processes:
+            return None, None, Response({'error': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return graph, pid, None
+
+    @action(detail=True, methods=['get'], url_path='graph')
+    def graph(self, request, pk=None):
+        """Vecinos aguas arriba/abajo: ?direction=both|upstream|downstream&depth=N (0 = todos)."""
+        graph, pid, error = self._graph_process(request, pk)
+        if error:
+            return error
+        direction = request.query_params.get('direction', 'both')
+        try:
+            depth = int(request.query_params.get('depth', 1))
+        except ValueError:
+            depth = -1
+        if direction not in ('both', 'upstream', 'downstream') or depth < 0:
+            return Response({'error': 'Parámetros inválidos.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(graph.neighbours(pid, direction, depth or None))
+
+    @action(detail=True, methods=['get'], url_path='graph/impact', url_name='graph-impact')
+    def graph_impact(self, request, pk=None):
+        """Qué procesos se quedan sin entrada si este deja de producir ?output=<nombre> (o todas)."""
+        graph, pid, error = self._graph_process(request, pk)
+        if error:
+            return error
+        data = graph.impact(pid, request.query_params.get('output') or None)
+        if data is None:
+            return Response({'error': 'El proceso no produce esa salida.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
+
+    @action(detail=False, methods=['get'], url_path='graph/order', url_name='graph-order')
+    def graph_order(self, request):
+        """Orden topológico de los procesos de una etapa/fase (?area=<id>, 0 = sin área)."""
+        graph, error = self._graph(request)
+        if error:
+            return error
+        area = request.query_params.get('area')
+        try:
+            area = int(area) if area not in (None, '') else None
+        except ValueError:
+            return Response({'error': 'Área inválida.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(graph.topological_order(area))
+
+
+class BaseProcessViewSet(ProfiledSerializerMixin, EffectiveITTOMixin, ITTOGraphMixin, viewsets.ModelViewSet):
+    """Comportamiento común de los procesos PMBOK y Scrum; `framework` elige los modelos."""
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # ?itto=compact: las personalizaciones heredadas devuelven null (ver MaterializedITTOMixin)
+        context['itto_compact'] = self.request.query_params.get('itto') == 'compact'
+        return context
+
+    def list(self, request, *args, **kwargs):
+        # La lista completa solo cambia con el catálogo: se serializa una vez por versión
+        mode = 'compact' if request.query_params.get('itto') == 'compact' else 'full'
+        data = memoize(('process-list', self.framework, mode), lambda: list(
+            self.get_serializer(self.filter_queryset(self.get_queryset()), many=True).data), stale=True)
+        response = Response(data)
+        response.add_post_render_callback(
+            lambda rendered: PROCESS_LIST_BYTES.labels(self.framework).observe(len(rendered.content)))
+        return response
+
+    def perform_destroy(self, instance):
+        # Borra en cascada sus personalizaciones
+        with transaction.atomic():
+            instance.delete()
+            progress.schedule_rebuild()
+
     @action(detail=False, methods=['post'], url_path='bulk-update-kanban-status')
     def bulk_update_kanban_status(self, request):
-        process_ids = request.data.get('process_ids')
-        new_status = request.data.get('kanban_status')
-        if not isinstance(process_ids, list) or not new_status:
+        """Encola el cambio masivo (api/jobs.py) y responde 202 con el trabajo."""
+        payload = {'framework': self.framework, 'process_ids': request.data.get('process_ids'),
+                   'kanban_status': request.data.get('kanban_status')}
+        try:
+            validate_bulk_kanban(payload)
+        except serializers.ValidationError:
             return Response({'error': 'Datos inválidos.'}, status=status.HTTP_400_BAD_REQUEST)
-        ScrumProcessCustomization.objects.filter(
-            process_id__in=process_ids).update(kanban_status=new_status)
-        ScrumProcess.objects.filter(id__in=process_ids).update(
-            kanban_status=new_status)
-        return Response({'message': 'Actualizado exitosamente.'})
+        return enqueue_job_response(request, 'bulk_kanban', payload)
+
+
+def recent_customizations(customization_model):
+    """
+    Prefetch de `customizations` con la más reciente primero dentro de cada proceso (el
+    frontend toma la primera del país). Ordenar por (process, -updated_at) sigue el índice
+    *_cust_proc_recent_idx; el `-updated_at` global del Meta obligaría a ordenar aparte.
+    """
+    return Prefetch('customizations', queryset=customization_model.objects.select_related(
+        'department').order_by('process_id', '-updated_at'))
 
 
-class PMBOKProcessViewSet(viewsets.ModelViewSet):
+class ScrumProcessViewSet(BaseProcessViewSet):
+    queryset = ScrumProcess.objects.select_related(
+        'status', 'phase').prefetch_related(recent_customizations(ScrumProcessCustomization)).all()
+    serializer_class = ScrumProcessSerializer
+    framework = 'scrum'
+
+
+class PMBOKProcessViewSet(BaseProcessViewSet):
     queryset = PMBOKProcess.objects.select_related(
-        'status', 'stage').prefetch_related('customizations__department').all()
+        'status', 'stage').prefetch_related(recent_customizations(PMBOKProcessCustomization)).all()
     serializer_class = PMBOKProcessSerializer
-    permission_classes = [permissions.IsAuthenticated]
-
-    @action(detail=False, methods=['post'], url_path='bulk-update-kanban-status')
-    def bulk_update_kanban_status(self, request):
-        process_ids = request.data.get('process_ids')
-        new_status = request.data.get('kanban_status')
-        if not isinstance(process_ids, list) or not new_status:
-            return Response({'error': 'Datos inválidos.'}, status=status.HTTP_400_BAD_REQUEST)
-        PMBOKProcessCustomization.objects.filter(
-            process_id__in=process_ids).update(kanban_status=new_status)
-        PMBOKProcess.objects.filter(id__in=process_ids).update(
-            kanban_status=new_status)
-        return Response({'message': 'Actualizado exitosamente.'})
+    framework = 'pmbok'
 
 
 class CustomizationViewSet(viewsets.GenericViewSet):
@@ -128,31 +299,88 @@ class CustomizationViewSet(viewsets.GenericViewSet):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        instance = serializer.save()
-        if isinstance(instance, PMBOKProcessCustomization):
+        framework = serializer.validated_data['process_type']
+        with transaction.atomic():
+            instance = serializer.save()
+            if serializer.created:
+                # Una actualización no cambia país, departamento ni estado: el resumen no varía
+                progress.apply_deltas(framework, {progress.customization_key(framework, instance): 1})
+        if framework == 'pmbok':
             response_serializer = PMBOKProcessCustomizationSerializer(instance)
         else:
             response_serializer = ScrumProcessCustomizationSerializer(instance)
+        CUSTOMIZATION_WRITES.labels(framework, 'created' if serializer.created else 'updated').inc()
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
 
-    @action(detail=True, methods=['patch'], url_path='update-kanban-status')
-    def update_kanban_status(self, request, pk=None):
+    @action(detail=False, methods=['post'], url_path='clone')
+    def clone(self, request):
+        """
+        Copia las personalizaciones de un país/departamento (o los ITTOs base) a otro con
+        un INSERT ... SELECT por framework. `dry_run` solo informa de los recuentos.
+        """
+        serializer = CustomizationCloneSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        frameworks = list(FRAMEWORKS) if params['framework'] == 'all' else [params['framework']]
+        with transaction.atomic():  # ambos frameworks o ninguno
+            results = {
+                framework: clone_customizations(
+                    framework, params['target_country'], params['target_department_id'],
+                    params['source_country'], params['source_department_id'],
+                    on_conflict=params['on_conflict'], dry_run=params['dry_run'])
+                for framework in frameworks
+            }
+        return Response({'dry_run': params['dry_run'], 'results': results})
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        """
+        Importa un CSV/NDJSON (multipart, campo `file`) con una fila por personalización:
+        tabla temporal cargada con COPY, validación en SQL y fusión con ON CONFLICT.
+        Responde los recuentos y los errores por línea; `strict` no importa nada si hay errores.
+        """
+        serializer = CustomizationImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        stream = io.TextIOWrapper(params['file'].file, encoding='utf-8-sig', newline='')
         try:
-            instance = PMBOKProcessCustomization.objects.get(pk=pk)
-            model_type = 'pmbok'
-        except PMBOKProcessCustomization.DoesNotExist:
-            try:
-                instance = ScrumProcessCustomization.objects.get(pk=pk)
-                model_type = 'scrum'
-            except ScrumProcessCustomization.DoesNotExist:
-                return Response({'error': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+            report = import_customizations(stream, params['file_format'],
+                                           dry_run=params['dry_run'], strict=params['strict'])
+        except ImportFailed as exc:
+            return Response(exc.report, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
 
+    @action(detail=True, methods=['patch'], url_path='update-kanban-status')
+    def update_kanban_status(self, request, pk=None):
         new_status = request.data.get('kanban_status')
-        if not new_status:
-            return Response({'error': 'Status required.'}, status=400)
+        with transaction.atomic():
+            # Fila bloqueada hasta el commit: el estado previo (deltas del resumen de progreso y
+            # transición registrada) es el que sobrescribe este PATCH, aunque haya otros a la vez
+            for model_type, model in (('pmbok', PMBOKProcessCustomization), ('scrum', ScrumProcessCustomization)):
+                # El proceso aporta la etapa/fase del grupo en el resumen de progreso
+                instance = model.objects.select_for_update(of=('self',)).select_related('process').filter(
+                    pk=pk).first()
+                if instance is not None:
+                    break
+            else:
+                return Response({'error': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
 
-        instance.kanban_status = new_status
-        instance.save(update_fields=['kanban_status'])
+            if not new_status:
+                return Response({'error': 'Status required.'}, status=400)
+            if new_status not in dict(KANBAN_STATUS_CHOICES):
+                # El registro de transiciones guarda el estado como código
+                return Response({'error': 'Invalid status.'}, status=400)
+
+            old_status = instance.kanban_status
+            old_key = progress.customization_key(model_type, instance)
+            instance.kanban_status = new_status
+            instance.save(update_fields=['kanban_status'])
+            if new_status != old_status:
+                progress.apply_deltas(model_type, {old_key: -1, old_key[:3] + (new_status,): 1})
+                kanban_log.record([kanban_log.transition(
+                    model_type, instance.process_id, old_status, new_status, instance.id,
+                    instance.country_code, instance.department_id, old_key[2])])
+        record_kanban_transitions(model_type, {old_status: 1}, new_status)
 
         serializer = PMBOKProcessCustomizationSerializer(
             instance) if model_type == 'pmbok' else ScrumProcessCustomizationSerializer(instance)
@@ -164,6 +392,179 @@ class TaskViewSet(viewsets.ModelViewSet):
     queryset = Task.objects.all()
     permission_classes = [permissions.IsAuthenticated]
 
+
+# ===== INICIO: COLA DE TRABAJOS (ver api/jobs.py) =====
+def enqueue_job_response(request, kind, payload):
+    """202 con el trabajo encolado; `Idempotency-Key` repetida devuelve el mismo trabajo."""
+    try:
+        job, created = enqueue(kind, payload, user=request.user,
+                               idempotency_key=request.headers.get('Idempotency-Key'))
+    except IdempotencyConflict:
+        return Response({'error': 'La clave de idempotencia ya se usó con otros datos.'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    url = reverse('job-detail', args=[job.pk])
+    return Response({'job_id': str(job.pk), 'status': job.status, 'url': url},
+                    status=status.HTTP_202_ACCEPTED,
+                    headers={'Location': url, 'Idempotent-Replayed': str(not created).lower()})
+
+
+class JobViewSet(mixins.RetrieveModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """GET /api/jobs/<id>/ para consultar el progreso; POST /api/jobs/ encola por tipo."""
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        jobs = Job.objects.all()
+        return jobs if self.request.user.is_staff else jobs.filter(created_by=self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        # Solo los más recientes: el historial no se pagina ni se purga aquí
+        serializer = self.get_serializer(self.get_queryset()[:50], many=True)
+        return Response(serializer.data)
+
+    def create(self, request, *args, **kwargs):
+        serializer = JobCreateSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        return enqueue_job_response(request, serializer.validated_data['kind'],
+                                    serializer.validated_data['payload'])
+# ===== FIN: COLA DE TRABAJOS =====
+
+
+# ===== INICIO: PROGRESO POR PAÍS Y ÁREA (lee ProgressSummary, ver api/progress.py) =====
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_progress(request):
+    """
+    GET /api/progress/?framework=pmbok&country=co&department=12
+    `department=0` limita al nivel país; sin `department` se devuelven todos los niveles.
+    """
+    framework = request.query_params.get('framework', 'pmbok')
+    if framework not in FRAMEWORKS:
+        return Response({'error': 'framework debe ser pmbok o scrum.'}, status=status.HTTP_400_BAD_REQUEST)
+    country = request.query_params.get('country')
+    if country is not None and not is_country_code(country):
+        return Response({'error': 'country debe ser un código de 2 letras.'}, status=status.HTTP_400_BAD_REQUEST)
+    department = request.query_params.get('department')
+    if department is not None and not department.isdigit():
+        return Response({'error': 'department debe ser un ID numérico.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    groups = progress.progress_report(
+        framework, country_code=country,
+        department_key=int(department) if department is not None else None)
+    return Response({'framework': framework, 'groups': groups})
+# ===== FIN: PROGRESO =====
+
+# ===== INICIO: ANALÍTICA KANBAN (lee KanbanTransition, ver api/kanban_log.py) =====
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_kanban_analytics(request):
+    """
+    GET /api/kanban-analytics/?framework=pmbok&country=co&department=0&area=3&days=90
+        &group_by=country,department,area
+    Entregas, throughput semanal y percentiles de lead/cycle time por grupo.
+    """
+    params = request.query_params
+    framework = params.get('framework', 'pmbok')
+    if framework not in FRAMEWORKS:
+        return Response({'error': 'framework debe ser pmbok o scrum.'}, status=status.HTTP_400_BAD_REQUEST)
+    if params.get('country') is not None and not is_country_code(params['country']):
+        return Response({'error': 'country debe ser un código de 2 letras.'}, status=status.HTTP_400_BAD_REQUEST)
+    numbers = {}
+    for name in ('department', 'area', 'days'):
+        value = params.get(name)
+        if value is not None and not value.isdigit():
+            return Response({'error': f'{name} debe ser un número.'}, status=status.HTTP_400_BAD_REQUEST)
+        numbers[name] = int(value) if value is not None else None
+    days = numbers['days'] or 90
+    if days > 3650:
+        return Response({'error': 'days no puede superar 3650.'}, status=status.HTTP_400_BAD_REQUEST)
+    group_by = [name for name in params.get('group_by', 'country,department,area').split(',') if name]
+    if any(name not in kanban_log.GROUP_COLUMNS for name in group_by):
+        return Response({'error': f"group_by admite: {', '.join(kanban_log.GROUP_COLUMNS)}."},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    report = kanban_log.cycle_time_report(
+        framework, country_code=params.get('country'), department_key=numbers['department'],
+        area_key=numbers['area'], days=days, group_by=list(dict.fromkeys(group_by)))
+    return Response({'framework': framework, **report})
+# ===== FIN: ANALÍTICA KANBAN =====
+
+# ===== INICIO: EXPORTACIÓN CSV/XLSX/NDJSON (ver api/export.py) =====
+class ExportRenderer(BaseRenderer):
+    """
+    Declara `?format=csv|xlsx|ndjson` ante la negociación de DRF (que usa ese parámetro);
+    las filas van en un StreamingHttpResponse, así que solo renderiza errores, como JSON.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
+EXPORT_RENDERERS = [
+    type(f'{fmt.upper()}ExportRenderer', (ExportRenderer,),
+         {'format': fmt, 'media_type': content_type.split(';')[0]})
+    for fmt, content_type in export.CONTENT_TYPES.items()
+]
+
+
+def _export_params(data):
+    params = {
+        'framework': data.get('framework', 'all'),
+        'format': data.get('format', 'csv'),
+        'country': (data.get('country') or '').strip() or None,
+        'department': data.get('department'),
+    }
+    if params['department'] not in (None, ''):
+        department = str(params['department'])
+        params['department'] = int(department) if department.isdigit() else department
+    else:
+        params['department'] = None
+    validate_export(params)
+    return params
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([*api_settings.DEFAULT_RENDERER_CLASSES, *EXPORT_RENDERERS])
+def export_catalog(request):
+    """
+    GET /api/export/?framework=all|pmbok|scrum&country=co&department=12&format=csv|xlsx|ndjson
+    responde en streaming (`department=0`: solo nivel país). POST con los mismos campos
+    encola un trabajo 'export' para exportaciones muy grandes y responde 202.
+    """
+    data = request.data if request.method == 'POST' else request.query_params
+    try:
+        params = _export_params(data)
+    except serializers.ValidationError as exc:
+        return Response(exc.detail, status=status.HTTP_400_BAD_REQUEST)
+    if request.method == 'POST':
+        return enqueue_job_response(request, 'export', params)
+
+    fmt = params['format']
+    response = StreamingHttpResponse(
+        export.stream(fmt, params['framework'], params['country'], params['department']),
+        content_type=export.CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = (
+        f'attachment; filename="{export.filename(fmt, params["framework"], params["country"])}"')
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_export(request, job_id):
+    """Fichero de un trabajo 'export' terminado (solo su autor o staff)."""
+    jobs = Job.objects.filter(kind='export', status='succeeded')
+    if not request.user.is_staff:
+        jobs = jobs.filter(created_by=request.user)
+    job = jobs.filter(pk=job_id).first()
+    path = export.job_path(job.pk, job.result['format']) if job else None
+    if path is None or not path.exists():
+        return Response({'error': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=job.result['file'],
+                        content_type=export.CONTENT_TYPES[job.result['format']])
+# ===== FIN: EXPORTACIÓN =====
+
 # ===== VISTA GIT HISTORY CORREGIDA (BLINDADA) =====
 
 
@@ -211,38 +612,14 @@ def get_git_history(request):
             "details": "El contenedor no tiene acceso al historial git."
         }, status=503)  # 503 Service Unavailable es más semántico que 500
 
-    # 3. Si SÍ hay repo, ejecutar comando git (Lógica original mejorada)
+    # 3. Si SÍ hay repo: instantánea con layout cacheada por estado, servida por ventanas
+    try:
+        offset = max(int(request.query_params.get('offset', 0)), 0)
+        limit = min(max(int(request.query_params.get('limit', 100)), 1), settings.GIT_HISTORY_PAGE_MAX)
+    except ValueError:
+        return Response({"error": "offset y limit deben ser enteros."}, status=400)
     try:
-        print(f"✅ GIT: Repositorio encontrado en: {repo_dir}")
-        delimiter = "||||"
-        cmd = [
-            "git", "log", "--all",
-            f"--pretty=format:%h{delimiter}%p{delimiter}%an{delimiter}%s",
-            "-n", "100"
-        ]
-
-        result = subprocess.run(
-            cmd, cwd=repo_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
-        )
-
-        if result.returncode != 0:
-            raise Exception(result.stderr)
-
-        commits = []
-        lines = result.stdout.strip().split('\n')
-        for line in lines:
-            if not line.strip():
-                continue
-            parts = line.split(delimiter)
-            if len(parts) >= 4:
-                commits.append({
-                    "id": parts[0],
-                    "parents": parts[1].split() if parts[1] else [],
-                    "author": parts[2],
-                    "message": parts[3]
-                })
-
-        return Response({"commits": commits})
+        return Response(git_history.window(git_history.snapshot(repo_dir), offset, limit))
 
     except Exception as e:
         print(f"❌ ERROR EJECUCIÓN GIT: {str(e)}")
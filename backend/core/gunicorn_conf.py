@@ -0,0 +1,263 @@
+# backend/core/gunicorn_conf.py
+"""
+Configuración de gunicorn (`gunicorn -c python:core.gunicorn_conf ...`).
+
+Sustituye al auto-ajuste en shell de entrypoint.sh:
+  * CPU y memoria salen del cgroup del contenedor (v2 o v1), no de /proc/meminfo del host.
+  * Con --preload (por defecto) `when_ready` hace un primer plan con el RSS del master ya
+    calentado (core/preload.py). Es una cota por arriba: tras el fork esas páginas se
+    comparten (copy-on-write) y cada worker solo paga las que modifica. Pasado
+    GUNICORN_AUTOTUNE_SETTLE segundos se mide la memoria privada (USS) de los workers en
+    /proc/<pid>/smaps_rollup y se reajusta el nº de workers con ella.
+  * Si la memoria no da para 2*CPU+1 workers, se usan menos workers con hilos (gthread).
+  * Reciclado: max_requests con jitter y, además, un worker cuyo RSS supera el umbral
+    termina de forma ordenada tras la petición en curso.
+  * Métricas multiproceso (core/metrics.py): con PROMETHEUS_MULTIPROC_DIR el master
+    sirve las métricas agregadas en PROMETHEUS_METRICS_PORT y marca los workers muertos.
+
+Los argumentos de línea de comandos tienen prioridad sobre este módulo.
+"""
+import itertools
+import math
+import os
+import threading
+import time
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+MB = 1024 * 1024
+
+
+def _env_int(name, default):
+    value = os.getenv(name, '')
+    return int(value) if value.strip().lstrip('-').isdigit() else default
+
+
+def _read(path):
+    try:
+        with open(path) as fh:
+            return fh.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit(root=CGROUP_ROOT):
+    """CPUs disponibles según la cuota del cgroup (v2 cpu.max / v1 cfs_quota), o las del host."""
+    cpu_max = _read(f'{root}/cpu.max')
+    if cpu_max:
+        quota, _, period = cpu_max.partition(' ')
+        if quota != 'max' and period:
+            return max(1, math.ceil(int(quota) / int(period)))
+    quota = _read(f'{root}/cpu/cpu.cfs_quota_us') or _read(f'{root}/cpu,cpuacct/cpu.cfs_quota_us')
+    period = _read(f'{root}/cpu/cpu.cfs_period_us') or _read(f'{root}/cpu,cpuacct/cpu.cfs_period_us')
+    if quota and period and int(quota) > 0:
+        return max(1, math.ceil(int(quota) / int(period)))
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def host_memory_mb():
+    meminfo = _read('/proc/meminfo') or ''
+    for line in meminfo.splitlines():
+        if line.startswith('MemTotal:'):
+            return int(line.split()[1]) // 1024
+    return 1024
+
+
+def cgroup_memory_limit_mb(root=CGROUP_ROOT):
+    """Límite de memoria del cgroup (v2 memory.max / v1 limit_in_bytes), o la RAM del host."""
+    host = host_memory_mb()
+    for path in (f'{root}/memory.max', f'{root}/memory/memory.limit_in_bytes'):
+        value = _read(path)
+        if value and value.isdigit():
+            # v1 sin límite devuelve un número enorme (PAGE_COUNTER_MAX)
+            return min(int(value) // MB, host)
+    return host
+
+
+def rss_mb(pid='self'):
+    statm = _read(f'/proc/{pid}/statm')
+    if not statm:
+        return None
+    return int(statm.split()[1]) * os.sysconf('SC_PAGE_SIZE') / MB
+
+
+def uss_mb(pid='self', proc_root='/proc'):
+    """
+    Memoria privada (USS) del proceso: páginas que no comparte con nadie, p. ej. las que
+    un worker ha modificado desde el fork. None si el kernel no expone smaps_rollup.
+    """
+    rollup = _read(f'{proc_root}/{pid}/smaps_rollup')
+    if not rollup:
+        return None
+    kb = 0
+    for line in rollup.splitlines():
+        if line.startswith(('Private_Clean:', 'Private_Dirty:', 'Private_Hugetlb:')):
+            kb += int(line.split()[1])
+    return kb / 1024
+
+
+def plan_workers(cpus, memory_mb, per_worker_mb, max_workers, worker_class='auto', max_threads=4,
+                 shared_mb=0):
+    """
+    (workers, worker_class, threads). El objetivo de concurrencia es 2*CPU+1; la memoria
+    (80% del límite, el resto para picos) limita cuántos procesos caben. shared_mb:
+    memoria que se paga una sola vez (la del master que los workers comparten).
+    worker_class: 'auto' (sync salvo falta de memoria), 'sync' o 'gthread'.
+    """
+    wanted = 2 * cpus + 1
+    by_memory = max(1, int((memory_mb * 0.8 - shared_mb) // max(per_worker_mb, 1)))
+    if worker_class == 'gthread':
+        # Un proceso por CPU; la concurrencia (esperas a Postgres) la dan los hilos
+        return max(1, min(cpus, by_memory, max_workers)), 'gthread', max_threads
+    workers = max(1, min(wanted, by_memory, max_workers))
+    threads = 1
+    if worker_class == 'auto':
+        worker_class = 'sync'
+        if workers < wanted:
+            # Los hilos comparten la memoria del proceso: cubren la concurrencia que falta
+            worker_class = 'gthread'
+            threads = min(max_threads, math.ceil(wanted / workers))
+    return workers, worker_class, threads
+
+
+# ----------------------------------------------------------------------------
+# Decisión inicial (antes de cargar la app)
+# ----------------------------------------------------------------------------
+AUTOTUNE = os.getenv('GUNICORN_AUTOTUNE', '1') == '1'
+# Segundos tras arrancar los workers antes de medir su USS y reajustar (0 = no reajustar)
+AUTOTUNE_SETTLE = _env_int('GUNICORN_AUTOTUNE_SETTLE', 60)
+CPUS = cgroup_cpu_limit()
+MEMORY_MB = cgroup_memory_limit_mb()
+# Estimación hasta medir el RSS real en when_ready (solo con --preload)
+PER_WORKER_MB = _env_int('MEM_PER_WORKER_MB', 180)
+# Margen sobre la memoria medida para el crecimiento por peticiones grandes
+RSS_HEADROOM = float(os.getenv('GUNICORN_RSS_HEADROOM', '1.5'))
+MAX_WORKERS = _env_int('GUNICORN_MAX_WORKERS', 12)
+WORKER_CLASS = os.getenv('GUNICORN_WORKER_CLASS', 'auto')
+MAX_THREADS = _env_int('GUNICORN_THREADS', 4)
+
+TUNED_WORKERS = None
+if AUTOTUNE:
+    workers, worker_class, threads = plan_workers(
+        CPUS, MEMORY_MB, PER_WORKER_MB, MAX_WORKERS, WORKER_CLASS, MAX_THREADS)
+    workers = TUNED_WORKERS = _env_int('GUNICORN_WORKERS', workers)
+
+timeout = _env_int('GUNICORN_TIMEOUT', _env_int('GUNICORN_DEFAULT_TIMEOUT', 90))
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+
+# Reciclado por número de peticiones; el jitter evita que todos se reinicien a la vez
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10)
+
+# Reciclado por memoria: umbral de USS por worker (0 = reparto del límite entre workers).
+# Se compara la memoria privada: el RSS incluye las páginas compartidas con el master.
+MAX_WORKER_RSS_MB = _env_int('GUNICORN_MAX_WORKER_RSS_MB', 0)
+RSS_CHECK_EVERY = _env_int('GUNICORN_RSS_CHECK_EVERY', 20)
+
+# Puerto dedicado de métricas en el master (0 = solo /prometheus/metrics en el de la API)
+METRICS_PORT = _env_int('PROMETHEUS_METRICS_PORT', 0)
+METRICS_ADDR = os.getenv('PROMETHEUS_METRICS_ADDR', '0.0.0.0')
+
+
+def _rss_threshold(num_workers, shared_mb=0):
+    if MAX_WORKER_RSS_MB:
+        return MAX_WORKER_RSS_MB
+    return (MEMORY_MB * 0.8 - shared_mb) / max(num_workers, 1)
+
+
+# Con gthread post_request corre en varios hilos: next() sobre count es atómico en CPython
+_state = {'rss_threshold_mb': _rss_threshold(TUNED_WORKERS or 1), 'requests': itertools.count(1)}
+
+
+# ----------------------------------------------------------------------------
+# Hooks
+# ----------------------------------------------------------------------------
+def _autotuned(server):
+    # Solo si el nº de workers es el del plan (ni GUNICORN_WORKERS ni --workers)
+    return (AUTOTUNE and server.cfg.preload_app and 'GUNICORN_WORKERS' not in os.environ
+            and server.cfg.workers == TUNED_WORKERS)
+
+
+def _retune(server):
+    """Reajusta el nº de workers con la memoria privada medida en los workers vivos."""
+    master = rss_mb()
+    private = [uss_mb(pid) for pid in list(server.WORKERS)]
+    private = [value for value in private if value]
+    if not master or not private:
+        return
+    workers, _, _ = plan_workers(
+        CPUS, MEMORY_MB, max(private) * RSS_HEADROOM, MAX_WORKERS,
+        server.cfg.worker_class_str, server.cfg.threads, shared_mb=master)
+    # Lo heredan los workers que se creen a partir de ahora
+    _state['rss_threshold_mb'] = _rss_threshold(workers, shared_mb=master)
+    server.log.info('autotune: master_rss=%.0fMB worker_uss=%.0fMB workers=%s->%s rss_recycle=%.0fMB',
+                    master, max(private), server.num_workers, workers, _state['rss_threshold_mb'])
+    # El bucle del master crea o para workers hasta llegar al nuevo número
+    server.num_workers = workers
+
+
+def _retune_later(server):
+    time.sleep(AUTOTUNE_SETTLE)
+    try:
+        _retune(server)
+    except Exception:  # noqa: BLE001 - el reajuste es una mejora, nunca debe tumbar el master
+        server.log.exception('autotune: no se pudo reajustar con la memoria de los workers')
+
+
+def when_ready(server):
+    # Con --preload el master ya tiene la app calentada. Antes de crear los workers solo hay
+    # su RSS, cota por arriba de lo que costará cada uno; la medida real (USS de los
+    # workers, sin las páginas compartidas) llega en _retune pasado AUTOTUNE_SETTLE.
+    # La clase de worker ya está fijada en este punto: solo se ajusta el número.
+    measured = rss_mb() if server.cfg.preload_app else None
+    if measured and _autotuned(server):
+        server.num_workers, _, _ = plan_workers(
+            CPUS, MEMORY_MB, measured * RSS_HEADROOM, MAX_WORKERS,
+            server.cfg.worker_class_str, server.cfg.threads)
+        if AUTOTUNE_SETTLE:
+            threading.Thread(target=_retune_later, args=(server,), daemon=True,
+                             name='gunicorn-autotune').start()
+    _state['rss_threshold_mb'] = _rss_threshold(server.num_workers)
+    server.log.info(
+        'autotune: cpus=%s memory=%sMB master_rss=%s workers=%s class=%s threads=%s '
+        'max_db_connections=%s max_requests=%s(+%s) rss_recycle=%.0fMB',
+        CPUS, MEMORY_MB, f'{measured:.0f}MB' if measured else 'n/a', server.num_workers,
+        server.cfg.worker_class_str, server.cfg.threads,
+        server.num_workers * server.cfg.threads, server.cfg.max_requests,
+        server.cfg.max_requests_jitter, _state['rss_threshold_mb'])
+
+    if METRICS_PORT and os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from core.metrics import start_metrics_server
+        start_metrics_server(METRICS_PORT, METRICS_ADDR)
+        server.log.info('metrics: %s:%s dir=%s', METRICS_ADDR, METRICS_PORT,
+                        os.environ['PROMETHEUS_MULTIPROC_DIR'])
+
+
+def post_worker_init(worker):
+    # El inventario de personalizaciones usa el ORM y la caché: se calcula en los workers
+    # (nunca en el master) y el puerto de métricas lo lee de los ficheros multiproceso
+    if METRICS_PORT and os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from django.conf import settings
+
+        from api.metrics import start_inventory_refresh
+        start_inventory_refresh(settings.METRICS_INVENTORY_REFRESH)
+
+
+def child_exit(server, worker):
+    # En el master, también para los workers reciclados por max_requests o por RSS
+    from core.metrics import mark_worker_dead
+    mark_worker_dead(worker.pid)
+
+
+def post_request(worker, req, environ, resp):
+    if next(_state['requests']) % RSS_CHECK_EVERY:
+        return
+    current = uss_mb() or rss_mb()
+    if current and current > _state['rss_threshold_mb']:
+        worker.log.info('worker %s: memoria %.0fMB > %.0fMB, reciclando', worker.pid, current,
+                        _state['rss_threshold_mb'])
+        # Termina al acabar la petición en curso; el master crea uno nuevo
+        worker.alive = False
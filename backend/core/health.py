@@ -0,0 +1,133 @@
+# backend/core/health.py
+"""
+Sondas de salud servidas ANTES de Django (envolviendo la aplicación WSGI/ASGI), sin
+pasar por MIDDLEWARE, URLconf ni ALLOWED_HOSTS:
+
+  * /healthz -> liveness: el proceso responde. No toca la base de datos.
+  * /readyz  -> readiness: conexión a la BD y migraciones aplicadas. El resultado se
+                cachea HEALTHCHECK_READY_CACHE_SECONDS, así sondas frecuentes (o
+                varias réplicas del kubelet) no generan carga en Postgres.
+"""
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+
+LIVENESS_PATH = '/healthz'
+READINESS_PATH = '/readyz'
+
+_LIVENESS_BODY = json.dumps({'status': 'ok'}).encode()
+
+
+class ReadinessCheck:
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.checked_at = None
+        self.result = None
+        # Las migraciones no se "desaplican" durante la vida del proceso: una vez
+        # comprobadas, no hace falta volver a cargar el grafo de migraciones.
+        self.migrations_ok = False
+
+    def get(self):
+        """Devuelve (ok, checks). Solo un hilo refresca; el resto usa el último resultado."""
+        now = time.monotonic()
+        if self.result is not None and now - self.checked_at < self.ttl:
+            return self.result
+        if not self.lock.acquire(blocking=self.result is None):
+            return self.result
+        try:
+            if self.result is None or time.monotonic() - self.checked_at >= self.ttl:
+                self.result = self.run()
+                self.checked_at = time.monotonic()
+            return self.result
+        finally:
+            self.lock.release()
+
+    def run(self):
+        checks = {'database': 'ok', 'migrations': 'ok'}
+        # Fuera del ciclo de petición de Django no se emiten request_started/finished:
+        # se respeta CONN_MAX_AGE a mano.
+        close_old_connections()
+        try:
+            connection = connections[DEFAULT_DB_ALIAS]
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if not self.migrations_ok:
+                pending = self.pending_migrations(connection)
+                if pending:
+                    checks['migrations'] = f'{pending} pending'
+                else:
+                    self.migrations_ok = True
+        except Exception as exc:
+            checks['database'] = f'error: {exc.__class__.__name__}'
+            checks['migrations'] = 'unknown'
+        finally:
+            close_old_connections()
+        ok = all(value == 'ok' for value in checks.values())
+        return ok, checks
+
+    @staticmethod
+    def pending_migrations(connection):
+        from api.startup import migration_plan
+
+        return len(migration_plan(connection))
+
+
+def _probe_path(path):
+    path = path.rstrip('/') or '/'
+    return path if path in (LIVENESS_PATH, READINESS_PATH) else None
+
+
+def _probe(path, readiness):
+    """(status, body) para las rutas de sonda, o None si la ruta es de la aplicación."""
+    path = _probe_path(path)
+    if path == LIVENESS_PATH:
+        return 200, _LIVENESS_BODY
+    if path == READINESS_PATH:
+        ok, checks = readiness.get()
+        body = json.dumps({'status': 'ok' if ok else 'unavailable', 'checks': checks}).encode()
+        return (200 if ok else 503), body
+    return None
+
+
+def _readiness():
+    return ReadinessCheck(getattr(settings, 'HEALTHCHECK_READY_CACHE_SECONDS', 5.0))
+
+
+_REASONS = {200: '200 OK', 503: '503 Service Unavailable'}
+_HEADERS = [('Content-Type', 'application/json'), ('Cache-Control', 'no-store')]
+
+
+class HealthCheckWSGIMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.readiness = _readiness()
+
+    def __call__(self, environ, start_response):
+        probe = _probe(environ.get('PATH_INFO', ''), self.readiness)
+        if probe is None:
+            return self.app(environ, start_response)
+        status, body = probe
+        start_response(_REASONS[status], _HEADERS + [('Content-Length', str(len(body)))])
+        return [body]
+
+
+class HealthCheckASGIMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.readiness = _readiness()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or _probe_path(scope['path']) is None:
+            return await self.app(scope, receive, send)
+        from asgiref.sync import sync_to_async
+
+        # La comprobación de readiness usa el ORM síncrono
+        status, body = await sync_to_async(_probe)(scope['path'], self.readiness)
+        headers = [(name.lower().encode(), value.encode()) for name, value in _HEADERS]
+        headers.append((b'content-length', str(len(body)).encode()))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,64 @@
+# backend/core/metrics.py
+"""
+Exportación de métricas Prometheus con varios workers de gunicorn.
+
+Sin PROMETHEUS_MULTIPROC_DIR cada worker guarda sus métricas en memoria y un scrape solo
+ve las del worker que lo atiende: los contadores saltan entre scrapes y los histogramas
+salen parciales. Con la variable (entrypoint.sh la fija al lanzar gunicorn, con el
+directorio vacío), prometheus_client escribe los valores de cada proceso en ficheros
+mmap y el scrape los suma:
+
+  * /prometheus/metrics (puerto de la API) agrega los ficheros en el worker que atiende.
+  * PROMETHEUS_METRICS_PORT: servidor HTTP en un hilo del master de gunicorn
+    (core/gunicorn_conf.py); los scrapes no ocupan workers ni compiten con la API.
+
+Al morir un worker (child_exit) se descartan sus gauges en vivo; contadores e
+histogramas se conservan para que los totales no retrocedan. El master solo lee esos
+ficheros: no toca el ORM ni la caché, cuyos candados y conexiones heredarían los
+workers creados en pleno scrape. El inventario de personalizaciones lo calcula cada
+worker en un hilo propio (api/metrics.py, post_worker_init) y llega por los ficheros.
+"""
+import os
+
+from django.http import HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+
+
+def multiprocess_dir():
+    return os.environ.get('PROMETHEUS_MULTIPROC_DIR') or None
+
+
+def export_registry():
+    """
+    Registro a exportar: el global del proceso o, en modo multiproceso, uno nuevo que
+    suma los ficheros de todos los workers.
+    """
+    if not multiprocess_dir():
+        return REGISTRY
+    from prometheus_client.multiprocess import MultiProcessCollector
+
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    """Sustituye a la vista de django_prometheus (en un worker: puede usar el ORM)."""
+    from api.metrics import refresh_inventory
+
+    refresh_inventory()
+    return HttpResponse(generate_latest(export_registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+def start_metrics_server(port, addr='0.0.0.0'):
+    """Puerto dedicado (hilo del master de gunicorn). Solo en modo multiproceso."""
+    from prometheus_client import start_http_server
+
+    return start_http_server(port, addr=addr, registry=export_registry())
+
+
+def mark_worker_dead(pid):
+    if multiprocess_dir():
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,45 @@
+# backend/core/middleware.py
+"""
+Variantes de los middlewares con estado de Django (sesión, CSRF, autenticación por
+sesión, mensajes) que no se ejecutan en las rutas sin estado (STATELESS_PATH_PREFIXES).
+
+La API autentica con JWT (DRF asigna `request.user` en la vista) y nunca usa sesiones
+ni mensajes; solo el admin los necesita. Son subclases de las originales para que los
+checks del admin (admin.E408/E409/E410) las sigan reconociendo.
+"""
+from django.conf import settings
+from django.contrib.auth import middleware as auth_middleware
+from django.contrib.messages import middleware as messages_middleware
+from django.contrib.sessions import middleware as sessions_middleware
+from django.middleware import csrf
+
+
+def is_stateless_request(request):
+    return request.path_info.startswith(tuple(getattr(settings, 'STATELESS_PATH_PREFIXES', ())))
+
+
+class StatelessPathsMixin:
+    def __call__(self, request):
+        if is_stateless_request(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(StatelessPathsMixin, sessions_middleware.SessionMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(StatelessPathsMixin, csrf.CsrfViewMiddleware):
+    # process_view lo invoca el handler por separado, no __call__
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if is_stateless_request(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class AuthenticationMiddleware(StatelessPathsMixin, auth_middleware.AuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(StatelessPathsMixin, messages_middleware.MessageMiddleware):
+    pass
@@ -0,0 +1,39 @@
+# backend/core/preload.py
+"""
+Calentamiento de la aplicación antes de atender peticiones.
+
+Django importa el URLconf (y con él vistas, serializers, DRF y simplejwt) en la primera
+petición de cada worker. `warm_up()` hace ese trabajo al crear la aplicación; con
+`gunicorn --preload` ocurre una sola vez en el master y los workers lo heredan al
+hacer fork (memoria compartida copy-on-write).
+
+Por eso api/views.py importa serializers y módulos auxiliares (git_history incluido) a
+nivel de módulo: un import diferido dentro de una vista se ejecutaría después del fork,
+una vez por worker, y ensuciaría sus páginas. ImportTimeParsingTests comprueba que el
+calentamiento los deja cargados.
+"""
+import gc
+
+from django.db import connections
+
+
+def warm_up():
+    from django.contrib.auth.hashers import get_hashers
+    from django.urls import get_resolver
+    from rest_framework.settings import api_settings
+    from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+    # URLconf completo + tablas de reverse
+    get_resolver().reverse_dict
+    # Las clases de DRF/simplejwt se configuran como rutas y se importan al primer acceso
+    for name in ('DEFAULT_RENDERER_CLASSES', 'DEFAULT_PARSER_CLASSES',
+                 'DEFAULT_AUTHENTICATION_CLASSES', 'DEFAULT_PERMISSION_CLASSES'):
+        getattr(api_settings, name)
+    jwt_settings.AUTH_TOKEN_CLASSES
+    get_hashers()
+
+    # Ninguna conexión abierta debe cruzar el fork
+    connections.close_all()
+    # Los objetos ya creados pasan a la generación permanente: el GC de los workers no
+    # los recorre y no "ensucia" sus páginas compartidas.
+    gc.freeze()
@@ -6,7 +6,6 @@ Django settings for core project.
 from pathlib import Path
 from datetime import timedelta
 import os
-import urllib.request
 from corsheaders.defaults import default_headers, default_methods
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -63,7 +62,7 @@ USE_X_FORWARDED_HOST = True
 if IS_PROD:
     SECURE_SSL_REDIRECT = True
     # Dejar pasar health checks sin redirigir
-    SECURE_REDIRECT_EXEMPT = [r"^healthz$", r"^version$"]
+    SECURE_REDIRECT_EXEMPT = [r"^healthz$", r"^readyz$", r"^version$"]
     SESSION_COOKIE_SECURE = True
     SESSION_COOKIE_SAMESITE = "Lax"
     CSRF_COOKIE_SECURE = True
@@ -159,6 +158,24 @@ DATABASES = {
     }
 }
 
+# DATABASE_URL (opcional) reemplaza la configuración anterior. Pensado para
+# benchmarks y pruebas locales, ej: DATABASE_URL=sqlite:///bench.sqlite3
+if os.environ.get("DATABASE_URL"):
+    import dj_database_url
+    DATABASES = {"default": dj_database_url.parse(os.environ["DATABASE_URL"])}
+
+# Conexiones persistentes entre peticiones (con comprobación antes de reutilizarlas).
+# Django abre una conexión por hilo: con workers gthread las conexiones máximas hacia
+# Postgres son workers * threads (when_ready en core/gunicorn_conf.py lo registra).
+DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", "60"))
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# Personalizaciones particionadas por país (solo PostgreSQL): lo aplica la migración 0009;
+# después se gestiona con `manage.py customization_partitions` (ver api/partitioning.py).
+# Con la variable activa las consultas por país añaden el filtro que poda particiones.
+CUSTOMIZATION_PARTITIONING = os.getenv("CUSTOMIZATION_PARTITIONING", "false").lower() in (
+    "1", "true", "yes", "on")
+
 # --- APPS & MIDDLEWARE ---
 INSTALLED_APPS = [
     "django.contrib.admin",
@@ -178,17 +195,22 @@ MIDDLEWARE = [
     "django_prometheus.middleware.PrometheusBeforeMiddleware",  # Primero
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # Archivos estáticos
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    # Sesión, CSRF, auth por sesión y mensajes se saltan en STATELESS_PATH_PREFIXES (core/middleware.py)
+    "core.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
     "corsheaders.middleware.CorsMiddleware",  # CORS antes de Common
     "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
+    "core.middleware.CsrfViewMiddleware",
+    "core.middleware.AuthenticationMiddleware",
+    "core.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "api.profiling.ProfilingMiddleware",  # Opt-in: cabecera X-Profile (staff) o muestreo
     "django_prometheus.middleware.PrometheusAfterMiddleware",  # Último
 ]
 
+# Rutas sin estado: la API (JWT) y el scrape de Prometheus. El admin conserva la pila completa.
+STATELESS_PATH_PREFIXES = ("/api/", "/prometheus/")
+
 STORAGES = {
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
@@ -223,8 +245,71 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    # JSONRenderer con medición del tiempo de render (ver api/profiling.py)
+    "DEFAULT_RENDERER_CLASSES": (
+        "api.profiling.ProfiledJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
 }
 
+# --- PERFILADO POR PETICIÓN ---
+# Fracción de peticiones perfiladas para las métricas de Prometheus (0 = ninguna; la
+# cabecera de un usuario staff solo añade Server-Timing y el log de consultas lentas).
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_HEADER = "X-Profile"
+
+# --- MÉTRICAS ---
+# Cada cuántos segundos recalcula cada worker de gunicorn el inventario de
+# personalizaciones (api/metrics.py); memoizado por versión del catálogo.
+METRICS_INVENTORY_REFRESH = float(os.getenv("METRICS_INVENTORY_REFRESH", "60"))
+
+# --- CACHÉ ---
+# Caché local por proceso. Las claves del catálogo incluyen `CatalogVersion`
+# (ver api/catalog.py), así que no hace falta una caché compartida para invalidar.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "pmbok-default",
+    }
+}
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", "3600"))
+# Un solo cálculo por clave ante fallos concurrentes (ver api/singleflight.py). Con esta caché
+# local agrupa los hilos de cada worker; con una caché compartida, también workers y réplicas.
+# LOCK_TIMEOUT: vida máxima del candado (más que el cálculo más lento); WAIT_TIMEOUT: espera
+# máxima antes de calcular por cuenta propia; STALE_TIMEOUT: vida del último valor servido
+# mientras se recalcula (SERVE_STALE=0 obliga a esperar siempre el valor nuevo).
+SINGLE_FLIGHT_LOCK_TIMEOUT = int(os.getenv("SINGLE_FLIGHT_LOCK_TIMEOUT", "60"))
+SINGLE_FLIGHT_WAIT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_WAIT_TIMEOUT", "10"))
+SINGLE_FLIGHT_STALE_TIMEOUT = int(os.getenv("SINGLE_FLIGHT_STALE_TIMEOUT", "86400"))
+SINGLE_FLIGHT_SERVE_STALE = os.getenv("SINGLE_FLIGHT_SERVE_STALE", "1").lower() in ("1", "true", "yes")
+# Grafos de flujo ITTO en memoria por proceso (framework x país x departamento), ver api/itto_graph.py
+ITTO_GRAPH_CACHE_SIZE = int(os.getenv("ITTO_GRAPH_CACHE_SIZE", "32"))
+
+# --- EXPORTACIÓN (ver api/export.py) ---
+# Registros por lote del cursor de servidor y carpeta de los ficheros generados por la cola
+# (compartida entre el contenedor web y el worker).
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "2000"))
+EXPORT_ROOT = Path(os.getenv("EXPORT_ROOT", str(BASE_DIR / "exports")))
+# Horas que se conservan los ficheros generados; después `run_jobs` los borra.
+EXPORT_TTL_HOURS = float(os.getenv("EXPORT_TTL_HOURS", "24"))
+
+# --- HISTORIAL GIT (ver api/git_history.py) ---
+# Commits leídos y maquetados por estado del repositorio; /api/git-history/ pagina sobre ellos.
+GIT_HISTORY_MAX_COMMITS = int(os.getenv("GIT_HISTORY_MAX_COMMITS", "5000"))
+GIT_HISTORY_PAGE_MAX = int(os.getenv("GIT_HISTORY_PAGE_MAX", "500"))
+GIT_HISTORY_CACHE_TIMEOUT = int(os.getenv("GIT_HISTORY_CACHE_TIMEOUT", "3600"))
+
+# --- SONDAS DE SALUD ---
+# Segundos durante los que /readyz reutiliza el último resultado (ver core/health.py).
+HEALTHCHECK_READY_CACHE_SECONDS = float(os.getenv("HEALTHCHECK_READY_CACHE_SECONDS", "5"))
+
+# --- COLA DE TRABAJOS (ver api/jobs.py y `manage.py run_jobs`) ---
+# Procesos por lote (una transacción y una actualización de progreso por lote).
+JOBS_CHUNK_SIZE = int(os.getenv("JOBS_CHUNK_SIZE", "200"))
+# Un trabajo "running" sin latido durante este tiempo se considera huérfano y se reintenta.
+JOBS_HEARTBEAT_TIMEOUT = int(os.getenv("JOBS_HEARTBEAT_TIMEOUT", "300"))
+JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "3"))
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
@@ -243,6 +328,11 @@ LOGGING = {
             "level": "WARNING",
             "propagate": False,
         },
+        "api.profiling": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
     },
 }
 
@@ -4,9 +4,12 @@ from django.contrib import admin
 from django.urls import path, include
 from django.http import JsonResponse
 
+from core.metrics import metrics_view
+
 
 def healthz(_request):
-    # Responde 200 sin redirección para /healthz (sin slash)
+    # En gunicorn/uvicorn /healthz lo responde core.health antes de Django; esta vista
+    # queda para runserver con otro WSGI_APPLICATION y para el cliente de tests.
     return JsonResponse({"status": "ok"}, status=200)
 
 
@@ -25,5 +28,6 @@ urlpatterns = [
     path("version", version, name="version"),   # opcional
     path("api/", include("api.urls")),
     path(ADMIN_URL, admin.site.urls),           # admin movido
-    path('prometheus/', include('django_prometheus.urls')),
+    # Misma ruta que django_prometheus.urls, con agregación multiproceso (core/metrics.py)
+    path('prometheus/metrics', metrics_view, name='prometheus-django-metrics'),
 ]
@@ -13,4 +13,20 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
-application = get_wsgi_application()
+from core.health import HealthCheckWSGIMiddleware  # noqa: E402
+from core.preload import warm_up  # noqa: E402
+
+
+def create_application():
+    """
+    Aplicación WSGI lista para servir. Con DJANGO_WARMUP=1 (por defecto) se carga todo lo
+    que la primera petición cargaría (ver core/preload.py), pensado para `--preload`.
+    """
+    app = get_wsgi_application()
+    if os.getenv('DJANGO_WARMUP', '1') == '1':
+        warm_up()
+    # /healthz y /readyz se responden antes de Django (ver core/health.py)
+    return HealthCheckWSGIMiddleware(app)
+
+
+application = create_application()
@@ -1,4 +1,4 @@
-import React, { useEffect, useCallback, useState } from 'react';
+import React, { useEffect, useCallback, useRef, useState } from 'react';
 import ReactFlow, {
   useNodesState,
   useEdgesState,
@@ -10,123 +10,139 @@ import ReactFlow, {
   Background,
   Controls
 } from 'reactflow';
-import dagre from 'dagre';
 import 'reactflow/dist/style.css';
 import apiClient from '../../api/apiClient';
 
-// Configuración del layout
-const dagreGraph = new dagre.graphlib.Graph();
-dagreGraph.setDefaultEdgeLabel(() => ({}));
+// El backend (api/git_history.py) ya asigna fila y carril a cada commit: aquí solo se
+// convierten a coordenadas. Fila -> eje X (izquierda a derecha), carril -> eje Y.
 const nodeWidth = 220;
 const nodeHeight = 80;
-
-const getLayoutedElements = (nodes: any[], edges: any[]) => {
-  dagreGraph.setGraph({ rankdir: 'LR' });
-
-  nodes.forEach((node) => {
-    dagreGraph.setNode(node.id, { width: nodeWidth, height: nodeHeight });
-  });
-
-  edges.forEach((edge) => {
-    dagreGraph.setEdge(edge.source, edge.target);
-  });
-
-  dagre.layout(dagreGraph);
-
-  nodes.forEach((node) => {
-    const nodeWithPosition = dagreGraph.node(node.id);
-    node.targetPosition = Position.Left;
-    node.sourcePosition = Position.Right;
-    node.position = {
-      x: nodeWithPosition.x - nodeWidth / 2,
-      y: nodeWithPosition.y - nodeHeight / 2,
-    };
-    return node;
-  });
-
-  return { nodes, edges };
-};
+const rowSpacing = nodeWidth + 60;
+const laneSpacing = nodeHeight + 40;
+const PAGE_SIZE = 100;
+
+interface GitCommit {
+  id: string;
+  parents: string[];
+  author: string;
+  message: string;
+  row?: number;
+  column?: number;
+  is_merge?: boolean;
+}
+
+interface GitEdge {
+  source: string;
+  target: string;
+  type: 'parent' | 'merge';
+}
+
+interface GitHistoryPage {
+  commits: GitCommit[];
+  edges?: GitEdge[];
+  state?: string;
+  next_offset?: number | null;
+  error?: string;
+}
+
+const toNode = (commit: GitCommit, index: number) => ({
+  id: commit.id,
+  data: {
+    label: (
+      <div className="p-2 text-left w-full overflow-hidden">
+        <div className="flex justify-between items-center mb-1 border-b border-gray-600 pb-1">
+          <span className="text-blue-300 font-mono font-bold text-xs">{commit.id}</span>
+          <span className="text-[9px] text-gray-400 bg-gray-800 px-1.5 py-0.5 rounded">{commit.author}</span>
+        </div>
+        <div className="text-gray-100 text-xs font-medium line-clamp-2 leading-tight" title={commit.message}>
+          {commit.message}
+        </div>
+      </div>
+    )
+  },
+  // Historial más reciente a la derecha, como en el layout anterior
+  position: { x: -(commit.row ?? index) * rowSpacing, y: (commit.column ?? 0) * laneSpacing },
+  targetPosition: Position.Left,
+  sourcePosition: Position.Right,
+  style: {
+    background: '#1e293b',
+    color: 'white',
+    border: commit.is_merge ? '1px solid #a78bfa' : '1px solid #475569',
+    borderRadius: '8px',
+    width: nodeWidth,
+    fontSize: '12px',
+    boxShadow: '0 4px 6px -1px rgba(0, 0, 0, 0.3)'
+  },
+});
+
+const toEdge = (edge: GitEdge) => ({
+  id: `e-${edge.target}-${edge.source}`,
+  source: edge.target,
+  target: edge.source,
+  type: 'smoothstep',
+  animated: true,
+  style: { stroke: edge.type === 'merge' ? '#a78bfa' : '#64748b', strokeWidth: 2 },
+  markerEnd: { type: MarkerType.ArrowClosed, color: edge.type === 'merge' ? '#a78bfa' : '#64748b' },
+});
 
 const GitFlowVisualizer = () => {
   const [nodes, setNodes, onNodesChange] = useNodesState([]);
   const [edges, setEdges, onEdgesChange] = useEdgesState([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [nextOffset, setNextOffset] = useState<number | null>(0);
   const [error, setError] = useState<string | null>(null);
+  // Estado de las refs con el que se maquetaron las páginas ya cargadas
+  const historyState = useRef<string | undefined>(undefined);
 
-  useEffect(() => {
-    setLoading(true);
-    apiClient.get('/git-history/')
+  // Cada página trae sus commits ya maquetados: se añaden sin recalcular los anteriores.
+  const loadPage = useCallback((offset: number): Promise<void> => {
+    return apiClient.get<GitHistoryPage>('/git-history/', { params: { offset, limit: PAGE_SIZE } })
       .then((response) => {
         const data = response.data;
-        
         if (data.error) {
-            throw new Error(data.error);
+          throw new Error(data.error);
         }
-        
-        if (!data.commits || data.commits.length === 0) {
-            setError("No se encontraron commits en el historial.");
-            setLoading(false);
-            return;
+        // Si las refs cambiaron entre páginas, los offsets ya no cuadran con lo cargado
+        // (ids de nodos/aristas duplicados): se descarta todo y se recarga desde el principio.
+        if (offset > 0 && data.state !== historyState.current) {
+          return loadPage(0);
+        }
+        historyState.current = data.state;
+        if (offset === 0 && (!data.commits || data.commits.length === 0)) {
+          setError("No se encontraron commits en el historial.");
+          return;
         }
+        // Respuestas sin layout (SHA de entorno o error): aristas a partir de los padres
+        const pageEdges = data.edges ?? data.commits.flatMap(commit =>
+          commit.parents.map((parent, position) => ({
+            source: commit.id, target: parent, type: position ? 'merge' : 'parent'
+          } as GitEdge)));
+        // La primera página sustituye lo cargado; las siguientes se añaden
+        const pageNodes = data.commits.map((commit, index) => toNode(commit, offset + index));
+        setNodes(previous => offset === 0 ? pageNodes : [...previous, ...pageNodes]);
+        setEdges(previous => offset === 0 ? pageEdges.map(toEdge) : [...previous, ...pageEdges.map(toEdge)]);
+        setNextOffset(data.next_offset ?? null);
+      });
+  }, [setNodes, setEdges]);
 
-        const rawCommits = data.commits;
-        const newNodes: any[] = [];
-        const newEdges: any[] = [];
-
-        rawCommits.forEach((commit: any) => {
-          // Nodo
-          newNodes.push({
-            id: commit.id,
-            data: { 
-              label: (
-                <div className="p-2 text-left w-full overflow-hidden">
-                  <div className="flex justify-between items-center mb-1 border-b border-gray-600 pb-1">
-                    <span className="text-blue-300 font-mono font-bold text-xs">{commit.id}</span>
-                    <span className="text-[9px] text-gray-400 bg-gray-800 px-1.5 py-0.5 rounded">{commit.author}</span>
-                  </div>
-                  <div className="text-gray-100 text-xs font-medium line-clamp-2 leading-tight" title={commit.message}>
-                    {commit.message}
-                  </div>
-                </div>
-              ) 
-            },
-            position: { x: 0, y: 0 },
-            style: { 
-              background: '#1e293b', 
-              color: 'white', 
-              border: '1px solid #475569', 
-              borderRadius: '8px',
-              width: nodeWidth,
-              fontSize: '12px',
-              boxShadow: '0 4px 6px -1px rgba(0, 0, 0, 0.3)'
-            },
-          });
-
-          // Edges
-          commit.parents.forEach((parentId: string) => {
-            newEdges.push({
-              id: `e-${parentId}-${commit.id}`,
-              source: parentId,
-              target: commit.id,
-              type: 'smoothstep',
-              animated: true,
-              style: { stroke: '#64748b', strokeWidth: 2 },
-              markerEnd: { type: MarkerType.ArrowClosed, color: '#64748b' },
-            });
-          });
-        });
-
-        const { nodes: layoutedNodes, edges: layoutedEdges } = getLayoutedElements(newNodes, newEdges);
-        setNodes(layoutedNodes);
-        setEdges(layoutedEdges);
-        setLoading(false);
-      })
+  useEffect(() => {
+    setLoading(true);
+    loadPage(0)
       .catch(err => {
           console.error("Error fetching git history:", err);
           setError(err.response?.data?.error || err.message || "Error desconocido al conectar con Git");
-          setLoading(false);
-      });
-  }, [setNodes, setEdges]);
+      })
+      .finally(() => setLoading(false));
+  }, [loadPage]);
+
+  const loadMore = () => {
+    if (nextOffset === null || loadingMore) return;
+    setLoadingMore(true);
+    loadPage(nextOffset)
+      .catch(err => console.error("Error fetching git history:", err))
+      .finally(() => setLoadingMore(false));
+  };
 
   const onConnect = useCallback((params: Edge | Connection) => setEdges((eds) => addEdge(params, eds)), [setEdges]);
 
@@ -161,6 +177,12 @@ const GitFlowVisualizer = () => {
                 <span className={`w-2 h-2 rounded-full ${loading ? 'bg-yellow-500' : error ? 'bg-red-500' : 'bg-green-500 animate-pulse'}`}></span>
                 Historial del Proyecto
             </h3>
+            {!loading && !error && nextOffset !== null && (
+                <button onClick={loadMore} disabled={loadingMore}
+                        className="mt-2 w-full text-xs text-white px-2 py-1 bg-blue-600 rounded hover:bg-blue-700 disabled:opacity-50 transition">
+                    {loadingMore ? 'Cargando...' : 'Cargar commits anteriores'}
+                </button>
+            )}
         </div>
 
         {/* Loading State */}
@@ -26,6 +26,19 @@ const ensureIds = (items: ITTOItem[]): ITTOItem[] => {
     }));
 };
 
+// Con ?itto=compact, un campo ITTO en null significa "hereda la lista del proceso base".
+type ITTOField = 'inputs' | 'tools_and_techniques' | 'outputs';
+type CompactCustomization = Omit<IProcessCustomization, ITTOField> & Record<ITTOField, ITTOItem[] | null>;
+type CompactProcess<T extends AnyProcess> = Omit<T, 'customizations' | 'type'> & { customizations: CompactCustomization[] };
+
+// El backend guarda los ITTOs en forma canónica (sin 'id'), así que las personalizaciones también se completan aquí.
+const withIds = (customization: CompactCustomization, base: Record<ITTOField, ITTOItem[]>): IProcessCustomization => ({
+    ...customization,
+    inputs: ensureIds(customization.inputs ?? base.inputs),
+    tools_and_techniques: ensureIds(customization.tools_and_techniques ?? base.tools_and_techniques),
+    outputs: ensureIds(customization.outputs ?? base.outputs),
+});
+
 // Definición de la estructura del contexto
 interface ProcessContextType {
     processes: AnyProcess[];
@@ -74,13 +87,13 @@ export const ProcessProvider: React.FC<{ children: ReactNode }> = ({ children })
 
         try {
             const [pmbokResponse, scrumResponse, departmentsResponse] = await Promise.all([
-                apiClient.get<IPMBOKProcess[]>('/pmbok-processes/', { signal: controller.signal }),
-                apiClient.get<IScrumProcess[]>('/scrum-processes/', { signal: controller.signal }),
+                apiClient.get<CompactProcess<IPMBOKProcess>[]>('/pmbok-processes/', { params: { itto: 'compact' }, signal: controller.signal }),
+                apiClient.get<CompactProcess<IScrumProcess>[]>('/scrum-processes/', { params: { itto: 'compact' }, signal: controller.signal }),
                 apiClient.get<IDepartment[]>('/departments/', { signal: controller.signal })
             ]);
 
-            const pmbokData = pmbokResponse.data.map(p => ({ ...p, type: 'pmbok' as const, inputs: ensureIds(p.inputs), tools_and_techniques: ensureIds(p.tools_and_techniques), outputs: ensureIds(p.outputs) }));
-            const scrumData = scrumResponse.data.map(p => ({ ...p, type: 'scrum' as const, inputs: ensureIds(p.inputs), tools_and_techniques: ensureIds(p.tools_and_techniques), outputs: ensureIds(p.outputs) }));
+            const pmbokData = pmbokResponse.data.map(p => ({ ...p, type: 'pmbok' as const, inputs: ensureIds(p.inputs), tools_and_techniques: ensureIds(p.tools_and_techniques), outputs: ensureIds(p.outputs), customizations: p.customizations.map(c => withIds(c, p)) }));
+            const scrumData = scrumResponse.data.map(p => ({ ...p, type: 'scrum' as const, inputs: ensureIds(p.inputs), tools_and_techniques: ensureIds(p.tools_and_techniques), outputs: ensureIds(p.outputs), customizations: p.customizations.map(c => withIds(c, p)) }));
 
             setProcesses([...pmbokData, ...scrumData]);
             setDepartments(departmentsResponse.data);
@@ -139,9 +152,9 @@ export const ProcessProvider: React.FC<{ children: ReactNode }> = ({ children })
                     );
 
                     if (existingIndex !== -1) {
-                        updatedProcess.customizations[existingIndex] = customization;
+                        updatedProcess.customizations[existingIndex] = withIds(customization, p);
                     } else {
-                        updatedProcess.customizations.push(customization);
+                        updatedProcess.customizations.push(withIds(customization, p));
                     }
                     return updatedProcess;
                 }